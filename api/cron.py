@@ -1,11 +1,18 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import asyncio
-from .scheduler import AutoUpdater, MONITORED_SITES
+from .scheduler import AutoUpdater, MONITORED_SITES, load_monitored_sites
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Handle cron job requests - automatically check all sites"""
+        try:
+            load_monitored_sites()
+        except (ValueError, RuntimeError) as e:
+            # The site registry is not configured (or its client is missing)
+            self._send_error_response(500, str(e))
+            return
+        
         try:
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -37,7 +44,7 @@ class handler(BaseHTTPRequestHandler):
             print(f"Failed to send error response: {e}")
     
     async def run_scheduled_checks(self):
-        """Run scheduled checks for all monitored sites"""
+        """Run scheduled checks for a time-boxed slice of the due monitored sites (loaded by the caller)"""
         updater = AutoUpdater()
         
         if not MONITORED_SITES:
@@ -50,16 +57,22 @@ class handler(BaseHTTPRequestHandler):
         
         print(f"Running scheduled checks for {len(MONITORED_SITES)} monitored sites")
         
-        results = await updater.check_all_monitored_sites()
+        # Sites left over when the time budget runs out are picked up by the next run
+        slice_result = await updater.check_due_slice()
+        results = slice_result['results']
         
         # Count updates
         sites_checked = len([r for r in results if r['status'] == 'checked'])
         updates_made = len([r for r in results if r.get('updated', False)])
         
         return {
-            'status': 'completed',
+            'status': 'partial' if slice_result['remaining'] else 'completed',
             'sites_checked': sites_checked,
             'updates_made': updates_made,
             'total_monitored': len(MONITORED_SITES),
+            'sites_due': slice_result['due'],
+            'sites_remaining': slice_result['remaining'],
+            'cursor': slice_result['cursor'],
+            'cycle': updater.last_cycle_stats,
             'results': results
-        } 
\ No newline at end of file
+        }
\ No newline at end of file
@@ -28,13 +28,15 @@ else:
     print("No OpenAI API key found - AI enhancement will be disabled")
 
 class WebsiteCrawler:
-    def __init__(self, base_url: str, max_pages: int = 20, depth_limit: int = 3):
+    def __init__(self, base_url: str, max_pages: int = 20, depth_limit: int = 3, connection_limit: Optional[int] = None):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
         self.max_pages = max_pages
         self.depth_limit = depth_limit
         self.visited_urls = set()
         self.pages_data = []
+        # Cap on open connections, so concurrent monitoring crawls share a global budget
+        self.connection_limit = connection_limit
         
         # Create SSL context that doesn't verify certificates for problematic sites
         self.ssl_context = ssl.create_default_context()
@@ -62,48 +64,54 @@ class WebsiteCrawler:
                     return None
                 
                 content = await response.text()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Extract metadata
-                title = soup.find('title')
-                title = title.get_text().strip() if title else url.split('/')[-1]
-                
-                description = soup.find('meta', attrs={'name': 'description'})
-                description = description.get('content', '').strip() if description else ''
-                
-                # Remove scripts, styles, nav, footer, etc.
-                for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-                    tag.decompose()
-                
-                # Get main content
-                main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main'))
-                if not main_content:
-                    main_content = soup.find('body')
-                
-                content_text = main_content.get_text() if main_content else soup.get_text()
-                content_text = ' '.join(content_text.split())  # Clean whitespace
-                
-                # Find internal links
-                links = []
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    full_url = urljoin(url, href)
-                    if urlparse(full_url).netloc == self.domain and full_url not in self.visited_urls:
-                        links.append(full_url)
-                
-                return {
-                    'url': url,
-                    'title': title,
-                    'description': description,
-                    'content': content_text,
-                    'content_length': len(content_text),
-                    'links': links[:10]  # Limit links per page
-                }
-                
+            
+            # Parsing is CPU-bound; off the event loop a site timeout can fire while a large page is parsed
+            return await asyncio.to_thread(self._parse_page, url, content)
+            
         except Exception as e:
             print(f"Error fetching {url}: {type(e).__name__}: {e}")
             return None
     
+    def _parse_page(self, url: str, content: str) -> Dict:
+        """Metadata, main content and links of a fetched HTML page"""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Extract metadata
+        title = soup.find('title')
+        title = title.get_text().strip() if title else url.split('/')[-1]
+        
+        description = soup.find('meta', attrs={'name': 'description'})
+        description = description.get('content', '').strip() if description else ''
+        
+        # Remove scripts, styles, nav, footer, etc.
+        for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+            tag.decompose()
+        
+        # Get main content
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main'))
+        if not main_content:
+            main_content = soup.find('body')
+        
+        content_text = main_content.get_text() if main_content else soup.get_text()
+        content_text = ' '.join(content_text.split())  # Clean whitespace
+        
+        # Find internal links
+        links = []
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            full_url = urljoin(url, href)
+            if urlparse(full_url).netloc == self.domain and full_url not in self.visited_urls:
+                links.append(full_url)
+        
+        return {
+            'url': url,
+            'title': title,
+            'description': description,
+            'content': content_text,
+            'content_length': len(content_text),
+            'links': links[:10]  # Limit links per page
+        }
+    
     def calculate_importance_score(self, page_data: Dict, all_pages: List[Dict]) -> float:
         score = 0.0
         
@@ -203,8 +211,8 @@ class WebsiteCrawler:
             return 'General'
     
     async def crawl(self) -> List[Dict]:
-        # Create connector with SSL context
-        connector = aiohttp.TCPConnector(ssl=self.ssl_context)
+        # Create connector with SSL context (aiohttp's default pool size unless a share was assigned)
+        connector = aiohttp.TCPConnector(ssl=self.ssl_context, limit=self.connection_limit or 100)
         
         async with aiohttp.ClientSession(connector=connector) as session:
             queue = [(self.base_url, 0)]  # (url, depth)
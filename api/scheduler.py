@@ -6,12 +6,76 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import os
+from functools import lru_cache
 from .generate import WebsiteCrawler, LLMSTxtGenerator
+from .site_registry import create_site_registry
 
-# In-memory storage for demo (in production, use a database)
+# Monitored sites are cached here and reloaded from the site registry on every invocation
 MONITORED_SITES = {}
 UPDATE_HISTORY = {}
 
+# Durable site registry: SITE_REGISTRY_BACKEND=redis with SITE_REGISTRY_URL (Vercel KV, Upstash), or
+# sqlite / file with SITE_REGISTRY_PATH on storage that outlives the function instance. Neither has a
+# default, so a missing setting fails each request with an error instead of silently losing sites on
+# the next cold start
+SITE_REGISTRY_BACKEND = os.getenv('SITE_REGISTRY_BACKEND', 'redis')
+
+# A cron run checks due sites for at most this long (below the function's maxDuration)
+# and leaves the rest to the next run, which continues after the stored cursor
+CRON_TIME_BUDGET_SECONDS = float(os.getenv('CRON_TIME_BUDGET_SECONDS', '45'))
+CRON_MIN_SITE_SECONDS = 10
+CRON_CURSOR_KEY = 'cron_cursor'
+
+# Each site's check interval adapts to how often it changes: multiplied by MONITOR_INTERVAL_BACKOFF
+# after a check without changes, divided by it after a change, and kept within the bounds below
+MONITOR_ADAPTIVE_INTERVALS = os.getenv('MONITOR_ADAPTIVE_INTERVALS', 'true').lower() == 'true'
+MONITOR_INTERVAL_BACKOFF = float(os.getenv('MONITOR_INTERVAL_BACKOFF', '2'))
+MONITOR_MIN_INTERVAL_HOURS = float(os.getenv('MONITOR_MIN_INTERVAL_HOURS', '1'))
+MONITOR_MAX_INTERVAL_HOURS = float(os.getenv('MONITOR_MAX_INTERVAL_HOURS', '168'))
+CHECK_HISTORY_SIZE = 20
+
+# Due sites are checked on this many concurrent workers, each bounded by a timeout
+# and an equal share of the connection budget
+MONITOR_WORKERS = int(os.getenv('MONITOR_WORKERS', '8'))
+MONITOR_SITE_TIMEOUT_SECONDS = float(os.getenv('MONITOR_SITE_TIMEOUT_SECONDS', '300'))
+MONITOR_CONNECTION_BUDGET = int(os.getenv('MONITOR_CONNECTION_BUDGET', '32'))
+
+@lru_cache(maxsize=None)
+def _registry():
+    """The configured site registry, created on first use; raises ValueError when its location is not set"""
+    return create_site_registry(
+        SITE_REGISTRY_BACKEND,
+        os.getenv('SITE_REGISTRY_URL') if SITE_REGISTRY_BACKEND == 'redis' else os.getenv('SITE_REGISTRY_PATH')
+    )
+
+def load_monitored_sites() -> Dict[str, Dict]:
+    """Refresh MONITORED_SITES from the registry; other instances may have changed it"""
+    MONITORED_SITES.clear()
+    MONITORED_SITES.update(_registry().load_all())
+    return MONITORED_SITES
+
+def current_interval(config: Dict) -> float:
+    """Seconds between checks: the adapted interval, or the configured one until a check adapted it"""
+    return config.get('current_interval') or config.get('check_interval', 86400)  # 24 hours default
+
+def adapt_interval(config: Dict, changed: bool):
+    """Record a completed check and back the interval off (no change) or tighten it (change)"""
+    config['check_history'] = (config.get('check_history', []) + [[time.time(), changed]])[-CHECK_HISTORY_SIZE:]
+    if MONITOR_ADAPTIVE_INTERVALS:
+        interval = current_interval(config)
+        interval = interval / MONITOR_INTERVAL_BACKOFF if changed else interval * MONITOR_INTERVAL_BACKOFF
+        config['current_interval'] = min(max(interval, MONITOR_MIN_INTERVAL_HOURS * 3600), MONITOR_MAX_INTERVAL_HOURS * 3600)
+
+def change_rate(config: Dict) -> Optional[float]:
+    """Share of the recorded checks that found a change"""
+    history = config.get('check_history')
+    if not history:
+        return None
+    return round(sum(1 for _, changed in history if changed) / len(history), 3)
+
+def is_due(config: Dict, now: float) -> bool:
+    return now - config.get('last_check', 0) >= current_interval(config)
+
 class ChangeDetector:
     def __init__(self):
         pass
@@ -39,8 +103,12 @@ class ChangeDetector:
         
         return hashlib.md5(structure_signature.encode()).hexdigest()
     
-    def detect_changes(self, old_hash: str, new_hash: str, old_pages: List[Dict], new_pages: List[Dict]) -> Dict:
-        """Detect what changed between two crawls"""
+    def page_digests(self, pages_data: List[Dict]) -> Dict[str, str]:
+        """Digest of each page's title and section by URL, which is all the registry keeps of a crawl"""
+        return {page['url']: hashlib.md5(f"{page['title']}|{page['section']}".encode()).hexdigest() for page in pages_data}
+    
+    def detect_changes(self, old_hash: str, new_hash: str, old_digests: Dict[str, str], new_pages: List[Dict]) -> Dict:
+        """Detect what changed between two crawls, given the page digests of the earlier one"""
         changes = {
             'structure_changed': old_hash != new_hash,
             'new_pages': [],
@@ -54,30 +122,27 @@ class ChangeDetector:
             return changes
         
         # Compare pages
-        old_urls = {page['url']: page for page in old_pages}
         new_urls = {page['url']: page for page in new_pages}
+        new_digests = self.page_digests(new_pages)
         
         # Find new and removed pages
-        changes['new_pages'] = [url for url in new_urls if url not in old_urls]
-        changes['removed_pages'] = [url for url in old_urls if url not in new_urls]
+        changes['new_pages'] = [url for url in new_urls if url not in old_digests]
+        changes['removed_pages'] = [url for url in old_digests if url not in new_urls]
         
         # Find modified pages (title or section changes)
-        for url in set(old_urls.keys()) & set(new_urls.keys()):
-            old_page = old_urls[url]
+        for url in set(old_digests.keys()) & set(new_urls.keys()):
             new_page = new_urls[url]
             
-            if old_page['title'] != new_page['title'] or old_page['section'] != new_page['section']:
+            if old_digests[url] != new_digests[url]:
                 changes['modified_pages'].append({
                     'url': url,
-                    'old_title': old_page['title'],
                     'new_title': new_page['title'],
-                    'old_section': old_page['section'],
                     'new_section': new_page['section']
                 })
         
         # Calculate severity
         total_changes = len(changes['new_pages']) + len(changes['removed_pages']) + len(changes['modified_pages'])
-        total_pages = len(old_pages)
+        total_pages = len(old_digests)
         
         if total_pages == 0:
             change_percentage = 100
@@ -98,8 +163,9 @@ class ChangeDetector:
 class AutoUpdater:
     def __init__(self):
         self.change_detector = ChangeDetector()
+        self.last_cycle_stats = None
     
-    async def check_site_for_updates(self, site_config: Dict) -> Dict:
+    async def check_site_for_updates(self, site_config: Dict, connection_limit: Optional[int] = None) -> Dict:
         """Check a single site for updates"""
         url = site_config['url']
         last_hash = site_config.get('last_hash')
@@ -109,7 +175,7 @@ class AutoUpdater:
         
         try:
             # Crawl the website
-            crawler = WebsiteCrawler(url, site_config.get('max_pages', 20))
+            crawler = WebsiteCrawler(url, site_config.get('max_pages', 20), connection_limit=connection_limit)
             pages_data = await crawler.crawl()
             
             if not pages_data:
@@ -135,8 +201,9 @@ class AutoUpdater:
             
             # Check for changes
             if last_hash and last_hash != new_hash:
-                old_pages = site_config.get('last_pages', [])
-                changes = self.change_detector.detect_changes(last_hash, new_hash, old_pages, pages_data)
+                # Entries saved before page digests were introduced carry the full pages instead
+                old_digests = site_config.get('page_digests') or self.change_detector.page_digests(site_config.get('last_pages', []))
+                changes = self.change_detector.detect_changes(last_hash, new_hash, old_digests, pages_data)
                 result['changes'] = changes
                 
                 # Decide whether to regenerate based on severity
@@ -145,7 +212,7 @@ class AutoUpdater:
                 if should_update:
                     # Regenerate llms.txt
                     generator = LLMSTxtGenerator(url, pages_data)
-                    new_llms_txt = generator.generate_llms_txt()
+                    new_llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
                     
                     result.update({
                         'updated': True,
@@ -156,7 +223,7 @@ class AutoUpdater:
                     # Update stored data
                     MONITORED_SITES[url].update({
                         'last_hash': new_hash,
-                        'last_pages': pages_data,
+                        'page_digests': self.change_detector.page_digests(pages_data),
                         'last_update': time.time(),
                         'llms_txt': new_llms_txt
                     })
@@ -168,12 +235,12 @@ class AutoUpdater:
             elif not last_hash:
                 # First time checking this site
                 generator = LLMSTxtGenerator(url, pages_data)
-                new_llms_txt = generator.generate_llms_txt()
+                new_llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
                 
                 MONITORED_SITES[url] = {
                     'url': url,
                     'last_hash': new_hash,
-                    'last_pages': pages_data,
+                    'page_digests': self.change_detector.page_digests(pages_data),
                     'last_check': time.time(),
                     'last_update': time.time(),
                     'llms_txt': new_llms_txt,
@@ -192,7 +259,16 @@ class AutoUpdater:
             
             # Update last check time
             if url in MONITORED_SITES:
+                # Only the digests of an entry saved with its full pages are kept
+                legacy_pages = MONITORED_SITES[url].pop('last_pages', None)
+                if legacy_pages is not None:
+                    MONITORED_SITES[url].setdefault('page_digests', self.change_detector.page_digests(legacy_pages))
                 MONITORED_SITES[url]['last_check'] = time.time()
+                if last_hash:
+                    # Only a change that moved the baseline counts: a minimal one leaves last_hash as it was,
+                    # so counting it would shorten the interval again on every later check
+                    adapt_interval(MONITORED_SITES[url], result['updated'])
+                _registry().put(url, MONITORED_SITES[url])
             
             return result
             
@@ -204,32 +280,133 @@ class AutoUpdater:
                 'timestamp': time.time()
             }
     
-    async def check_all_monitored_sites(self) -> List[Dict]:
-        """Check all monitored sites for updates"""
-        results = []
+    async def _timed_check(self, config: Dict, connection_limit: int, site_timeout: float) -> Dict:
+        """Check one site; timeouts and errors become that site's result (parsing and generation run on threads, so the timeout can fire during them)"""
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self.check_site_for_updates(config, connection_limit), timeout=site_timeout)
+        except asyncio.TimeoutError:
+            result = {'url': config['url'], 'status': 'error', 'message': f'Timed out after {site_timeout:g}s', 'timestamp': time.time()}
+        except Exception as e:
+            result = {'url': config['url'], 'status': 'error', 'message': str(e), 'timestamp': time.time()}
+        result['duration_seconds'] = round(time.monotonic() - started, 3)
+        return result
+    
+    async def _check_with_timeout(self, config: Dict, semaphore: asyncio.Semaphore,
+                                  connection_limit: int, site_timeout: float) -> Dict:
+        """Check one site within its worker slot"""
+        async with semaphore:
+            return await self._timed_check(config, connection_limit, site_timeout)
+    
+    async def check_all_monitored_sites(self, workers: int = MONITOR_WORKERS,
+                                        site_timeout: float = MONITOR_SITE_TIMEOUT_SECONDS) -> List[Dict]:
+        """Check all due monitored sites for updates on a bounded pool of concurrent workers"""
+        results = {}
+        due_sites = []
         current_time = time.time()
         
-        for url, config in MONITORED_SITES.items():
-            last_check = config.get('last_check', 0)
-            check_interval = config.get('check_interval', 86400)  # 24 hours
-            
+        # Snapshot first: checks may add or replace MONITORED_SITES entries while they run
+        sites = list(MONITORED_SITES.items())
+        for url, config in sites:
             # Check if it's time to check this site
-            if current_time - last_check >= check_interval:
-                result = await self.check_site_for_updates(config)
-                results.append(result)
+            if is_due(config, current_time):
+                due_sites.append(config)
             else:
-                next_check = last_check + check_interval
-                results.append({
+                next_check = config.get('last_check', 0) + current_interval(config)
+                results[url] = {
                     'url': url,
                     'status': 'skipped',
                     'message': f'Next check scheduled for {datetime.fromtimestamp(next_check)}',
                     'timestamp': current_time
-                })
+                }
+        
+        if due_sites:
+            workers = max(1, min(workers, len(due_sites)))
+            connection_limit = max(1, MONITOR_CONNECTION_BUDGET // workers)
+            semaphore = asyncio.Semaphore(workers)
+            cycle_started = time.monotonic()
+            checked = await asyncio.gather(*(
+                self._check_with_timeout(config, semaphore, connection_limit, site_timeout) for config in due_sites
+            ))
+            durations = [r['duration_seconds'] for r in checked]
+            self.last_cycle_stats = {
+                'sites': len(due_sites),
+                'workers': workers,
+                'connections_per_site': connection_limit,
+                'site_timeout_seconds': site_timeout,
+                'cycle_seconds': round(time.monotonic() - cycle_started, 3),
+                'avg_site_seconds': round(sum(durations) / len(durations), 3),
+                'max_site_seconds': max(durations),
+                'errors': len([r for r in checked if r['status'] == 'error'])
+            }
+            results.update((result['url'], result) for result in checked)
+        
+        # Report in MONITORED_SITES order, as the sequential loop did
+        return [results[url] for url, _ in sites]
+    
+    async def check_due_slice(self, time_budget: float = CRON_TIME_BUDGET_SECONDS, workers: int = MONITOR_WORKERS,
+                              site_timeout: float = MONITOR_SITE_TIMEOUT_SECONDS) -> Dict:
+        """Check due sites for at most time_budget seconds, continuing after the stored cursor"""
+        started = time.monotonic()
+        deadline = started + time_budget
+        cursor = _registry().get_meta(CRON_CURSOR_KEY)
+        
+        # Due sites in URL order, starting after the cursor and wrapping around, so sites that keep
+        # failing (and stay due) cannot starve the ones behind them
+        due = sorted(url for url, config in MONITORED_SITES.items() if is_due(config, time.time()))
+        if cursor:
+            due = [url for url in due if url > cursor] + [url for url in due if url <= cursor]
+        
+        workers = max(1, min(workers, len(due)))
+        connection_limit = max(1, MONITOR_CONNECTION_BUDGET // workers)
+        queue = list(reversed(due))
+        started_urls = []
+        results = []
         
-        return results
+        async def worker():
+            while queue:
+                remaining = deadline - time.monotonic()
+                if remaining < CRON_MIN_SITE_SECONDS:
+                    return
+                url = queue.pop()
+                started_urls.append(url)
+                results.append(await self._timed_check(MONITORED_SITES[url], connection_limit, min(site_timeout, remaining)))
+        
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        
+        # Sites are started in queue order, so the last started one marks where the next run continues
+        if started_urls:
+            _registry().set_meta(CRON_CURSOR_KEY, started_urls[-1])
+        
+        results.sort(key=lambda result: due.index(result['url']))
+        durations = [r['duration_seconds'] for r in results]
+        self.last_cycle_stats = {
+            'sites': len(results),
+            'workers': workers,
+            'connections_per_site': connection_limit,
+            'site_timeout_seconds': site_timeout,
+            'cycle_seconds': round(time.monotonic() - started, 3),
+            'avg_site_seconds': round(sum(durations) / len(durations), 3) if durations else 0,
+            'max_site_seconds': max(durations, default=0),
+            'errors': len([r for r in results if r['status'] == 'error'])
+        }
+        return {
+            'results': results,
+            'due': len(due),
+            'remaining': len(queue),
+            'cursor': started_urls[-1] if started_urls else cursor,
+            'time_budget_seconds': time_budget
+        }
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
+        try:
+            load_monitored_sites()
+        except (ValueError, RuntimeError) as e:
+            # The site registry is not configured (or its client is missing)
+            self._send_error_response(500, str(e))
+            return
+        
         try:
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -273,8 +450,9 @@ class handler(BaseHTTPRequestHandler):
                         result = {'error': f'Site {url} is not being monitored'}
                 else:
                     # Check all sites
-                    results = asyncio.run(AutoUpdater().check_all_monitored_sites())
-                    result = {'checked_sites': results, 'total_sites': len(MONITORED_SITES)}
+                    updater = AutoUpdater()
+                    results = asyncio.run(updater.check_all_monitored_sites())
+                    result = {'checked_sites': results, 'total_sites': len(MONITORED_SITES), 'cycle': updater.last_cycle_stats}
             
             elif action == 'list_sites':
                 # List all monitored sites
@@ -285,6 +463,8 @@ class handler(BaseHTTPRequestHandler):
                         'last_check': datetime.fromtimestamp(config.get('last_check', 0)).isoformat(),
                         'last_update': datetime.fromtimestamp(config.get('last_update', 0)).isoformat(),
                         'check_interval_hours': config.get('check_interval', 86400) / 3600,
+                        'current_interval_hours': current_interval(config) / 3600,
+                        'change_rate': change_rate(config),
                         'max_pages': config.get('max_pages', 20)
                     })
                 result = {'monitored_sites': sites_info}
@@ -0,0 +1,163 @@
+"""
+Durable registry of monitored sites for the serverless functions.
+
+Module-level dicts are lost on every cold start, so the scheduler and cron
+functions keep each site's config here and reload it per invocation. Small
+metadata values, such as the cron cursor, live next to the sites.
+
+Three backends are available: a single JSON file, rewritten atomically on
+every change, SQLite with one row per site, and any Redis-protocol store
+(Vercel KV, Upstash, Redis) through the `redis` package, with one hash field
+per site. Any object with the same methods (load_all, put, delete, get_meta,
+set_meta) can be plugged in.
+
+There is no default location: a function instance's filesystem (/tmp) is
+gone after a cold start, so the file and SQLite backends need a path on
+storage that outlives it, and the Redis backend needs its URL.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class FileSiteRegistry:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict:
+        if not self.path.exists():
+            return {'sites': {}, 'meta': {}}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write(self, data: Dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def load_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            return self._read()['sites']
+
+    def put(self, url: str, config: Dict):
+        with self._lock:
+            data = self._read()
+            data['sites'][url] = config
+            self._write(data)
+
+    def delete(self, url: str):
+        with self._lock:
+            data = self._read()
+            if data['sites'].pop(url, None) is not None:
+                self._write(data)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._read()['meta'].get(key)
+
+    def set_meta(self, key: str, value: Optional[str]):
+        with self._lock:
+            data = self._read()
+            data['meta'][key] = value
+            self._write(data)
+
+
+class SQLiteSiteRegistry:
+    """One row per site, so saving a site does not rewrite the others"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Checks run concurrently and may save from worker threads
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS sites (url TEXT PRIMARY KEY, data TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);'
+        )
+
+    def load_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute('SELECT url, data FROM sites').fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def put(self, url: str, config: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO sites (url, data) VALUES (?, ?) ON CONFLICT(url) DO UPDATE SET data = excluded.data',
+                (url, json.dumps(config, ensure_ascii=False))
+            )
+
+    def delete(self, url: str):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM sites WHERE url = ?', (url,))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Optional[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, value)
+            )
+
+
+class RedisSiteRegistry:
+    """Sites and metadata in two Redis hashes, so saving a site does not rewrite the others"""
+
+    def __init__(self, url: str, name: str = 'site_registry'):
+        if redis is None:
+            raise RuntimeError("redis is required for the Redis site registry")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = {'sites': f"{name}:sites", 'meta': f"{name}:meta"}
+
+    def load_all(self) -> Dict[str, Dict]:
+        return {url: json.loads(data) for url, data in self.client.hgetall(self.keys['sites']).items()}
+
+    def put(self, url: str, config: Dict):
+        self.client.hset(self.keys['sites'], url, json.dumps(config, ensure_ascii=False))
+
+    def delete(self, url: str):
+        self.client.hdel(self.keys['sites'], url)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self.client.hget(self.keys['meta'], key)
+
+    def set_meta(self, key: str, value: Optional[str]):
+        if value is None:
+            self.client.hdel(self.keys['meta'], key)
+        else:
+            self.client.hset(self.keys['meta'], key, value)
+
+
+SITE_REGISTRY_BACKENDS = {
+    'file': FileSiteRegistry,
+    'sqlite': SQLiteSiteRegistry,
+    'redis': RedisSiteRegistry,
+}
+
+
+def create_site_registry(backend: str, location: Optional[str]):
+    """The configured registry; location is a file path (file, sqlite) or a Redis URL (redis)"""
+    if backend not in SITE_REGISTRY_BACKENDS:
+        raise ValueError(f"Unknown site registry backend '{backend}' (use: {', '.join(SITE_REGISTRY_BACKENDS)})")
+    if not location:
+        setting = 'SITE_REGISTRY_URL' if backend == 'redis' else 'SITE_REGISTRY_PATH'
+        raise ValueError(f"{setting} must be set for the '{backend}' site registry; it has to point at storage "
+                         f"that outlives the function instance (not /tmp)")
+    return SITE_REGISTRY_BACKENDS[backend](location)
@@ -0,0 +1,33 @@
+"""
+Adaptive check intervals for monitored sites.
+
+Every completed check moves the site's interval: after a check that found
+nothing new it is multiplied by the backoff factor, after a change it is
+divided by it, and it always stays within the configured bounds. A site
+that never changes drifts to the maximum interval, while one that changes
+between most checks settles near its own change frequency. The outcomes
+of the recent checks are kept, so the observed change rate can be reported
+next to the interval.
+"""
+
+from typing import List, Optional
+
+HISTORY_SIZE = 20
+
+
+def next_interval(current: float, changed: bool, min_interval: float, max_interval: float, factor: float) -> float:
+    """The interval after a check: backed off when nothing changed, tightened after a change"""
+    interval = current / factor if changed else current * factor
+    return min(max(interval, min_interval), max_interval)
+
+
+def record_check(history: Optional[List], checked_at: float, changed: bool) -> List:
+    """history with this check's [time, changed] appended, keeping the last HISTORY_SIZE checks"""
+    return ((history or []) + [[checked_at, changed]])[-HISTORY_SIZE:]
+
+
+def change_rate(history: Optional[List]) -> Optional[float]:
+    """Share of the recorded checks that found a change, or None before the first one"""
+    if not history:
+        return None
+    return round(sum(1 for _, changed in history if changed) / len(history), 3)
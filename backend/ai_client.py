@@ -0,0 +1,181 @@
+"""
+Rate limiting and circuit breaking for the shared OpenAI client.
+
+GuardedOpenAIClient wraps an OpenAI (or OpenAI-compatible) client and exposes
+the same `chat.completions.create` and `beta.chat.completions.parse` entry
+points. Every call draws from a requests-per-minute and a tokens-per-minute
+bucket, and consecutive failures open a circuit breaker. A call that finds
+no free slot or an open breaker fails immediately with AIUnavailableError
+instead of sleeping, since the client is called from async request and
+monitor paths. While the breaker is open the client evaluates as falsy, so
+the existing `if not openai_client` checks fall back to heuristics without
+waiting out request timeouts. After the reset timeout a single trial call is
+let through; its outcome closes or re-opens the breaker.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict
+
+
+class AIUnavailableError(Exception):
+    """Raised instead of calling the API when the breaker is open or the rate limit has no free slot"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at capacity_per_minute"""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.refill_rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def take(self, amount: float):
+        """Take amount tokens, or raise AIUnavailableError without taking anything if not enough are available"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            deficit = amount - self.tokens
+            if deficit > 0:
+                raise AIUnavailableError(f"Rate limit reached, next slot in {deficit / self.refill_rate:.1f}s")
+            self.tokens -= amount
+
+    def adjust(self, amount: float):
+        """Return (positive) or charge (negative) tokens after the real usage is known"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and half-opens (one trial call) after reset_timeout seconds"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def available(self) -> bool:
+        """Whether a call could be let through right now (does not claim the half-open trial)"""
+        return self.state == 'closed' or (self.state == 'half_open' and not self._trial_in_flight)
+
+    def acquire(self) -> bool:
+        """Let a call through: always while closed, only the single trial call while half-open"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back the trial slot of a call that was acquired but never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._trial_in_flight = False
+            self.consecutive_failures += 1
+            half_open = self.opened_at is not None
+            if half_open or self.consecutive_failures >= self.failure_threshold:
+                # A failed half-open trial re-opens the breaker for another full timeout
+                if self.opened_at is None:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+
+
+class GuardedOpenAIClient:
+    def __init__(self, client: Any, requests_per_minute: float = 500, tokens_per_minute: float = 200000,
+                 failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.client = client
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {'calls': 0, 'failures': 0, 'rejected_open': 0, 'rejected_rate_limited': 0}
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: self._call(client.chat.completions.create, kwargs)
+        ))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            parse=lambda **kwargs: self._call(client.beta.chat.completions.parse, kwargs)
+        )))
+
+    def __bool__(self) -> bool:
+        return self.breaker.available()
+
+    @staticmethod
+    def _estimate_tokens(kwargs: Dict) -> int:
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in kwargs.get('messages', []))
+        return prompt_chars // 4 + kwargs.get('max_tokens', 500)
+
+    def _call(self, method: Callable, kwargs: Dict) -> Any:
+        if not self.breaker.acquire():
+            self.stats['rejected_open'] += 1
+            raise AIUnavailableError("OpenAI circuit breaker is open")
+
+        estimated_tokens = self._estimate_tokens(kwargs)
+        try:
+            self.request_bucket.take(1)
+            try:
+                self.token_bucket.take(estimated_tokens)
+            except AIUnavailableError:
+                self.request_bucket.adjust(1)
+                raise
+        except AIUnavailableError:
+            self.stats['rejected_rate_limited'] += 1
+            self.breaker.release()
+            raise
+
+        self.stats['calls'] += 1
+        try:
+            response = method(**kwargs)
+        except Exception:
+            self.stats['failures'] += 1
+            self.breaker.record_failure()
+            if self.breaker.state == 'open':
+                print(f"OpenAI circuit breaker open after {self.breaker.consecutive_failures} consecutive failures")
+            raise
+
+        self.breaker.record_success()
+        usage = getattr(response, 'usage', None)
+        total_tokens = getattr(usage, 'total_tokens', None)
+        if isinstance(total_tokens, int):
+            self.token_bucket.adjust(estimated_tokens - total_tokens)
+        return response
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'circuit_state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'times_opened': self.breaker.times_opened,
+        }
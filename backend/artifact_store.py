@@ -0,0 +1,194 @@
+"""
+Persistent store for generated llms.txt / llms-full.txt artifacts.
+
+Each artifact is written once per content hash together with its gzip and
+(when the brotli package is installed) brotli variants, so serving never
+recompresses or regenerates anything. A small metadata record per
+domain/artifact points at the current hash and is written last, which makes
+replacing an artifact atomic for readers. The replaced version's blobs are
+only deleted by the save after that, so a reader that loaded the old
+metadata just before the switch can still read them.
+
+Two backends are available: the local filesystem and any S3-compatible
+object store (AWS S3, MinIO) through boto3.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+ARTIFACT_NAMES = ('llms.txt', 'llms-full.txt')
+DOMAIN_PATTERN = re.compile(r'^[a-z0-9][a-z0-9.\-]*(:\d+)?$')
+
+# Content-Encoding name -> key suffix of the stored variant
+ENCODING_SUFFIXES = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+
+
+def artifact_domain(url: str) -> str:
+    """Domain key an artifact for url is stored under"""
+    return urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+
+
+def is_valid_artifact(domain: str, name: str) -> bool:
+    return bool(DOMAIN_PATTERN.match(domain)) and name in ARTIFACT_NAMES
+
+
+class LocalArtifactBackend:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def put(self, key: str, data: bytes, content_type: str = 'application/octet-stream'):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.root / key
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def delete(self, key: str):
+        try:
+            (self.root / key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3ArtifactBackend:
+    """S3-compatible backend; set endpoint_url to use MinIO or another compatible server"""
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None, region: Optional[str] = None):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for the S3 artifact backend")
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, data: bytes, content_type: str = 'application/octet-stream'):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ContentType=content_type)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response['Body'].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+class ArtifactStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _meta_key(domain: str, name: str) -> str:
+        return f"{domain}/{name}.meta.json"
+
+    @staticmethod
+    def _blob_key(domain: str, name: str, digest: str, encoding: str = 'identity') -> str:
+        return f"{domain}/{name}/{digest}{ENCODING_SUFFIXES[encoding]}"
+
+    def get_meta(self, domain: str, name: str) -> Optional[Dict]:
+        """Metadata of the current artifact: sha256, size, stored encodings and write time"""
+        if not is_valid_artifact(domain, name):
+            return None
+        data = self.backend.get(self._meta_key(domain, name))
+        return json.loads(data) if data else None
+
+    def save(self, url: str, name: str, content: str) -> Dict:
+        """Store content with its compressed variants and make it the current artifact; unchanged content is not rewritten"""
+        domain = artifact_domain(url)
+        if not is_valid_artifact(domain, name):
+            raise ValueError(f"Invalid artifact {domain}/{name}")
+
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        previous = self.get_meta(domain, name)
+        if previous and previous['sha256'] == digest:
+            return previous
+
+        variants = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(data, mode=brotli.MODE_TEXT)
+
+        for encoding, payload in variants.items():
+            self.backend.put(self._blob_key(domain, name, digest, encoding), payload, 'text/plain; charset=utf-8')
+
+        meta = {
+            'domain': domain,
+            'name': name,
+            'source_url': url,
+            'sha256': digest,
+            'size': len(data),
+            'encodings': {encoding: len(payload) for encoding, payload in variants.items()},
+            'stored_at': time.time(),
+            # Kept until the next save, so a reader still holding the old metadata can finish reading it
+            'previous': {'sha256': previous['sha256'], 'encodings': previous['encodings']} if previous else None,
+        }
+        self.backend.put(self._meta_key(domain, name), json.dumps(meta).encode('utf-8'), 'application/json')
+
+        # The version before the previous one has been unreachable for a whole save cycle
+        retired = previous.get('previous') if previous else None
+        if retired and retired['sha256'] not in (digest, previous['sha256']):
+            for encoding in retired.get('encodings', {}):
+                self.backend.delete(self._blob_key(domain, name, retired['sha256'], encoding))
+        return meta
+
+    def read(self, meta: Dict, encoding: str = 'identity') -> Optional[bytes]:
+        """Stored bytes of the artifact described by meta in the given encoding"""
+        return self.backend.get(self._blob_key(meta['domain'], meta['name'], meta['sha256'], encoding))
+
+
+def create_artifact_store(backend: str, local_dir: str, s3_bucket: Optional[str] = None, s3_prefix: str = '',
+                          s3_endpoint_url: Optional[str] = None, s3_region: Optional[str] = None) -> ArtifactStore:
+    if backend == 's3':
+        if not s3_bucket:
+            raise ValueError("ARTIFACT_S3_BUCKET must be set for the S3 artifact backend")
+        return ArtifactStore(S3ArtifactBackend(s3_bucket, s3_prefix, s3_endpoint_url, s3_region))
+    return ArtifactStore(LocalArtifactBackend(local_dir))
+
+
+def etag_for(meta: Dict, encoding: str = 'identity') -> str:
+    """Strong ETag per stored variant, since the bytes differ between encodings"""
+    suffix = '' if encoding == 'identity' else f"-{encoding}"
+    return f'"{meta["sha256"][:32]}{suffix}"'
+
+
+def choose_encoding(meta: Dict, accept_encoding: Optional[str]) -> str:
+    """Best stored encoding the client accepts (brotli, then gzip, then identity)"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        if token and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            accepted.add(token.strip().lower())
+
+    for encoding in ('br', 'gzip'):
+        if encoding in meta.get('encodings', {}) and (encoding in accepted or '*' in accepted):
+            return encoding
+    return 'identity'
@@ -0,0 +1,197 @@
+"""
+Cheap change probes that run before a monitoring crawl.
+
+A probe asks a site whether anything changed without crawling it, cheapest
+signal first:
+
+1. The sitemap is requested conditionally (If-None-Match / If-Modified-Since)
+   and its (loc, lastmod) entries are fingerprinted. A different fingerprint
+   means the site changed.
+2. The top pages of the last crawl are requested conditionally. A 304, an
+   unchanged ETag or Last-Modified, or (without validators) an identical body
+   digest means the page did not change.
+
+The outcome is "unchanged" only when every probe agrees. "changed" and
+"inconclusive" (no baseline yet, request errors) fall back to a full crawl.
+"""
+
+import asyncio
+import hashlib
+import ssl
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+SITEMAP_NAMESPACE = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+MAX_SUB_SITEMAPS = 50
+
+PROBE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+
+def page_validators(headers, body: str) -> Dict[str, Optional[str]]:
+    """What a later conditional request compares against: ETag, Last-Modified and a body digest"""
+    return {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'digest': hashlib.sha256(body.encode('utf-8')).hexdigest()[:32],
+    }
+
+
+def build_baseline(sitemap: Optional[Dict], pages: List[Dict], top_n: int) -> Dict:
+    """Baseline for the next probe: the sitemap state and validators of the first top_n crawled pages"""
+    validated = [(page['url'], page['http_validators']) for page in pages if page.get('http_validators')]
+    return {'sitemap': sitemap, 'pages': dict(validated[:top_n])}
+
+
+def _conditional_headers(validators: Optional[Dict]) -> Dict[str, str]:
+    headers = dict(PROBE_HEADERS)
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def _same_validators(previous: Dict, current: Dict) -> bool:
+    # The strongest validator both responses carry decides
+    for key in ('etag', 'last_modified', 'digest'):
+        if previous.get(key) and current.get(key):
+            return previous[key].removeprefix('W/') == current[key].removeprefix('W/')
+    return False
+
+
+def sitemap_entries(content: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """(loc, lastmod) pairs of a sitemap, and the child sitemap URLs if it is a sitemap index"""
+    root = ET.fromstring(content)
+    children = [loc.text.strip() for loc in root.findall('.//ns:sitemap/ns:loc', SITEMAP_NAMESPACE) if loc.text]
+    entries = []
+    for url in root.findall('.//ns:url', SITEMAP_NAMESPACE) or root.findall('.//url'):
+        loc = url.find('ns:loc', SITEMAP_NAMESPACE)
+        if loc is None:
+            loc = url.find('loc')
+        lastmod = url.find('ns:lastmod', SITEMAP_NAMESPACE)
+        if lastmod is None:
+            lastmod = url.find('lastmod')
+        if loc is not None and loc.text:
+            entries.append((loc.text.strip(), (lastmod.text or '').strip() if lastmod is not None else ''))
+    return entries, children
+
+
+def _fingerprint(entries: List[Tuple[str, str]]) -> str:
+    return hashlib.sha256('\n'.join(f"{loc}|{lastmod}" for loc, lastmod in sorted(entries)).encode('utf-8')).hexdigest()
+
+
+class ChangeProbe:
+    def __init__(self, base_url: str, connection_limit: Optional[int] = None, timeout: float = 15):
+        self.base_url = base_url.rstrip('/')
+        self.domain = urlparse(base_url).netloc
+        self.connection_limit = connection_limit
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        # Same relaxed certificate handling as the crawler
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.requests = 0
+
+    async def run(self, baseline: Optional[Dict]) -> Dict:
+        """Probe the site against baseline; the result's sitemap state belongs in the next baseline"""
+        connector = aiohttp.TCPConnector(ssl=self.ssl_context, limit=self.connection_limit or 100)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            previous_sitemap = (baseline or {}).get('sitemap')
+            sitemap = await self._probe_sitemap(session, previous_sitemap)
+
+            if not baseline:
+                outcome, reason = 'inconclusive', 'No baseline from an earlier crawl yet'
+            elif sitemap and previous_sitemap and sitemap['fingerprint'] != previous_sitemap.get('fingerprint'):
+                outcome, reason = 'changed', 'Sitemap URLs or lastmod values changed'
+            elif not baseline.get('pages'):
+                outcome, reason = 'inconclusive', 'No page validators to compare'
+            else:
+                outcome, reason = await self._probe_pages(session, baseline['pages'])
+                if outcome == 'unchanged':
+                    reason = f"Sitemap and {reason}" if sitemap else f"{reason} (no sitemap)"
+
+        return {
+            'outcome': outcome,
+            'reason': reason,
+            'requests': self.requests,
+            'checked_at': datetime.now().isoformat(),
+            'sitemap': sitemap,
+        }
+
+    async def _get(self, session: aiohttp.ClientSession, url: str, validators: Optional[Dict] = None):
+        self.requests += 1
+        async with session.get(url, headers=_conditional_headers(validators), timeout=self.timeout) as response:
+            body = await response.text(encoding='utf-8', errors='replace') if response.status == 200 else ''
+            return response.status, response.headers, body
+
+    async def _probe_sitemap(self, session: aiohttp.ClientSession, previous: Optional[Dict]) -> Optional[Dict]:
+        """Current sitemap state ({url, etag, last_modified, fingerprint, entries, with_lastmod}), or None without a sitemap"""
+        candidates = [previous['url']] if previous else await self._sitemap_candidates(session)
+        for sitemap_url in candidates:
+            try:
+                status, headers, body = await self._get(session, sitemap_url, previous if previous and not previous.get('is_index') else None)
+                if status == 304 and previous:
+                    return previous
+                if status != 200:
+                    continue
+                entries, children = sitemap_entries(body)
+                # Child sitemaps are separate files, so a sitemap index is always read in full
+                for child in children[:MAX_SUB_SITEMAPS]:
+                    child_status, _, child_body = await self._get(session, child)
+                    if child_status == 200:
+                        entries.extend(sitemap_entries(child_body)[0])
+                entries = [(loc, lastmod) for loc, lastmod in entries if urlparse(loc).netloc == self.domain]
+                if not entries:
+                    continue
+                return {
+                    'url': sitemap_url,
+                    'is_index': bool(children),
+                    'etag': headers.get('ETag'),
+                    'last_modified': headers.get('Last-Modified'),
+                    'fingerprint': _fingerprint(entries),
+                    'entries': len(entries),
+                    'with_lastmod': len([1 for _, lastmod in entries if lastmod]),
+                }
+            except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+                print(f"Sitemap probe failed for {sitemap_url}: {e}")
+        return None
+
+    async def _sitemap_candidates(self, session: aiohttp.ClientSession) -> List[str]:
+        candidates = [f"{self.base_url}/sitemap_index.xml", f"{self.base_url}/sitemap.xml"]
+        try:
+            status, _, body = await self._get(session, f"{self.base_url}/robots.txt")
+            if status == 200:
+                declared = [line.split(':', 1)[1].strip() for line in body.split('\n') if line.lower().startswith('sitemap:')]
+                candidates = declared + [c for c in candidates if c not in declared]
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        return candidates
+
+    async def _probe_pages(self, session: aiohttp.ClientSession, pages: Dict[str, Dict]) -> Tuple[str, str]:
+        async def probe(url: str, validators: Dict) -> str:
+            try:
+                status, headers, body = await self._get(session, url, validators)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return 'error'
+            if status == 304:
+                return 'unchanged'
+            if status != 200:
+                return 'changed'
+            return 'unchanged' if _same_validators(validators, page_validators(headers, body)) else 'changed'
+
+        outcomes = await asyncio.gather(*(probe(url, validators) for url, validators in pages.items()))
+        changed = [url for url, outcome in zip(pages, outcomes) if outcome == 'changed']
+        if changed:
+            return 'changed', f"{len(changed)}/{len(pages)} probed pages changed (first: {changed[0]})"
+        if 'error' in outcomes:
+            return 'inconclusive', f"{outcomes.count('error')}/{len(pages)} page probes failed"
+        return 'unchanged', f"{len(pages)} probed pages unchanged"
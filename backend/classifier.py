@@ -0,0 +1,191 @@
+"""
+Local section classifier for crawled pages.
+
+Builds a TF-IDF matrix over page titles, URL paths and content previews and
+assigns every page to the nearest section centroid in a single pass. Centroids
+are seeded from pages that already carry a label (AI assignments or keyword
+matches) and refined with a few k-means style iterations.
+"""
+
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-]+[a-z0-9]|[a-z0-9]{2,}")
+
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'that', 'this', 'from', 'your', 'you', 'are',
+    'was', 'were', 'has', 'have', 'not', 'but', 'all', 'can', 'will', 'our',
+    'how', 'what', 'when', 'who', 'why', 'about', 'more', 'into', 'out', 'use',
+    'www', 'http', 'https', 'html', 'htm', 'php', 'aspx', 'index', 'page',
+    'der', 'die', 'das', 'und', 'mit', 'für', 'von', 'den', 'ein', 'eine', 'ist',
+}
+
+DEFAULT_SECTION = 'General'
+
+
+def is_available() -> bool:
+    """Return True if NumPy is installed and local classification can run"""
+    return np is not None
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _url_tokens(url: str) -> List[str]:
+    path = urlparse(url).path.replace('/', ' ').replace('_', ' ').replace('-', ' ')
+    return tokenize(path)
+
+
+def page_tokens(page: Dict, preview_chars: int = 500) -> List[str]:
+    """Tokens representing a page: title and URL path are weighted twice"""
+    title_tokens = tokenize(page.get('title', ''))
+    url_tokens = _url_tokens(page.get('url', ''))
+    preview = (page.get('content') or '')[:preview_chars]
+    return title_tokens * 2 + url_tokens * 2 + tokenize(preview)
+
+
+class TfidfMatrix:
+    """Sparse (COO) TF-IDF representation of a list of token lists, rows L2-normalized"""
+
+    def __init__(self, documents: List[List[str]], max_features: int = 20000, min_df: int = 1):
+        self.n_docs = len(documents)
+
+        # Integer ids for every token occurrence, then (document, term) counts in one np.unique
+        term_ids = {}
+        flat_ids = [term_ids.setdefault(t, len(term_ids)) for tokens in documents for t in tokens]
+        n_terms = max(len(term_ids), 1)
+        doc_ids = np.repeat(np.arange(self.n_docs, dtype=np.int64), [len(tokens) for tokens in documents])
+        pairs, counts = np.unique(doc_ids * n_terms + np.asarray(flat_ids, dtype=np.int64), return_counts=True)
+        rows, term_cols = pairs // n_terms, pairs % n_terms
+
+        # Keep the max_features most frequent terms (by document frequency)
+        doc_freq = np.bincount(term_cols, minlength=n_terms)
+        kept = np.argsort(-doc_freq, kind='stable')[:max_features]
+        kept = kept[doc_freq[kept] >= min_df]
+        remap = np.full(n_terms, -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+
+        terms = list(term_ids)
+        self.vocabulary = {terms[t]: i for i, t in enumerate(kept.tolist())}
+        self.n_features = len(self.vocabulary)
+
+        selected = remap[term_cols] >= 0
+        self.rows = rows[selected]
+        self.cols = remap[term_cols[selected]]
+        tf = 1.0 + np.log(counts[selected].astype(np.float64))
+
+        df = doc_freq[kept].astype(np.float64)
+        self.idf = np.log((1.0 + self.n_docs) / (1.0 + df)) + 1.0
+        values = tf * self.idf[self.cols] if len(self.cols) else tf
+
+        # L2-normalize each row so dot products are cosine similarities
+        norms = np.sqrt(np.bincount(self.rows, weights=values ** 2, minlength=self.n_docs))
+        norms[norms == 0] = 1.0
+        self.values = values / norms[self.rows] if len(values) else values
+
+    def row_sums(self, row_mask: np.ndarray) -> np.ndarray:
+        """Dense sum of the selected rows (used to build centroids)"""
+        selected = row_mask[self.rows]
+        return np.bincount(self.cols[selected], weights=self.values[selected], minlength=self.n_features)
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """Multiply the sparse matrix by dense.T where dense has shape (k, n_features)"""
+        k = dense.shape[0]
+        scores = np.zeros((self.n_docs, k))
+        if not len(self.values):
+            return scores
+        for j in range(k):
+            weights = self.values * dense[j, self.cols]
+            scores[:, j] = np.bincount(self.rows, weights=weights, minlength=self.n_docs)
+        return scores
+
+
+class SectionClassifier:
+    """Nearest-centroid section assignment over a TF-IDF matrix of all pages"""
+
+    def __init__(self, min_similarity: float = 0.05, refine_iterations: int = 3, min_path_group: int = 3):
+        self.min_similarity = min_similarity
+        self.refine_iterations = refine_iterations
+        self.min_path_group = min_path_group
+
+    def _path_seeds(self, pages: List[Dict]) -> Dict[int, str]:
+        """Seed labels from first URL path segments shared by several pages"""
+        segments = {}
+        for i, page in enumerate(pages):
+            # Skip short locale prefixes such as /en/ or /de/
+            parts = [p for p in urlparse(page.get('url', '')).path.split('/') if len(p) > 2]
+            if len(parts) > 1:
+                segments[i] = parts[0]
+
+        counts = Counter(segments.values())
+        seeds = {}
+        for i, segment in segments.items():
+            if counts[segment] >= self.min_path_group and not segment.isdigit():
+                seeds[i] = segment.replace('-', ' ').replace('_', ' ').title()
+        return seeds
+
+    def classify(self, pages: List[Dict], seed_labels: Dict[int, str],
+                 fallback: Optional[Callable[[Dict], str]] = None) -> Tuple[List[str], List[float]]:
+        """
+        Assign a section to every page.
+
+        seed_labels maps page index to a known section name. Returns the section
+        list and, per page, the cosine similarity to its assigned centroid.
+        """
+        if not pages:
+            return [], []
+
+        seeds = {i: label for i, label in seed_labels.items() if label and label != DEFAULT_SECTION}
+        # URL path groups fill in for pages without a known label
+        for i, label in self._path_seeds(pages).items():
+            seeds.setdefault(i, label)
+
+        if not seeds:
+            sections = [fallback(p) if fallback else DEFAULT_SECTION for p in pages]
+            return sections, [0.0] * len(pages)
+
+        matrix = TfidfMatrix([page_tokens(p) for p in pages])
+        labels = sorted(set(seeds.values()))
+        label_index = {label: j for j, label in enumerate(labels)}
+
+        assignment = np.full(len(pages), -1, dtype=np.int64)
+        for i, label in seeds.items():
+            assignment[i] = label_index[label]
+        seed_mask = assignment >= 0
+
+        similarities = np.zeros(len(pages))
+        for _ in range(max(1, self.refine_iterations)):
+            centroids = np.vstack([matrix.row_sums(assignment == j) for j in range(len(labels))])
+            norms = np.linalg.norm(centroids, axis=1)
+            norms[norms == 0] = 1.0
+            centroids = centroids / norms[:, None]
+
+            scores = matrix.dot(centroids)
+            best = scores.argmax(axis=1)
+            similarities = scores[np.arange(len(pages)), best]
+
+            new_assignment = np.where(similarities >= self.min_similarity, best, -1)
+            # Seeded pages keep their known label
+            new_assignment[seed_mask] = assignment[seed_mask]
+            if np.array_equal(new_assignment, assignment):
+                break
+            assignment = new_assignment
+
+        if seed_mask.any():
+            similarities[seed_mask] = scores[np.flatnonzero(seed_mask), assignment[seed_mask]]
+
+        sections = []
+        for i, page in enumerate(pages):
+            if assignment[i] >= 0:
+                sections.append(labels[assignment[i]])
+            else:
+                sections.append(fallback(page) if fallback else DEFAULT_SECTION)
+        return sections, [float(s) for s in similarities]
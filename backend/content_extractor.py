@@ -0,0 +1,232 @@
+"""
+Readability-style main content extraction.
+
+Boilerplate (cookie banners, menus, share bars, related-article lists) is
+removed in three steps over a parsed page:
+
+1. Elements that are unlikely to be content by tag, role, class or id are pruned.
+2. One bottom-up pass measures text and link text per element; paragraph-like
+   elements score their ancestors by text length and comma count, and every
+   candidate score is discounted by its link density.
+3. The best candidate plus qualifying siblings is kept, and link-heavy or
+   negatively weighted blocks inside it are dropped.
+
+Pruned and dropped elements are only marked while scoring and are decomposed
+once a candidate with enough text is found. If none is, the tree is still
+untouched and the legacy main/article/body selection is returned as is.
+"""
+
+import re
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import CData
+
+REMOVED_TAGS = ['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'button', 'select', 'dialog', 'canvas']
+REMOVED_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'dialog', 'alertdialog', 'search', 'menu', 'menubar'}
+PROTECTED_TAGS = {'html', 'body', 'main', 'article'}
+
+UNLIKELY_CANDIDATES = re.compile(
+    r'banner|breadcrumb|combx|comment|community|consent|cookie|disqus|extra|footer|gdpr|header|legends|menu|'
+    r'modal|newsletter|pager|pagination|popup|related|remark|replies|rss|share|shoutbox|sidebar|skyscraper|'
+    r'social|sponsor|subscribe|supplemental|ad-break|agegate|toolbar|nav', re.I)
+MAYBE_CANDIDATE = re.compile(r'and|article|body|column|content|main|shadow|post|entry', re.I)
+POSITIVE = re.compile(r'article|body|content|entry|hentry|h-entry|main|page|post|text|blog|story|prose|markdown|docs?\b', re.I)
+NEGATIVE = re.compile(
+    r'-ad-|hidden|^hid$| hid$| hid |^hid |banner|combx|comment|com-|contact|cookie|consent|foot|footer|footnote|'
+    r'masthead|media|meta|outbrain|promo|related|scroll|share|shoutbox|sidebar|skyscraper|sponsor|shopping|'
+    r'tags|tool|widget|newsletter|subscribe|social|popup|modal|breadcrumb|menu|nav', re.I)
+HIDDEN_STYLE = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden', re.I)
+
+PARAGRAPH_TAGS = {'p', 'pre', 'td', 'blockquote', 'dd'}
+TEXT_CONTAINER_TAGS = {'div', 'section', 'span', 'font'}
+CONDITIONAL_CLEAN_TAGS = ['ul', 'ol', 'div', 'section', 'table', 'form', 'aside', 'header', 'footer', 'nav']
+TAG_WEIGHTS = {
+    'div': 5, 'article': 10, 'main': 10, 'section': 3, 'pre': 3, 'td': 3, 'blockquote': 3,
+    'address': -3, 'ol': -3, 'ul': -3, 'dl': -3, 'dd': -3, 'dt': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5, 'th': -5,
+}
+
+MIN_PARAGRAPH_CHARS = 25
+MIN_EXTRACTED_CHARS = 140
+
+
+def _class_and_id(tag: Tag) -> str:
+    classes = tag.get('class') or []
+    if isinstance(classes, str):
+        classes = [classes]
+    return f"{' '.join(classes)} {tag.get('id') or ''}"
+
+
+def class_weight(tag: Tag) -> int:
+    """Readability class/id weight: +25 for content-like names, -25 for boilerplate-like ones"""
+    weight = 0
+    for value in (' '.join(tag.get('class') or []), tag.get('id') or ''):
+        if not value:
+            continue
+        if NEGATIVE.search(value):
+            weight -= 25
+        if POSITIVE.search(value):
+            weight += 25
+    return weight
+
+
+def _mark_where(tags: List[Tag], predicate: Callable[[Tag], bool], removed: Set[int]) -> List[Tag]:
+    """Add every tag matching predicate, and everything below it, to removed; tags must be in document order.
+    Returns the topmost matching tags, the ones to decompose."""
+    # Tag.decomposed is avoided on purpose: on tags never decomposed it falls through to a find() call
+    doomed = []
+    for tag in tags:
+        if id(tag.parent) in removed:
+            removed.add(id(tag))
+        elif predicate(tag):
+            removed.add(id(tag))
+            doomed.append(tag)
+    return doomed
+
+
+def _is_unlikely(tag: Tag) -> bool:
+    if tag.name in PROTECTED_TAGS:
+        return False
+    if tag.get('role') in REMOVED_ROLES or tag.has_attr('hidden') or HIDDEN_STYLE.search(tag.get('style') or ''):
+        return True
+    match_string = _class_and_id(tag)
+    return bool(UNLIKELY_CANDIDATES.search(match_string)) and not MAYBE_CANDIDATE.search(match_string)
+
+
+def _mark_unlikely(root: Tag, removed: Set[int]) -> List[Tag]:
+    return _mark_where(root.find_all(True), lambda tag: tag.name in REMOVED_TAGS or _is_unlikely(tag), removed)
+
+
+def _kept_strings(node: Tag, removed: Set[int]) -> Iterator[str]:
+    """Stripped, non-empty strings under node outside removed subtrees, as get_text(strip=True) would see them"""
+    for child in node.children:
+        if isinstance(child, Tag):
+            if id(child) not in removed:
+                yield from _kept_strings(child, removed)
+        elif type(child) in (NavigableString, CData):
+            text = child.strip()
+            if text:
+                yield text
+
+
+def _measure(node: Tag, stats: Dict[int, Tuple[int, int, int]], removed: Set[int], in_link: bool = False) -> Tuple[int, int]:
+    """Fill stats[id(tag)] = (text chars, link text chars, direct text chars) bottom-up, skipping removed subtrees"""
+    text = link = direct = 0
+    for child in node.children:
+        if isinstance(child, Tag):
+            if id(child) in removed:
+                continue
+            child_text, child_link = _measure(child, stats, removed, in_link or child.name == 'a')
+            text += child_text
+            link += child_link
+        elif type(child) in (NavigableString, CData):
+            length = len(child.strip())
+            text += length
+            direct += length
+            if in_link:
+                link += length
+    stats[id(node)] = (text, link, direct)
+    return text, link
+
+
+def _link_density(tag: Tag, stats: Dict[int, Tuple[int, int, int]]) -> float:
+    text, link, _ = stats.get(id(tag), (0, 0, 0))
+    return link / text if text else 0.0
+
+
+def _score_candidates(root: Tag, stats: Dict[int, Tuple[int, int, int]], removed: Set[int]) -> Dict[int, Tuple[Tag, float]]:
+    scores = {}
+    for tag in root.find_all(True):
+        text, _, direct = stats.get(id(tag), (0, 0, 0))
+        is_paragraph = tag.name in PARAGRAPH_TAGS or (tag.name in TEXT_CONTAINER_TAGS and direct >= MIN_PARAGRAPH_CHARS)
+        if not is_paragraph or text < MIN_PARAGRAPH_CHARS:
+            continue
+
+        commas = sum(string.count(',') for string in _kept_strings(tag, removed))
+        content_score = 1 + commas + min(text // 100, 3)
+        ancestor = tag.parent
+        for level in range(3):
+            if ancestor is None or not isinstance(ancestor, Tag) or ancestor.name == '[document]':
+                break
+            if id(ancestor) not in scores:
+                scores[id(ancestor)] = (ancestor, TAG_WEIGHTS.get(ancestor.name, 0) + class_weight(ancestor))
+            divider = 1 if level == 0 else level * 2
+            node, score = scores[id(ancestor)]
+            scores[id(ancestor)] = (node, score + content_score / divider)
+            ancestor = ancestor.parent
+
+    # Link-heavy candidates (menus, link lists) lose most of their score
+    return {key: (node, score * (1 - _link_density(node, stats))) for key, (node, score) in scores.items()}
+
+
+def _collect_with_siblings(top: Tag, top_score: float, scores: Dict[int, Tuple[Tag, float]],
+                           stats: Dict[int, Tuple[int, int, int]]) -> List[Tag]:
+    parent = top.parent
+    if parent is None or parent.name in ('[document]', 'html'):
+        return [top]
+
+    threshold = max(10.0, top_score * 0.2)
+    selected = []
+    for sibling in parent.children:
+        if not isinstance(sibling, Tag):
+            continue
+        if sibling is top:
+            selected.append(sibling)
+            continue
+        score = scores.get(id(sibling), (None, 0.0))[1]
+        text, _, _ = stats.get(id(sibling), (0, 0, 0))
+        if score >= threshold:
+            selected.append(sibling)
+        elif sibling.name == 'p' and text > 80 and _link_density(sibling, stats) < 0.25:
+            selected.append(sibling)
+    return selected
+
+
+def _mark_boilerplate(element: Tag, stats: Dict[int, Tuple[int, int, int]], removed: Set[int]) -> List[Tag]:
+    """Mark link lists and negatively weighted blocks inside the kept content"""
+    def is_boilerplate(tag: Tag) -> bool:
+        weight = class_weight(tag)
+        text, _, _ = stats.get(id(tag), (0, 0, 0))
+        density = _link_density(tag, stats)
+        return weight < 0 or (weight < 25 and density > 0.33 and text < 1000) or density > 0.5
+
+    return _mark_where(element.find_all(CONDITIONAL_CLEAN_TAGS), is_boilerplate, removed)
+
+
+def select_main_content(soup: BeautifulSoup) -> List[Tag]:
+    """
+    Elements holding the page's main content, in document order.
+    Prunes the soup in place when a candidate is found; callers should extract links and metadata first.
+    """
+    root = soup.find('body') or soup
+    removed = set()
+    doomed = _mark_unlikely(root, removed)
+
+    stats = {}
+    _measure(root, stats, removed)
+    scores = _score_candidates(root, stats, removed)
+    if scores:
+        top, top_score = max(scores.values(), key=lambda item: item[1])
+        selected = _collect_with_siblings(top, top_score, scores, stats)
+        for element in selected:
+            doomed.extend(_mark_boilerplate(element, stats, removed))
+        kept_chars = sum(len(' '.join(_kept_strings(element, removed))) for element in selected)
+        if kept_chars >= MIN_EXTRACTED_CHARS:
+            for tag in doomed:
+                tag.decompose()
+            return selected
+
+    # Nothing has been decomposed yet, so this is exactly what the legacy extractor would keep
+    return [legacy_main_content(soup)]
+
+
+def legacy_main_content(soup: BeautifulSoup) -> Tag:
+    """The original selection: first main/article/content div, else the body"""
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main'))
+    return main_content or soup.find('body') or soup
+
+
+def extract_text(elements: List[Tag], separator: str = ' ') -> str:
+    """Whitespace-normalized text of the selected elements; the legacy extractor joined strings with separator=''"""
+    return ' '.join(' '.join(element.get_text(separator).split()) for element in elements if element is not None).strip()
@@ -0,0 +1,92 @@
+"""
+Merkle-style content fingerprints for change detection.
+
+Every page gets a BLAKE2b digest of its normalized title, description and
+text. Page digests are combined per section, and section digests into a
+root. Two crawls are equal when their roots match. Otherwise only sections
+whose digests differ are compared page by page, which yields the exact new,
+removed and modified pages while only 16-byte digests are stored.
+"""
+
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+DIGEST_SIZE = 16
+
+
+def _blake2(data: str) -> str:
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def _normalize(text: Optional[str]) -> str:
+    return ' '.join((text or '').split())
+
+
+def page_digest(page: Dict) -> str:
+    """Digest of a page's normalized title, description and content; whitespace-only edits do not count"""
+    return _blake2('\x00'.join((_normalize(page.get('title')), _normalize(page.get('description')), _normalize(page.get('content')))))
+
+
+def section_of(page: Dict) -> str:
+    """The page's categorized section, or its first URL path segment for uncategorized crawls"""
+    if page.get('section'):
+        return page['section']
+    segments = [segment for segment in urlparse(page['url']).path.split('/') if segment]
+    return f"/{segments[0]}" if len(segments) > 1 else '/'
+
+
+def _combine(items: Iterable[Tuple[str, str]]) -> str:
+    return _blake2('\n'.join(f"{key}|{digest}" for key, digest in sorted(items)))
+
+
+def build_tree(pages: List[Dict]) -> Dict:
+    """{'root': digest, 'pages': n, 'sections': {section: {'digest': digest, 'pages': {url: digest}}}}"""
+    sections: Dict[str, Dict[str, str]] = {}
+    for page in pages:
+        sections.setdefault(section_of(page), {})[page['url']] = page_digest(page)
+
+    tree_sections = {
+        name: {'digest': _combine(page_digests.items()), 'pages': page_digests}
+        for name, page_digests in sections.items()
+    }
+    return {
+        'root': _combine((name, section['digest']) for name, section in tree_sections.items()),
+        'pages': sum(len(section['pages']) for section in tree_sections.values()),
+        'sections': tree_sections,
+    }
+
+
+def diff_trees(old: Dict, new: Dict) -> Dict:
+    """New, removed and modified page URLs, comparing page digests only inside sections whose digest differs"""
+    changes = {'new_pages': [], 'removed_pages': [], 'modified_pages': [], 'changed_sections': []}
+    if old['root'] == new['root']:
+        return changes
+
+    old_sections, new_sections = old['sections'], new['sections']
+    changed = sorted(name for name in set(old_sections) | set(new_sections)
+                     if old_sections.get(name, {}).get('digest') != new_sections.get(name, {}).get('digest'))
+    changes['changed_sections'] = changed
+
+    # Pages of the differing subtrees only; a URL that moved between sections shows up on both sides
+    old_pages = {url: (name, digest) for name in changed for url, digest in old_sections.get(name, {}).get('pages', {}).items()}
+    new_pages = {url: (name, digest) for name in changed for url, digest in new_sections.get(name, {}).get('pages', {}).items()}
+
+    for url, (section, digest) in new_pages.items():
+        if url not in old_pages:
+            changes['new_pages'].append(url)
+        elif old_pages[url] != (section, digest):
+            changes['modified_pages'].append({
+                'url': url,
+                'old_section': old_pages[url][0],
+                'new_section': section,
+                'content_changed': old_pages[url][1] != digest,
+                'old_digest': old_pages[url][1],
+                'new_digest': digest,
+            })
+    changes['removed_pages'] = [url for url in old_pages if url not in new_pages]
+
+    for key in ('new_pages', 'removed_pages'):
+        changes[key].sort()
+    changes['modified_pages'].sort(key=lambda change: change['url'])
+    return changes
@@ -0,0 +1,67 @@
+"""
+Small persistent per-domain cache with TTLs.
+
+Entries are kept in memory and mirrored to a JSON file so that repeat
+generations and monitor runs for the same domain can reuse earlier results.
+Failed lookups can be stored as negative entries with their own, shorter TTL.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DomainCache:
+    def __init__(self, storage_path: str, ttl_seconds: float, negative_ttl_seconds: float):
+        self.storage_path = Path(storage_path)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if self.storage_path.exists():
+            try:
+                with open(self.storage_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading cache {self.storage_path}: {e}")
+        return {}
+
+    def _save(self):
+        try:
+            tmp_path = self.storage_path.with_suffix(self.storage_path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.storage_path)
+        except Exception as e:
+            print(f"Error saving cache {self.storage_path}: {e}")
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Return the live entry for key ({'value', 'negative', 'stored_at'}) or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            ttl = self.negative_ttl_seconds if entry.get('negative') else self.ttl_seconds
+            if time.time() - entry.get('stored_at', 0) > ttl:
+                del self._entries[key]
+                return None
+            return entry
+
+    def store(self, key: str, value: Any):
+        """Cache a successful result"""
+        self._put(key, {'value': value, 'negative': False, 'stored_at': time.time()})
+
+    def store_failure(self, key: str):
+        """Remember that computing the value failed, so it is not retried until the negative TTL expires"""
+        self._put(key, {'value': None, 'negative': True, 'stored_at': time.time()})
+
+    def _put(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._save()
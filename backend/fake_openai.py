@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Offline OpenAI-compatible stub server for benchmarking the AI-enhanced paths.
+
+Implements POST /v1/chat/completions for both plain completions and structured
+outputs (response_format=json_schema) with canned SiteAnalysis, PageAnalysis
+and CategoryAssignment payloads. Latency and error rates are configurable so
+the generator can be load-tested without a live API key.
+
+Usage:
+    python fake_openai.py --port 8002 --latency-ms 400 --latency-dist lognormal --error-rate 0.05
+
+Then start the main API against it:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8002/v1 python -m uvicorn main:app --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+import zlib
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 200.0, latency_jitter_ms: float = 50.0, latency_dist: str = 'normal',
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: Optional[int] = None,
+                 canned: Optional[Dict[str, Dict]] = None):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_dist = latency_dist
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.canned = canned or {}
+        self.random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Latency in seconds drawn from the configured distribution"""
+        mean, jitter = self.latency_ms, self.latency_jitter_ms
+        if self.latency_dist == 'fixed':
+            value = mean
+        elif self.latency_dist == 'uniform':
+            value = self.random.uniform(mean - jitter, mean + jitter)
+        elif self.latency_dist == 'lognormal':
+            # Long-tailed: median at mean, spread controlled by jitter/mean
+            sigma = jitter / mean if mean > 0 else 0.0
+            value = mean * self.random.lognormvariate(0.0, sigma)
+        else:
+            value = self.random.gauss(mean, jitter)
+        return max(0.0, value) / 1000.0
+
+
+STATS = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'by_schema': {}}
+
+stub_app = FastAPI(title="Fake OpenAI", version="1.0.0")
+stub_app.state.config = StubConfig()
+
+
+def _stable_choice(options: List[str], key: str) -> str:
+    return options[zlib.crc32(key.encode('utf-8')) % len(options)]
+
+
+def _message_text(messages: List[Dict], role: str) -> str:
+    return '\n'.join(str(m.get('content', '')) for m in messages if m.get('role') == role)
+
+
+def _extract_json_pages(text: str) -> List[Dict]:
+    """Pages embedded in a prompt, either as a JSON list or a single JSON object"""
+    for open_char, close_char in (('[', ']'), ('{', '}')):
+        start, end = text.find(open_char), text.rfind(close_char)
+        if start == -1 or end <= start:
+            continue
+        try:
+            data = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            continue
+        return data if isinstance(data, list) else [data]
+    return []
+
+
+def _categories_from_prompt(system_text: str) -> List[str]:
+    match = re.search(r'Available [Cc]ategories: (.+)', system_text)
+    if match:
+        categories = [c.strip() for c in match.group(1).split(',') if c.strip()]
+        if categories:
+            return categories
+    return ['Documentation', 'Guides', 'Reference', 'Company']
+
+
+def structured_output(schema_name: str, messages: List[Dict]) -> Dict:
+    """Canned structured payload for the schemas used by the generator"""
+    system_text = _message_text(messages, 'system')
+    user_text = _message_text(messages, 'user')
+
+    if schema_name == 'SiteAnalysis':
+        domain = re.search(r'Domain: (\S+)', user_text)
+        domain = domain.group(1) if domain else 'the website'
+        return {
+            'site_purpose': f'Product and documentation website for {domain}',
+            'target_audience': 'Developers and prospective customers',
+            'main_categories': ['Documentation', 'Guides', 'Reference', 'Company'],
+            'site_summary': f'{domain} offers product information, guides and reference documentation.',
+        }
+
+    if schema_name == 'PageAnalysis':
+        pages = _extract_json_pages(user_text)
+        title = pages[0].get('title', 'Page') if pages else 'Page'
+        categories = _categories_from_prompt(system_text)
+        return {
+            'category': _stable_choice(categories, title),
+            'content_type': _stable_choice(['documentation', 'tutorial', 'reference', 'product'], title),
+            'importance_factors': ['core feature', 'detailed reference'],
+            'description': f'Overview of {title} and how it is used.',
+            'keywords': [w.lower() for w in re.findall(r'[A-Za-z]{4,}', title)[:5]] or ['overview'],
+        }
+
+    if schema_name == 'CategoryAssignment':
+        categories = _categories_from_prompt(system_text)
+        pages = _extract_json_pages(user_text)
+        assignments, rationale = {}, {}
+        for page in pages:
+            index = str(page.get('index'))
+            assignments[index] = page.get('ai_category') or _stable_choice(categories, page.get('title', index))
+            rationale[index] = 'Assigned by offline stub'
+        return {'assignments': assignments, 'rationale': rationale}
+
+    return {}
+
+
+def completion_text(messages: List[Dict]) -> str:
+    """Canned plain-text completion chosen by the shape of the prompt"""
+    user_text = _message_text(messages, 'user')
+
+    if '"is_news_site"' in user_text:
+        return json.dumps({
+            'is_news_site': False,
+            'is_tech_site': True,
+            'is_documentation_site': True,
+            'is_ecommerce_site': False,
+            'primary_content_type': 'documentation',
+            'has_subscription_content': False,
+            'content_patterns': ['docs', 'guides'],
+            'site_purpose': 'Technical documentation',
+        })
+    if 'Return ONLY a JSON mapping' in user_text:
+        return '{}'
+    if 'Original content:' in user_text:
+        # Section cleanup: hand the section back unchanged
+        section = user_text.split('Original content:', 1)[1]
+        return section.split('Return only the improved section', 1)[0].strip()
+    if 'improve this website summary' in user_text:
+        summary = user_text.split('\n\n', 1)[1] if '\n\n' in user_text else user_text
+        return summary.split('\n\nReturn only', 1)[0].strip()
+    return 'This website provides documentation, guides and reference material.'
+
+
+def _completion_response(model: str, content: str, prompt_chars: int) -> Dict:
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(content) // 4
+    return {
+        'id': f'chatcmpl-{uuid.uuid4().hex[:24]}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content, 'refusal': None},
+            'logprobs': None,
+            'finish_reason': 'stop',
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@stub_app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    config: StubConfig = stub_app.state.config
+    body = await request.json()
+    messages = body.get('messages', [])
+    STATS['requests'] += 1
+
+    await asyncio.sleep(config.sample_latency())
+
+    roll = config.random.random()
+    if roll < config.rate_limit_rate:
+        STATS['rate_limited'] += 1
+        return JSONResponse(status_code=429, content={'error': {'message': 'Rate limit reached (stub)', 'type': 'rate_limit_error'}})
+    if roll < config.rate_limit_rate + config.error_rate:
+        STATS['errors'] += 1
+        return JSONResponse(status_code=500, content={'error': {'message': 'Injected failure (stub)', 'type': 'server_error'}})
+
+    response_format = body.get('response_format') or {}
+    if response_format.get('type') == 'json_schema':
+        schema_name = response_format.get('json_schema', {}).get('name', '')
+        STATS['by_schema'][schema_name] = STATS['by_schema'].get(schema_name, 0) + 1
+        payload = config.canned.get(schema_name) or structured_output(schema_name, messages)
+        content = json.dumps(payload)
+    else:
+        content = completion_text(messages)
+
+    prompt_chars = sum(len(str(m.get('content', ''))) for m in messages)
+    return _completion_response(body.get('model', 'gpt-4o-mini'), content, prompt_chars)
+
+
+@stub_app.get("/stats")
+async def stub_stats():
+    return STATS
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stub server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Mean (or median for lognormal) latency')
+    parser.add_argument('--latency-jitter-ms', type=float, default=50.0)
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'normal', 'lognormal'], default='normal')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--canned', help='JSON file mapping schema name to a fixed structured response')
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned, 'r', encoding='utf-8') as f:
+            canned = json.load(f)
+
+    stub_app.state.config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_dist=args.latency_dist,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+        canned=canned,
+    )
+    uvicorn.run(stub_app, host=args.host, port=args.port)
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from pydantic import BaseModel, HttpUrl, Field
 import aiohttp
 import asyncio
@@ -7,11 +8,25 @@ import ssl
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import re
-from typing import List, Dict, Optional, Literal, Set
+from typing import List, Dict, Optional, Literal, Set, Iterator, Tuple, TextIO
 import time
 import os
 import json
+import hashlib
 import xml.etree.ElementTree as ET
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from ai_client import AIUnavailableError, GuardedOpenAIClient
+from artifact_store import create_artifact_store, choose_encoding, etag_for
+from classifier import SectionClassifier, is_available as local_classifier_available
+from change_probe import page_validators
+from content_extractor import select_main_content, legacy_main_content, extract_text
+from markdown_converter import html_to_markdown
+from domain_cache import DomainCache
+from sharding import write_shards, load_manifest, shard_path, mark_job_used, prune_shard_jobs
+from summarizer import summarize_pages, summarize_site
 
 # Initialize OpenAI client only if API key is available
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
@@ -20,7 +35,20 @@ openai_client = None
 if OPENAI_API_KEY:
     try:
         from openai import OpenAI
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        # Shared rate limiter and circuit breaker: while the API is failing, calls are
+        # rejected immediately and the client is falsy so every AI step uses heuristics
+        openai_client = GuardedOpenAIClient(
+            OpenAI(
+                api_key=OPENAI_API_KEY,
+                # Point at an OpenAI-compatible server such as fake_openai.py for offline runs
+                base_url=os.getenv('OPENAI_BASE_URL') or None,
+                max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+            ),
+            requests_per_minute=float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500')),
+            tokens_per_minute=float(os.getenv('OPENAI_TOKENS_PER_MINUTE', '200000')),
+            failure_threshold=int(os.getenv('OPENAI_CIRCUIT_FAILURE_THRESHOLD', '3')),
+            reset_timeout=float(os.getenv('OPENAI_CIRCUIT_RESET_SECONDS', '60'))
+        )
         print("OpenAI client initialized successfully")
     except ImportError:
         print("OpenAI library not available")
@@ -30,6 +58,73 @@ if OPENAI_API_KEY:
 else:
     print("No OpenAI API key found - AI enhancement will be disabled")
 
+# Per-page AI escalation: only pages whose heuristic confidence falls below the
+# threshold are sent to the LLM, and each job may make at most AI_CALL_BUDGET calls
+AI_CONFIDENCE_THRESHOLD = float(os.getenv('AI_CONFIDENCE_THRESHOLD', '0.5'))
+AI_CALL_BUDGET = int(os.getenv('AI_CALL_BUDGET', '20'))
+MAX_ESCALATED_PAGES = 30  # Matches the category assignment prompt limit
+
+# Section cleanups in generate_llms_txt run concurrently on this many threads
+SECTION_CLEANUP_WORKERS = int(os.getenv('SECTION_CLEANUP_WORKERS', '8'))
+
+# In summary mode only this much page text is kept (previews for categorization and descriptions)
+SUMMARY_CONTENT_PREVIEW_CHARS = 1000
+
+# Main content extraction: "density" scores blocks by text and link density to drop
+# cookie banners, menus and related-article lists; "legacy" keeps the old main/article/body pick
+CONTENT_EXTRACTOR = os.getenv('CONTENT_EXTRACTOR', 'density')
+# Also measure what the legacy selection would have kept, for the bytes-saved figures in
+# generation_stats (one extra text pass per page, so it is off by default)
+CONTENT_EXTRACTION_COMPARE = os.getenv('CONTENT_EXTRACTION_COMPARE', 'false').lower() == 'true'
+
+# Markdown page bodies in llms-full.txt are cut at a section boundary within this many tokens
+FULL_PAGE_MAX_TOKENS = int(os.getenv('FULL_PAGE_MAX_TOKENS', '500'))
+
+# Sharded llms-full.txt output is written below this directory, one subdirectory per job
+SHARD_OUTPUT_DIR = os.getenv('SHARD_OUTPUT_DIR', 'generated_shards')
+# Job directories unused for SHARD_TTL_HOURS, and the least recently used beyond SHARD_MAX_JOBS,
+# are deleted whenever a new sharded job starts
+SHARD_TTL_HOURS = float(os.getenv('SHARD_TTL_HOURS', '24'))
+SHARD_MAX_JOBS = int(os.getenv('SHARD_MAX_JOBS', '50'))
+
+# Generated llms.txt / llms-full.txt are persisted per domain with precompressed variants
+# (ARTIFACT_BACKEND=s3 with ARTIFACT_S3_ENDPOINT_URL pointing at MinIO also works)
+ARTIFACT_STORE = create_artifact_store(
+    os.getenv('ARTIFACT_BACKEND', 'local'),
+    os.getenv('ARTIFACT_DIR', 'generated_artifacts'),
+    s3_bucket=os.getenv('ARTIFACT_S3_BUCKET'),
+    s3_prefix=os.getenv('ARTIFACT_S3_PREFIX', ''),
+    s3_endpoint_url=os.getenv('ARTIFACT_S3_ENDPOINT_URL') or None,
+    s3_region=os.getenv('ARTIFACT_S3_REGION') or None
+)
+
+# AI-determined site characteristics are persisted per domain; failed analyses are
+# remembered for a shorter time so a broken API is not retried on every crawl
+SITE_CHARACTERISTICS_CACHE = DomainCache(
+    os.getenv('SITE_CHARACTERISTICS_CACHE_PATH', 'site_characteristics_cache.json'),
+    ttl_seconds=float(os.getenv('SITE_CHARACTERISTICS_TTL_HOURS', '168')) * 3600,
+    negative_ttl_seconds=float(os.getenv('SITE_CHARACTERISTICS_NEGATIVE_TTL_MINUTES', '60')) * 60
+)
+
+class AICallBudget:
+    """Counts AI calls made by a single generation job against a fixed limit"""
+    def __init__(self, max_calls: int = AI_CALL_BUDGET):
+        self.max_calls = max_calls
+        self.calls_used = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_calls - self.calls_used)
+    
+    def consume(self, calls: int = 1, reserve: int = 0) -> bool:
+        """Take calls from the budget while keeping `reserve` calls back, returning False if not enough are left"""
+        with self._lock:
+            if self.calls_used + calls > self.max_calls - reserve:
+                return False
+            self.calls_used += calls
+            return True
+
 app = FastAPI(title="LLMs.txt Generator", version="1.0.0")
 
 # Enable CORS for frontend
@@ -48,6 +143,13 @@ class CrawlRequest(BaseModel):
     crawl_all: Optional[bool] = False
     generation_type: Optional[Literal["summary", "fulltext", "both"]] = "both"
     force_regenerate: Optional[bool] = False
+    ai_call_budget: Optional[int] = None
+    ai_confidence_threshold: Optional[float] = None
+    content_format: Optional[Literal["text", "markdown"]] = "text"
+
+class ShardedCrawlRequest(CrawlRequest):
+    shard_by: Optional[Literal["size", "section"]] = "size"
+    max_shard_kb: Optional[int] = 512
 
 class PageInfo(BaseModel):
     url: str
@@ -67,6 +169,9 @@ class LLMSTxtResponse(BaseModel):
     used_existing: Optional[bool] = False
     existing_files_found: Optional[Dict[str, str]] = None
     site_characteristics: Optional[Dict] = None
+    pages_escalated: Optional[int] = None
+    ai_calls_used: Optional[int] = None
+    generation_stats: Optional[Dict] = None
 
 class PageAnalysis(BaseModel):
     """AI analysis of a single page's content and purpose"""
@@ -95,14 +200,29 @@ class ContentAnalysis(BaseModel):
     quality_improvements: List[str] = Field(description="Suggestions for description improvements")
 
 class WebsiteCrawler:
-    def __init__(self, base_url: str, max_pages: int = 20, depth_limit: int = 3, crawl_all: bool = False):
+    def __init__(self, base_url: str, max_pages: int = 20, depth_limit: int = 3, crawl_all: bool = False,
+                 ai_budget: Optional[AICallBudget] = None, confidence_threshold: float = AI_CONFIDENCE_THRESHOLD,
+                 keep_full_content: bool = True, markdown_content: bool = False,
+                 connection_limit: Optional[int] = None):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
         self.max_pages = max_pages if not crawl_all else 999999
         self.depth_limit = depth_limit if not crawl_all else 999
         self.crawl_all = crawl_all
+        # Summary-only jobs keep a short preview instead of every page's full text
+        self.keep_full_content = keep_full_content
+        # Also convert the main content to Markdown for llms-full.txt (headings, lists, code kept)
+        self.markdown_content = markdown_content and keep_full_content
         self.visited_urls = set()
+        # fetched_pages holds every fetched page; pages_data the deduplicated, categorized result of crawl()
+        self.fetched_pages = []
         self.pages_data = []
+        # Crawl frontier, so fetch_pages can resume: remaining sitemap URLs or the link queue
+        self._sitemap_frontier: Optional[List[str]] = None
+        self._link_frontier: Optional[List[Tuple[str, int]]] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Cap on open connections, so concurrent monitoring crawls share a global budget
+        self.connection_limit = connection_limit
         
         # Create SSL context that doesn't verify certificates for problematic sites
         self.ssl_context = ssl.create_default_context()
@@ -112,6 +232,15 @@ class WebsiteCrawler:
         # Cache for site characteristics determined by AI
         self._site_characteristics = None
         
+        # Confidence-gated AI escalation state
+        self.ai_budget = ai_budget or AICallBudget()
+        self.confidence_threshold = confidence_threshold
+        self.pages_escalated = 0
+        
+        # Content extraction totals: legacy_bytes is what the old main/article/body selection would have
+        # kept, only measured with CONTENT_EXTRACTION_COMPARE (or when it is the extractor in use)
+        self.extraction_stats = {'pages': 0, 'legacy_bytes': 0, 'extracted_bytes': 0, 'seconds': 0.0, 'markdown_seconds': 0.0}
+        
     async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict]:
         try:
             # Add proper headers to avoid being blocked
@@ -134,52 +263,98 @@ class WebsiteCrawler:
                 
                 # Ensure UTF-8 encoding to prevent umlauts issues
                 content = await response.text(encoding='utf-8')
-                soup = BeautifulSoup(content, 'html.parser', from_encoding='utf-8')
-                
-                # Extract metadata
-                title = soup.find('title')
-                title = title.get_text().strip() if title else url.split('/')[-1]
-                
-                description = soup.find('meta', attrs={'name': 'description'})
-                description = description.get('content', '').strip() if description else ''
-                
-                # Extract FAQs from JSON-LD Schema.org markup
-                faqs = self._extract_faqs_from_schema(soup)
-                
-                # Remove styles, nav, footer, etc. (but keep scripts for now to extract JSON-LD)
-                for tag in soup(['style', 'nav', 'footer', 'header', 'aside']):
-                    tag.decompose()
-                
-                # Get main content
-                main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile(r'content|main'))
-                if not main_content:
-                    main_content = soup.find('body')
-                
-                content_text = main_content.get_text() if main_content else soup.get_text()
-                content_text = ' '.join(content_text.split())  # Clean whitespace
-                
-                # Find internal links
-                links = []
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    full_url = urljoin(url, href)
-                    if urlparse(full_url).netloc == self.domain and full_url not in self.visited_urls:
-                        links.append(full_url)
-                
-                return {
-                    'url': url,
-                    'title': title,
-                    'description': description,
-                    'content': content_text,
-                    'content_length': len(content_text),
-                    'links': links[:10],  # Limit links per page
-                    'faqs': faqs  # Include extracted FAQs
-                }
-                
+                response_headers = response.headers
+            
+            # Parsing and extraction are CPU-bound; off the event loop they don't stall the other
+            # crawls, and a site timeout can fire while a large page is still being parsed
+            return await asyncio.to_thread(self._parse_page, url, content, response_headers)
+            
         except Exception as e:
             print(f"Error fetching {url}: {type(e).__name__}: {e}")
             return None
     
+    def _parse_page(self, url: str, content: str, response_headers) -> Dict:
+        """Metadata, main content, links and validators of a fetched HTML page"""
+        soup = BeautifulSoup(content, 'html.parser', from_encoding='utf-8')
+        
+        # Extract metadata
+        title = soup.find('title')
+        title = title.get_text().strip() if title else url.split('/')[-1]
+        
+        description = soup.find('meta', attrs={'name': 'description'})
+        description = description.get('content', '').strip() if description else ''
+        
+        # Extract FAQs from JSON-LD Schema.org markup
+        faqs = self._extract_faqs_from_schema(soup)
+        
+        # Remove styles, nav, footer, etc. (but keep scripts for now to extract JSON-LD)
+        for tag in soup(['style', 'nav', 'footer', 'header', 'aside']):
+            tag.decompose()
+        
+        # Find internal links (before content extraction prunes related-article lists)
+        links = []
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            full_url = urljoin(url, href)
+            if urlparse(full_url).netloc == self.domain and full_url not in self.visited_urls:
+                links.append(full_url)
+        
+        # Get main content
+        extract_start = time.perf_counter()
+        if CONTENT_EXTRACTOR == 'density':
+            legacy_text = extract_text([legacy_main_content(soup)], separator='') if CONTENT_EXTRACTION_COMPARE else None
+            main_elements = select_main_content(soup)
+            content_text = extract_text(main_elements)
+        else:
+            main_elements = [legacy_main_content(soup)]
+            content_text = legacy_text = extract_text(main_elements, separator='')
+        self._record_extraction(legacy_text, content_text, time.perf_counter() - extract_start)
+        
+        # Markdown comes from the same parse tree, already truncated to its token budget
+        content_markdown = None
+        if self.markdown_content:
+            markdown_start = time.perf_counter()
+            content_markdown = html_to_markdown(main_elements, max_tokens=FULL_PAGE_MAX_TOKENS)
+            self.extraction_stats['markdown_seconds'] += time.perf_counter() - markdown_start
+        
+        return {
+            'url': url,
+            'title': title,
+            'description': description,
+            'content': content_text if self.keep_full_content else content_text[:SUMMARY_CONTENT_PREVIEW_CHARS],
+            'content_length': len(content_text),
+            'links': links[:10],  # Limit links per page
+            'faqs': faqs,  # Include extracted FAQs
+            'content_markdown': content_markdown,
+            # ETag / Last-Modified / body digest, so monitoring can probe the page conditionally later
+            'http_validators': page_validators(response_headers, content)
+        }
+    
+    def _record_extraction(self, legacy_text: Optional[str], content_text: str, seconds: float):
+        stats = self.extraction_stats
+        stats['pages'] += 1
+        if legacy_text is not None:
+            stats['legacy_bytes'] += len(legacy_text.encode('utf-8'))
+        stats['extracted_bytes'] += len(content_text.encode('utf-8'))
+        stats['seconds'] += seconds
+    
+    def extraction_summary(self) -> Dict:
+        """Average bytes stored per page versus the legacy selection (when measured), and extraction time"""
+        stats = self.extraction_stats
+        pages = max(stats['pages'], 1)
+        compared = CONTENT_EXTRACTOR != 'density' or CONTENT_EXTRACTION_COMPARE
+        saved = stats['legacy_bytes'] - stats['extracted_bytes']
+        return {
+            'extractor': CONTENT_EXTRACTOR,
+            'pages': stats['pages'],
+            'avg_legacy_bytes_per_page': round(stats['legacy_bytes'] / pages) if compared else None,
+            'avg_bytes_per_page': round(stats['extracted_bytes'] / pages),
+            'bytes_saved_per_page': round(saved / pages) if compared else None,
+            'reduction_pct': (round(100 * saved / stats['legacy_bytes'], 1) if stats['legacy_bytes'] else 0.0) if compared else None,
+            'avg_extract_ms': round(1000 * stats['seconds'] / pages, 2),
+            'avg_markdown_ms': round(1000 * stats['markdown_seconds'] / pages, 2) if self.markdown_content else None,
+        }
+    
     def _extract_faqs_from_schema(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
         """Extract FAQs from JSON-LD Schema.org FAQPage markup"""
         faqs = []
@@ -367,36 +542,102 @@ class WebsiteCrawler:
             return 'General'
     
     def categorize_pages_with_ai(self, pages_data: List[Dict]) -> List[Dict]:
-        """Use AI to perform comprehensive analysis and categorization of all pages"""
+        """Categorize pages with heuristics first and escalate only ambiguous pages to AI"""
+        # Heuristic pass assigns every page a section and a confidence score
+        self.categorize_pages_locally(pages_data)
+        
         if not openai_client or len(pages_data) == 0:
-            # Fallback to basic categorization
-            for page in pages_data:
-                page['section'] = self.categorize_page(page)
+            return pages_data
+        
+        escalated_pages = self._select_pages_for_escalation(pages_data)
+        if not escalated_pages:
+            print(f"All {len(pages_data)} pages categorized with confidence >= {self.confidence_threshold} - skipping AI")
             return pages_data
             
         try:
             # Step 1: Analyze the overall site to understand its purpose and structure
+            if not self.ai_budget.consume():
+                return pages_data
             site_analysis = self._analyze_site_structure(pages_data)
             print(f"Site analysis complete: {site_analysis.site_purpose}")
             
             # Step 2: Analyze individual pages in batches
-            page_analyses = self._analyze_pages_in_batches(pages_data, site_analysis)
+            page_analyses = self._analyze_pages_in_batches(escalated_pages, site_analysis)
             
             # Step 3: Assign pages to categories based on the site analysis
-            category_assignments = self._assign_pages_to_categories(pages_data, site_analysis, page_analyses)
+            if not self.ai_budget.consume():
+                return pages_data
+            category_assignments = self._assign_pages_to_categories(escalated_pages, site_analysis, page_analyses)
             
             # Step 4: Apply the AI analysis results to the pages
-            self._apply_ai_analysis_to_pages(pages_data, page_analyses, category_assignments)
+            self._apply_ai_analysis_to_pages(escalated_pages, page_analyses, category_assignments)
+            # Only pages the AI actually labelled count; selected pages it left out keep their heuristic section
+            self.pages_escalated = sum(1 for page in escalated_pages if page.get('ai_escalated'))
             
-            print(f"AI categorization successful - created categories: {set(category_assignments.assignments.values())}")
+            # Ambiguous pages beyond the escalation limit are re-classified against the AI-labelled ones
+            if len(escalated_pages) < len([p for p in pages_data if p.get('confidence', 0.0) < self.confidence_threshold]):
+                seeds = {
+                    i: page['section'] for i, page in enumerate(pages_data)
+                    if page.get('ai_escalated') or page.get('confidence', 0.0) >= self.confidence_threshold
+                }
+                self.categorize_pages_locally(pages_data, seed_labels=seeds)
+            
+            print(f"AI categorization of {self.pages_escalated}/{len(escalated_pages)} ambiguous pages successful - created categories: {set(category_assignments.assignments.values())}")
             return pages_data
                 
         except Exception as e:
-            print(f"AI categorization failed, using fallback: {e}")
-            # Fallback to basic categorization
+            print(f"AI categorization failed, keeping heuristic sections: {e}")
+            return pages_data
+    
+    def _select_pages_for_escalation(self, pages_data: List[Dict]) -> List[Dict]:
+        """Pick the least confident pages, bounded by the escalation limit and the remaining call budget"""
+        ambiguous = [p for p in pages_data if p.get('confidence', 0.0) < self.confidence_threshold]
+        if not ambiguous:
+            return []
+        
+        # Site analysis and category assignment need one call each
+        if self.ai_budget.remaining < 2:
+            print(f"AI call budget exhausted - {len(ambiguous)} ambiguous pages keep heuristic sections")
+            return []
+        
+        ambiguous.sort(key=lambda p: (p.get('confidence', 0.0), -p.get('importance_score', 0.0)))
+        return ambiguous[:MAX_ESCALATED_PAGES]
+    
+    def categorize_pages_locally(self, pages_data: List[Dict], seed_labels: Optional[Dict[int, str]] = None) -> List[Dict]:
+        """Categorize all pages at once with the local TF-IDF nearest-centroid classifier"""
+        if not local_classifier_available():
             for page in pages_data:
                 page['section'] = self.categorize_page(page)
+                section_confidence = 0.8 if page['section'] != 'General' else 0.2
+                page['confidence'] = self._heuristic_confidence(page, section_confidence)
             return pages_data
+        
+        # Seed centroids from known labels, plus keyword matches for unlabelled pages
+        seeds = dict(seed_labels or {})
+        for i, page in enumerate(pages_data):
+            if i not in seeds:
+                keyword_section = self.categorize_page(page)
+                if keyword_section != 'General':
+                    seeds[i] = keyword_section
+        
+        start = time.time()
+        sections, similarities = SectionClassifier().classify(pages_data, seeds, fallback=self.categorize_page)
+        for i, (page, section, similarity) in enumerate(zip(pages_data, sections, similarities)):
+            page['section'] = section
+            # Labelled seeds are trusted; other pages are as confident as they are close to their centroid
+            section_confidence = 0.8 if i in seeds else min(1.0, similarity / 0.3)
+            if section == 'General':
+                section_confidence = min(section_confidence, 0.2)
+            page['confidence'] = self._heuristic_confidence(page, section_confidence)
+        
+        print(f"Local categorization of {len(pages_data)} pages into {len(set(sections))} sections took {time.time() - start:.3f}s")
+        return pages_data
+    
+    def _heuristic_confidence(self, page: Dict, section_confidence: float) -> float:
+        """Combine section and description certainty into a single per-page confidence"""
+        description = page.get('description') or ''
+        description_confidence = 1.0 if len(description.strip()) > 20 else 0.4
+        return round(0.6 * section_confidence + 0.4 * description_confidence, 3)
     
     def _analyze_site_structure(self, pages_data: List[Dict]) -> SiteAnalysis:
         """Analyze the overall website structure and purpose"""
@@ -448,6 +689,10 @@ Based on this data, provide a complete analysis of the website's structure, purp
         batch_size = 8  # Process pages in smaller batches to avoid token limits
         
         for i in range(0, min(len(pages_data), 32), batch_size):  # Limit to first 32 pages
+            # Keep one call back for the category assignment step
+            if not self.ai_budget.consume(reserve=1):
+                print(f"AI call budget exhausted - skipping page analysis from index {i}")
+                break
             batch_pages = pages_data[i:i+batch_size]
             batch_data = []
             
@@ -557,12 +802,10 @@ Provide assignments for each page index and explain your reasoning."""
     def _apply_ai_analysis_to_pages(self, pages_data: List[Dict], page_analyses: Dict[int, PageAnalysis], category_assignments: CategoryAssignment):
         """Apply AI analysis results to the page data"""
         for i, page in enumerate(pages_data):
-            # Apply category assignment
+            # Apply category assignment; unassigned pages keep their heuristic section
             if str(i) in category_assignments.assignments:
                 page['section'] = category_assignments.assignments[str(i)]
-            else:
-                # Use fallback categorization for pages not analyzed
-                page['section'] = self.categorize_page(page)
+                page['ai_escalated'] = True
             
             # Apply individual page analysis if available
             if i in page_analyses:
@@ -664,18 +907,43 @@ Provide assignments for each page index and explain your reasoning."""
         
         return urls
     
-    async def crawl(self) -> List[Dict]:
-        # Create connector with SSL context
-        connector = aiohttp.TCPConnector(ssl=self.ssl_context)
+    async def crawl(self, max_pages: Optional[int] = None, depth_limit: Optional[int] = None) -> List[Dict]:
+        """Fetch pages (continuing an earlier fetch_pages call, with raised limits if given) and analyze them"""
+        await self.fetch_pages(max_pages, depth_limit)
+        # Scoring and categorization make blocking OpenAI calls
+        return await asyncio.to_thread(self.finalize_pages)
+    
+    async def fetch_pages(self, max_pages: Optional[int] = None, depth_limit: Optional[int] = None,
+                          keep_session: bool = False) -> List[Dict]:
+        """
+        Fetch pages without the AI analysis steps. A later call with higher limits continues from the
+        frontier (remaining sitemap URLs or link queue) instead of refetching what was already fetched.
+        """
+        if not self.crawl_all:
+            self.max_pages = max(self.max_pages, max_pages or 0)
+            self.depth_limit = max(self.depth_limit, depth_limit or 0)
+        
+        if self._session is None:
+            # Create connector with SSL context (aiohttp's default pool size unless a share was assigned)
+            connector = aiohttp.TCPConnector(ssl=self.ssl_context, limit=self.connection_limit or 100)
+            self._session = aiohttp.ClientSession(connector=connector)
+        session = self._session
         
-        async with aiohttp.ClientSession(connector=connector) as session:
-            # Try to fetch URLs from sitemap first
-            sitemap_urls = await self.fetch_sitemap_urls(session)
+        try:
+            if self._sitemap_frontier is None and self._link_frontier is None:
+                # Try to fetch URLs from sitemap first
+                sitemap_urls = await self.fetch_sitemap_urls(session)
+                if sitemap_urls:
+                    print(f"🗺️  Using sitemap with {len(sitemap_urls)} URLs")
+                    # Use sitemap URLs as the primary source
+                    self._sitemap_frontier = list(sitemap_urls)
+                else:
+                    # Fallback to traditional link-based crawling
+                    print("⚠️  No sitemap found, using traditional link-based crawling")
+                    self._link_frontier = [(self.base_url, 0)]  # (url, depth)
             
-            if sitemap_urls:
-                print(f"🗺️  Using sitemap with {len(sitemap_urls)} URLs")
-                # Use sitemap URLs as the primary source
-                urls_to_crawl = list(sitemap_urls)
+            if self._sitemap_frontier is not None:
+                urls_to_crawl = self._sitemap_frontier
                 
                 # Limit URLs if not crawling all
                 if not self.crawl_all and len(urls_to_crawl) > self.max_pages:
@@ -691,12 +959,12 @@ Provide assignments for each page index and explain your reasoning."""
                     page_data = await self.fetch_page(session, url)
                     
                     if page_data:
-                        self.pages_data.append(page_data)
-                        print(f"Crawled {len(self.pages_data)}/{len(urls_to_crawl)} pages: {url}")
+                        self.fetched_pages.append(page_data)
+                        print(f"Crawled {len(self.fetched_pages)}/{len(urls_to_crawl)} pages: {url}")
             else:
-                # Fallback to traditional link-based crawling
-                print("⚠️  No sitemap found, using traditional link-based crawling")
-                queue = [(self.base_url, 0)]  # (url, depth)
+                queue = self._link_frontier
+                # Links beyond the depth limit stay queued in case a later call raises the limit
+                too_deep = []
                 
                 while queue and len(self.visited_urls) < self.max_pages:
                     url, depth = queue.pop(0)
@@ -707,23 +975,38 @@ Provide assignments for each page index and explain your reasoning."""
                     
                     # Only apply depth limit if not crawling all
                     if not self.crawl_all and depth > self.depth_limit:
+                        too_deep.append((url, depth))
                         continue
                     
                     self.visited_urls.add(url)
                     page_data = await self.fetch_page(session, url)
                     
                     if page_data:
-                        self.pages_data.append(page_data)
-                        print(f"Crawled {len(self.pages_data)}/{self.max_pages if not self.crawl_all else '∞'} pages: {url}")
+                        self.fetched_pages.append(page_data)
+                        print(f"Crawled {len(self.fetched_pages)}/{self.max_pages if not self.crawl_all else '∞'} pages: {url}")
                         
                         # Add new links to queue
                         for link in page_data['links']:
                             if link not in self.visited_urls:
                                 queue.append((link, depth + 1))
+                
+                queue.extend(too_deep)
+        finally:
+            if not keep_session:
+                await self.close()
         
-        # Deduplicate pages by base URL (remove fragment duplicates)
+        return self.fetched_pages
+    
+    async def close(self):
+        """Close the HTTP session kept open by fetch_pages(keep_session=True)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def unique_pages(self) -> List[Dict]:
+        """Fetched pages deduplicated by URL without fragment and query"""
         unique_pages = {}
-        for page in self.pages_data:
+        for page in self.fetched_pages:
             # Remove URL fragments and query parameters for deduplication
             base_url = page['url'].split('#')[0].split('?')[0]
             
@@ -735,11 +1018,18 @@ Provide assignments for each page index and explain your reasoning."""
                 unique_pages[base_url] = page
         
         # Convert back to list
-        self.pages_data = list(unique_pages.values())
+        return list(unique_pages.values())
+    
+    def finalize_pages(self) -> List[Dict]:
+        """Deduplicate the fetched pages, then score and categorize them"""
+        self.pages_data = self.unique_pages()
+        
+        if self.extraction_stats['pages']:
+            print(f"Content extraction: {self.extraction_summary()}")
         
         # Use AI to determine site characteristics and handle subscription content intelligently
         if self.pages_data:
-            site_characteristics = self._determine_site_characteristics_with_ai(self.pages_data[:10])
+            site_characteristics = self._determine_site_characteristics_with_ai(self.pages_data[:20])
             
             # For sites with subscription content, limit subscription pages to avoid repetition
             if site_characteristics.get('has_subscription_content', False):
@@ -805,12 +1095,26 @@ Provide assignments for each page index and explain your reasoning."""
 
     def _determine_site_characteristics_with_ai(self, sample_pages: List[Dict]) -> Dict[str, any]:
         """Use AI to determine website characteristics instead of hardcoded rules"""
+        # Computed once per crawl: the first result (AI or fallback) is reused for every page
+        if self._site_characteristics is not None:
+            return self._site_characteristics
+        
         if not openai_client or len(sample_pages) == 0:
             return self._fallback_site_characteristics()
         
-        # Use cached result if available
-        if self._site_characteristics is not None:
+        # Reuse a previous analysis of this domain, including a recent failure
+        cached = SITE_CHARACTERISTICS_CACHE.lookup(self.domain)
+        if cached is not None:
+            if cached['negative']:
+                print(f"Recent AI site characteristic analysis failed for {self.domain} - using heuristics")
+                return self._fallback_site_characteristics()
+            self._site_characteristics = cached['value']
             return self._site_characteristics
+        
+        # The analysis is one AI call of the job like any other
+        if not self.ai_budget.consume():
+            print("AI call budget exhausted - determining site characteristics heuristically")
+            return self._fallback_site_characteristics()
             
         try:
             # Prepare sample data for AI analysis
@@ -875,13 +1179,19 @@ Base your analysis on the URL patterns, titles, and overall content structure.""
                 
                 # Cache the result
                 self._site_characteristics = characteristics
+                SITE_CHARACTERISTICS_CACHE.store(self.domain, characteristics)
                 print(f"AI determined site characteristics: {characteristics}")
                 return characteristics
                 
+        except AIUnavailableError as e:
+            # Local throttling or an open breaker says nothing about the domain, so nothing is cached
+            print(f"AI site characteristic analysis skipped: {e}")
+            return self._fallback_site_characteristics()
         except Exception as e:
             print(f"AI site characteristic analysis failed: {e}")
-            
-        # Fallback to heuristic analysis
+        
+        # Negative-cache the failure, then fall back to heuristic analysis
+        SITE_CHARACTERISTICS_CACHE.store_failure(self.domain)
         return self._fallback_site_characteristics()
     
     def _fallback_site_characteristics(self) -> Dict[str, any]:
@@ -909,8 +1219,23 @@ Base your analysis on the URL patterns, titles, and overall content structure.""
         return characteristics
 
 class LLMSTxtGenerator:
-    def __init__(self, base_url: str, pages_data: List[Dict]):
+    def __init__(self, base_url: str, pages_data: List[Dict], ai_budget: Optional[AICallBudget] = None,
+                 confidence_threshold: float = AI_CONFIDENCE_THRESHOLD, section_cleanup: bool = True,
+                 previous_sections: Optional[Dict] = None, description_ai: bool = True):
         self.base_url = base_url
+        self.ai_budget = ai_budget or AICallBudget()
+        self.confidence_threshold = confidence_threshold
+        self.section_cleanup = section_cleanup
+        self.description_ai = description_ai
+        
+        # Per-section inputs/outputs of an earlier generation (its section_state). Sections whose
+        # input hash is unchanged are spliced in as-is, reusing their rendering and AI results.
+        self.previous_sections = previous_sections or {}
+        self.section_state = {'sections': {}, 'section_merge': None}
+        self.sections_reused = 0
+        self.sections_rendered = 0
+        self._extractive_descriptions = None
+        self._summary = None
         self.pages_data = sorted(pages_data, key=lambda x: x['importance_score'], reverse=True)
         self.site_name = urlparse(base_url).netloc.replace('www.', '').replace('.com', '').replace('.org', '').title()
         
@@ -921,12 +1246,16 @@ class LLMSTxtGenerator:
                 self.site_analysis = page.site_analysis
                 break
     
-    def cleanup_with_openai(self, content: str, content_type: str = "summary") -> str:
+    def cleanup_with_openai(self, content: str, content_type: str = "summary", budget_reserved: bool = False) -> str:
         """Clean up content using OpenAI to improve readability and structure"""
         # Return original content if OpenAI client is not available
         if not openai_client:
             print("OpenAI client not available - returning original content")
             return content
+        
+        if not budget_reserved and not self.ai_budget.consume():
+            print(f"AI call budget exhausted - returning original {content_type}")
+            return content
             
         try:
             # More aggressive content limits for large crawls
@@ -1002,25 +1331,51 @@ Return only the improved section with the same simple link format."""
         """Use AI to make minor refinements to sections if needed"""
         # Since we're already using AI for initial categorization,
         # we can skip additional reorganization for most cases
-        if not openai_client or len(sections) <= 3:
+        if len(sections) <= 3:
             return sections
             
         # Only do reorganization if there are many small sections that could be merged
         small_sections = [name for name, pages in sections.items() if len(pages) <= 2]
         if len(small_sections) < 3:
             return sections
-            
-        try:
-            # Look for opportunities to merge small, related sections
-            section_summary = ""
-            for section_name, pages in sections.items():
-                if len(pages) <= 2:  # Only include small sections for potential merging
-                    page_titles = [page['title'] for page in pages]
-                    section_summary += f"- {section_name} ({len(pages)} pages): {', '.join(page_titles)}\n"
-            
-            if not section_summary.strip():
+        
+        # Look for opportunities to merge small, related sections
+        section_summary = ""
+        for section_name, pages in sections.items():
+            if len(pages) <= 2:  # Only include small sections for potential merging
+                page_titles = [page['title'] for page in pages]
+                section_summary += f"- {section_name} ({len(pages)} pages): {', '.join(page_titles)}\n"
+        
+        # The same small sections as last time get the same merge decision without another AI call
+        summary_hash = hashlib.sha256(section_summary.encode('utf-8')).hexdigest()
+        previous_merge = self.previous_sections.get('section_merge')
+        if previous_merge and previous_merge['input_hash'] == summary_hash:
+            mapping = previous_merge['mapping']
+        elif openai_client and self.ai_budget.consume():
+            mapping = self._section_merge_mapping_with_ai(section_summary)
+            if mapping is None:
                 return sections
+        else:
+            return sections
+        self.section_state['section_merge'] = {'input_hash': summary_hash, 'mapping': mapping}
+        
+        if mapping:  # Only apply if there are actual mappings
+            new_sections = {}
+            for old_name, pages in sections.items():
+                new_name = mapping.get(old_name, old_name)
+                if new_name in new_sections:
+                    new_sections[new_name].extend(pages)
+                else:
+                    new_sections[new_name] = pages
             
+            print(f"AI section refinement: merged {len(mapping)} sections")
+            return new_sections
+        
+        return sections
+    
+    def _section_merge_mapping_with_ai(self, section_summary: str) -> Optional[Dict[str, str]]:
+        """Ask AI which small sections to merge; returns old -> new name mapping, or None on failure"""
+        try:
             prompt = f"""Look at these small content sections and suggest if any should be merged into more meaningful categories. Only suggest merges if they make logical sense.
 
 Small sections:
@@ -1046,24 +1401,12 @@ If no merging is needed, return empty JSON: {{}}"""
             if '{' in mapping_text:
                 json_start = mapping_text.find('{')
                 json_end = mapping_text.rfind('}') + 1
-                mapping = json.loads(mapping_text[json_start:json_end])
-                
-                if mapping:  # Only apply if there are actual mappings
-                    new_sections = {}
-                    for old_name, pages in sections.items():
-                        new_name = mapping.get(old_name, old_name)
-                        if new_name in new_sections:
-                            new_sections[new_name].extend(pages)
-                        else:
-                            new_sections[new_name] = pages
-                    
-                    print(f"AI section refinement: merged {len(mapping)} sections")
-                    return new_sections
+                return json.loads(mapping_text[json_start:json_end])
+            return {}
                 
         except Exception as e:
             print(f"AI section refinement failed: {e}")
-            
-        return sections
+            return None
     
     def generate_summary(self) -> str:
         # Try to use AI analysis data if available
@@ -1072,36 +1415,39 @@ If no merging is needed, return empty JSON: {{}}"""
         
         # Check if pages have AI analysis data
         ai_analyzed_pages = [p for p in self.pages_data if 'content_type' in p or 'ai_keywords' in p]
-        if ai_analyzed_pages and openai_client:
+        if ai_analyzed_pages and openai_client and self.ai_budget.consume():
             return self._generate_ai_summary_from_pages(ai_analyzed_pages)
         
-        # Fallback to original logic
-        top_pages = self.pages_data[:3]
-        if not top_pages:
-            summary = "A website providing information and resources."
-        else:
-            keywords = []
-            for page in top_pages:
-                # Use AI keywords if available, otherwise extract from title
-                if 'ai_keywords' in page and page['ai_keywords']:
-                    keywords.extend(page['ai_keywords'])
-                else:
-                    title_words = page['title'].lower().split()
-                    keywords.extend([word for word in title_words if len(word) > 3])
-            
-            # Get most common meaningful words
-            from collections import Counter
-            common_words = Counter(keywords).most_common(3)
-            if common_words:
-                summary = f"A platform providing {', '.join([word[0] for word in common_words])} and related resources."
-            else:
-                summary = "A website providing information and resources."
+        # Extractive summary from the most central sentences of the top pages
+        summary = summarize_site(self.pages_data) or self._keyword_summary()
         
         # Clean up the summary with OpenAI if available
         if openai_client:
             return self.cleanup_with_openai(summary, "summary")
         return summary
     
+    def _keyword_summary(self) -> str:
+        """Fallback summary from the most common keywords of the top pages"""
+        top_pages = self.pages_data[:3]
+        if not top_pages:
+            return "A website providing information and resources."
+        
+        keywords = []
+        for page in top_pages:
+            # Use AI keywords if available, otherwise extract from title
+            if 'ai_keywords' in page and page['ai_keywords']:
+                keywords.extend(page['ai_keywords'])
+            else:
+                title_words = page['title'].lower().split()
+                keywords.extend([word for word in title_words if len(word) > 3])
+        
+        # Get most common meaningful words
+        from collections import Counter
+        common_words = Counter(keywords).most_common(3)
+        if common_words:
+            return f"A platform providing {', '.join([word[0] for word in common_words])} and related resources."
+        return "A website providing information and resources."
+    
     def _generate_ai_summary_from_pages(self, pages: List[Dict]) -> str:
         """Generate summary using AI analysis of pages"""
         try:
@@ -1152,11 +1498,63 @@ The summary should be 2-3 sentences, explain the website's primary purpose, and
             return "A website providing information and resources."
     
     def generate_llms_txt(self) -> str:
+        return ''.join(self.iter_llms_txt())
+    
+    def iter_llms_txt(self) -> Iterator[str]:
+        """Yield llms.txt piece by piece: the header, each section in priority order as soon as it is ready, then extras.
+        
+        Sections that need AI cleanup are submitted to a thread pool together, so total
+        wall time is bounded by the slowest cleanup instead of the sum of all of them.
+        """
         domain = urlparse(self.base_url).netloc
         
         # Header
-        content = f"# {domain}\n\n"
+        yield f"# {domain}\n\n"
+        
+        sections = self._group_sections()
+        previous_sections = self.previous_sections.get('sections', {})
+        
+        with ThreadPoolExecutor(max_workers=SECTION_CLEANUP_WORKERS) as executor:
+            # Budget is reserved here in priority order so the most important sections win
+            pending = []
+            for section_name, pages in sections:
+                input_hash = self._section_input_hash(section_name, pages)
+                wants_ai = self.section_cleanup and any(p.get('confidence', 0.0) < self.confidence_threshold for p in pages)
+                
+                # Unchanged sections are reused, unless they missed an AI cleanup that can run now
+                previous = previous_sections.get(section_name)
+                if previous and previous['input_hash'] == input_hash and (previous['ai_cleaned'] or not (wants_ai and openai_client)):
+                    self.sections_reused += 1
+                    pending.append((section_name, input_hash, previous['output'], previous['ai_cleaned']))
+                    continue
+                
+                self.sections_rendered += 1
+                section_content = self._render_section(section_name, pages)
+                if wants_ai and openai_client and self.ai_budget.consume():
+                    pending.append((section_name, input_hash, section_content, executor.submit(self._cleanup_section, section_content)))
+                else:
+                    pending.append((section_name, input_hash, section_content, False))
+            
+            for section_name, input_hash, section_content, cleanup in pending:
+                if isinstance(cleanup, Future):
+                    output = cleanup.result()
+                    # cleanup_with_openai hands back the original section when the call fails
+                    ai_cleaned = output != section_content
+                else:
+                    output, ai_cleaned = section_content, cleanup
+                self.section_state['sections'][section_name] = {
+                    'input_hash': input_hash,
+                    'output': output,
+                    'ai_cleaned': ai_cleaned,
+                }
+                yield output
         
+        additional_resources = self._render_additional_resources()
+        if additional_resources:
+            yield additional_resources
+    
+    def _group_sections(self) -> List[Tuple[str, List[Dict]]]:
+        """Group and order sections, returning (name, pages above the importance cutoff) in priority order"""
         # Group pages by section
         sections = {}
         for page in self.pages_data:
@@ -1183,125 +1581,175 @@ The summary should be 2-3 sentences, explain the website's primary purpose, and
         section_priority.sort(key=lambda x: (x[1], x[2]), reverse=True)
         section_order = [name for name, _, _ in section_priority]
         
+        # Include all pages, but prioritize by importance score
+        # Lower threshold for large crawls to include more content
+        total_pages = len(self.pages_data)
+        if total_pages > 200:
+            # For very large crawls, include pages with score > 0.1
+            min_score = 0.1
+        elif total_pages > 100:
+            # For large crawls, include pages with score > 0.15
+            min_score = 0.15
+        elif total_pages > 50:
+            # For medium-large crawls, include pages with score > 0.2
+            min_score = 0.2
+        else:
+            # For smaller crawls, use original threshold
+            min_score = 0.3
+        
+        grouped = []
         for section_name in section_order:
             if section_name in sections:
                 pages = sorted(sections[section_name], key=lambda x: x['importance_score'], reverse=True)
+                important_pages = [p for p in pages if p['importance_score'] > min_score]
                 
-                # Include all pages, but prioritize by importance score
-                # Lower threshold for large crawls to include more content
-                total_pages = len(self.pages_data)
-                
-                if total_pages > 200:
-                    # For very large crawls, include pages with score > 0.1
-                    important_pages = [p for p in pages if p['importance_score'] > 0.1]
-                elif total_pages > 100:
-                    # For large crawls, include pages with score > 0.15
-                    important_pages = [p for p in pages if p['importance_score'] > 0.15]
-                elif total_pages > 50:
-                    # For medium-large crawls, include pages with score > 0.2
-                    important_pages = [p for p in pages if p['importance_score'] > 0.2]
-                else:
-                    # For smaller crawls, use original threshold
-                    important_pages = [p for p in pages if p['importance_score'] > 0.3]
-                
-                if not important_pages:
-                    continue
-                
-                # Don't limit pages per section - include all important pages
-                # AI processing will be disabled for large crawls anyway
-                
-                # Create clean section with simple format
-                section_content = f"## {section_name}\n\n"
-                
-                for page in important_pages:
-                    title = page['title']
-                    url = page['url']
-                    description = page['description']
-                    
-                    # Use AI-generated description if available, otherwise use intelligent fallback
-                    final_description = self._generate_page_description(page)
-                    
-                    # Add FAQ indicator if page has FAQs
-                    faq_indicator = ""
-                    if page.get('faqs') and len(page['faqs']) > 0:
-                        faq_indicator = f" [📋 {len(page['faqs'])} FAQs]"
-                    
-                    section_content += f"- [{title}]({url}): {final_description}{faq_indicator}\n"
-                
-                section_content += "\n"
-                
-                # Use AI to clean up the section format and descriptions, but be selective
-                should_use_ai = True
-                total_pages = len(self.pages_data)
-                
-                # Skip AI for less important sections if there are many pages
-                if total_pages > 100:
-                    # For very large crawls, skip AI enhancement entirely to avoid timeouts
-                    should_use_ai = False
-                elif total_pages > 50:
-                    # Only use AI for the most important sections
-                    priority_sections = ['Getting Started', 'Documentation', 'API Reference', 'News', 'Politics', 'Products', 'Services']
-                    should_use_ai = section_name in priority_sections
-                
-                if should_use_ai:
-                    cleaned_section = self.cleanup_with_openai(section_content, "section")
-                    # Ensure proper spacing after AI cleanup
-                    if not cleaned_section.endswith('\n\n'):
-                        if cleaned_section.endswith('\n'):
-                            cleaned_section += '\n'
-                        else:
-                            cleaned_section += '\n\n'
-                    content += cleaned_section
-                else:
-                    content += section_content
+                if important_pages:
+                    grouped.append((section_name, important_pages))
         
-        # Add section for additional pages that didn't make it into main sections
-        # Only for smaller crawls where this makes sense
-        if total_pages <= 100:
-            optional_pages = [p for p in self.pages_data if p['importance_score'] <= 0.3 and p['importance_score'] > 0.1]
-            if optional_pages:
-                content += "## Additional Resources\n\n"
-                for page in optional_pages[:10]:  # Include more optional pages
-                    title = page['title']
-                    url = page['url']
-                    description = page.get('description', '')[:100] if page.get('description') else ''
-                    if description:
-                        content += f"- [{title}]({url}): {description}\n"
-                    else:
-                        content += f"- [{title}]({url})\n"
-                content += "\n"
-        
-        return content
+        return grouped
     
-    def generate_llms_full_txt(self) -> str:
-        content = f"# {self.site_name} - Complete Documentation\n\n"
+    def _render_section(self, section_name: str, pages: List[Dict]) -> str:
+        """Render one section in the simple link-list format"""
+        section_content = f"## {section_name}\n\n"
         
-        summary = self.generate_summary()
-        content += f"> {summary}\n\n"
-        
-        for page in self.pages_data:
-            content += f"## {page['title']}\n\n"
-            content += f"URL: {page['url']}\n\n"
-            if page['description']:
-                content += f"Description: {page['description']}\n\n"
+        for page in pages:
+            title = page['title']
+            url = page['url']
+            
+            # Use AI-generated description if available, otherwise use intelligent fallback
+            final_description = self._generate_page_description(page)
             
-            # Include FAQs if available
+            # Add FAQ indicator if page has FAQs
+            faq_indicator = ""
             if page.get('faqs') and len(page['faqs']) > 0:
-                content += f"### FAQs ({len(page['faqs'])} questions)\n\n"
-                for faq in page['faqs']:
-                    content += f"**Q: {faq['question']}**\n\n"
-                    content += f"A: {faq['answer']}\n\n"
-                content += "\n"
+                faq_indicator = f" [📋 {len(page['faqs'])} FAQs]"
             
+            section_content += f"- [{title}]({url}): {final_description}{faq_indicator}\n"
+        
+        section_content += "\n"
+        return section_content
+    
+    def _section_input_hash(self, section_name: str, pages: List[Dict]) -> str:
+        """Hash of everything a rendered section depends on: its name and each page's fields and content"""
+        digest = hashlib.sha256(section_name.encode('utf-8'))
+        for page in pages:
+            fields = [
+                page['url'], page['title'], page.get('description') or '', page.get('ai_description') or '',
+                page.get('content_type') or '', ','.join(page.get('ai_keywords') or []),
+                str(len(page.get('faqs') or [])), str(page.get('confidence', 0.0) < self.confidence_threshold),
+                hashlib.sha256((page.get('content') or '').encode('utf-8')).hexdigest(),
+            ]
+            digest.update('\x1f'.join(fields).encode('utf-8'))
+            digest.update(b'\x1e')
+        return digest.hexdigest()
+    
+    def _cleanup_section(self, section_content: str) -> str:
+        """AI cleanup of one section (budget already reserved), normalized to end with a blank line"""
+        cleaned_section = self.cleanup_with_openai(section_content, "section", budget_reserved=True)
+        # Ensure proper spacing after AI cleanup
+        if not cleaned_section.endswith('\n\n'):
+            if cleaned_section.endswith('\n'):
+                cleaned_section += '\n'
+            else:
+                cleaned_section += '\n\n'
+        return cleaned_section
+    
+    def _render_additional_resources(self) -> str:
+        """Section for additional pages that didn't make it into main sections"""
+        # Only for smaller crawls where this makes sense
+        if len(self.pages_data) > 100:
+            return ""
+        
+        optional_pages = [p for p in self.pages_data if p['importance_score'] <= 0.3 and p['importance_score'] > 0.1]
+        if not optional_pages:
+            return ""
+        
+        content = "## Additional Resources\n\n"
+        for page in optional_pages[:10]:  # Include more optional pages
+            title = page['title']
+            url = page['url']
+            description = page.get('description', '')[:100] if page.get('description') else ''
+            if description:
+                content += f"- [{title}]({url}): {description}\n"
+            else:
+                content += f"- [{title}]({url})\n"
+        content += "\n"
+        return content
+    
+    def generate_llms_full_txt(self) -> str:
+        return ''.join(self.iter_llms_full_txt())
+    
+    def write_llms_full_txt(self, sink: TextIO) -> int:
+        """Write llms-full.txt to a file-like sink chunk by chunk, returning the number of characters written"""
+        written = 0
+        for chunk in self.iter_llms_full_txt():
+            sink.write(chunk)
+            written += len(chunk)
+        return written
+    
+    def iter_llms_full_txt(self) -> Iterator[str]:
+        """Yield llms-full.txt as one chunk for the header and one per page, without building the whole document"""
+        yield self._render_full_header()
+        
+        for _, rendered in self.iter_llms_full_pages():
+            yield rendered
+    
+    def iter_llms_full_pages(self, group_by_section: bool = False) -> Iterator[Tuple[Dict, str]]:
+        """Yield (page, rendered llms-full.txt entry) pairs, optionally grouped by section in importance order"""
+        pages = self.pages_data
+        if group_by_section:
+            section_rank = {}
+            for page in pages:
+                section_rank.setdefault(page.get('section'), len(section_rank))
+            # Stable sort keeps importance order within each section
+            pages = sorted(pages, key=lambda p: section_rank[p.get('section')])
+        
+        for page in pages:
+            yield page, self._render_full_page(page)
+    
+    def write_llms_full_shards(self, output_dir: str, max_shard_bytes: int = 512 * 1024, by_section: bool = False) -> Dict:
+        """Write llms-full.txt as size-bounded shard files plus a manifest, returning the manifest"""
+        return write_shards(
+            self._render_full_header(),
+            self.iter_llms_full_pages(group_by_section=by_section),
+            output_dir,
+            site=self.base_url,
+            max_shard_bytes=max_shard_bytes,
+            by_section=by_section
+        )
+    
+    def _render_full_header(self) -> str:
+        # The summary costs a TextRank pass or an AI call, so it is computed once per generation
+        if self._summary is None:
+            self._summary = self.generate_summary()
+        summary = self._summary
+        return f"# {self.site_name} - Complete Documentation\n\n> {summary}\n\n"
+    
+    def _render_full_page(self, page: Dict) -> str:
+        parts = [f"## {page['title']}\n\n", f"URL: {page['url']}\n\n"]
+        if page['description']:
+            parts.append(f"Description: {page['description']}\n\n")
+        
+        # Include FAQs if available
+        if page.get('faqs') and len(page['faqs']) > 0:
+            parts.append(f"### FAQs ({len(page['faqs'])} questions)\n\n")
+            for faq in page['faqs']:
+                parts.append(f"**Q: {faq['question']}**\n\n")
+                parts.append(f"A: {faq['answer']}\n\n")
+            parts.append("\n")
+        
+        if page.get('content_markdown'):
+            # Already cut at a section boundary within FULL_PAGE_MAX_TOKENS
+            page_content = page['content_markdown']
+        else:
             # Truncate very long content
             page_content = page['content'][:2000]
             if len(page['content']) > 2000:
                 page_content += "... [content truncated]"
-            
-            content += f"{page_content}\n\n"
-            content += "---\n\n"
         
-        return content
+        parts.append(f"{page_content}\n\n")
+        parts.append("---\n\n")
+        return ''.join(parts)
 
     def _generate_page_description(self, page: Dict) -> str:
         """Generate an intelligent description for a page using AI analysis or smart fallbacks"""
@@ -1318,8 +1766,9 @@ The summary should be 2-3 sentences, explain the website's primary purpose, and
         if page['description'] and len(page['description'].strip()) > 20:
             return self._clean_existing_description(page['description'])
         
-        # Generate description using AI if available
-        if openai_client:
+        # Generate description using AI only for ambiguous pages while budget remains
+        if (openai_client and self.description_ai and page.get('confidence', 0.0) < self.confidence_threshold
+                and self.ai_budget.consume()):
             return self._generate_description_with_ai(page)
         
         # Final fallback: create a basic description
@@ -1427,8 +1876,18 @@ The description should be 1-2 sentences, clearly explain what the page offers, a
             print(f"AI description generation failed for {page['title']}: {e}")
             return self._create_basic_description(page)
     
+    def _extractive_description(self, page: Dict) -> Optional[str]:
+        """TextRank description from the page content; all pages are summarized together on first use"""
+        if self._extractive_descriptions is None:
+            self._extractive_descriptions = summarize_pages(self.pages_data)
+        return self._extractive_descriptions.get(page['url'])
+    
     def _create_basic_description(self, page: Dict) -> str:
         """Create a basic description as final fallback"""
+        extractive = self._extractive_description(page)
+        if extractive:
+            return extractive
+        
         title = page['title']
         url = page['url']
         
@@ -1467,8 +1926,189 @@ The description should be 1-2 sentences, clearly explain what the page offers, a
 async def root():
     return {"message": "LLMs.txt Generator API", "docs": "/docs"}
 
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings of the same site compare equal"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or 'https'
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parsed.path.rstrip('/') or '/'
+    query = '&'.join(sorted(q for q in parsed.query.split('&') if q))
+    return f"{scheme}://{host}{path}" + (f"?{query}" if query else '')
+
+# In-flight /generate jobs, keyed by canonical URL plus every parameter that changes the output.
+# Identical concurrent requests attach to the running job instead of crawling the site again.
+_inflight_generations: Dict[tuple, asyncio.Task] = {}
+GENERATION_METRICS = {
+    'requests_total': 0,
+    'jobs_started': 0,
+    'requests_coalesced': 0,
+}
+
+def _generation_key(request: CrawlRequest) -> tuple:
+    return (
+        canonicalize_url(str(request.url)),
+        request.max_pages,
+        request.depth_limit,
+        request.crawl_all,
+        request.generation_type,
+        request.force_regenerate,
+        request.ai_call_budget,
+        request.ai_confidence_threshold,
+        request.content_format,
+    )
+
 @app.post("/generate", response_model=LLMSTxtResponse)
 async def generate_llms_txt(request: CrawlRequest):
+    GENERATION_METRICS['requests_total'] += 1
+    key = _generation_key(request)
+    
+    job = _inflight_generations.get(key)
+    if job is not None:
+        GENERATION_METRICS['requests_coalesced'] += 1
+        print(f"Attaching to in-flight generation for {key[0]}")
+    else:
+        GENERATION_METRICS['jobs_started'] += 1
+        job = asyncio.ensure_future(_run_generation(request))
+        _inflight_generations[key] = job
+        job.add_done_callback(lambda _: _inflight_generations.pop(key, None))
+    
+    # Shield the shared job so one disconnecting client does not cancel it for the others
+    return await asyncio.shield(job)
+
+async def _crawl_and_prepare(request: CrawlRequest, generation_type: Optional[str] = None) -> Tuple[WebsiteCrawler, List[Dict], LLMSTxtGenerator]:
+    """Crawl the requested site and return the crawler, its pages and a generator sharing one AI budget"""
+    generation_type = generation_type or request.generation_type or "both"
+    
+    # One AI call budget is shared by crawling and generation for this job
+    ai_budget = AICallBudget(request.ai_call_budget if request.ai_call_budget is not None else AI_CALL_BUDGET)
+    confidence_threshold = request.ai_confidence_threshold if request.ai_confidence_threshold is not None else AI_CONFIDENCE_THRESHOLD
+    
+    # Crawl the website
+    crawler = WebsiteCrawler(
+        str(request.url), 
+        max_pages=request.max_pages,
+        depth_limit=request.depth_limit,
+        crawl_all=request.crawl_all,
+        ai_budget=ai_budget,
+        confidence_threshold=confidence_threshold,
+        keep_full_content=generation_type != "summary",
+        markdown_content=request.content_format == "markdown"
+    )
+    
+    pages_data = await crawler.crawl()
+    
+    if not pages_data:
+        raise HTTPException(status_code=400, detail="Could not crawl any pages from the provided URL")
+    
+    # Generate llms.txt files
+    generator = LLMSTxtGenerator(
+        str(request.url), pages_data, ai_budget=ai_budget, confidence_threshold=confidence_threshold,
+        section_cleanup=generation_type != "fulltext", description_ai=generation_type != "fulltext"
+    )
+    
+    # Log AI processing strategy
+    total_pages = len(pages_data)
+    ambiguous_pages = len([p for p in pages_data if p.get('confidence', 0.0) < confidence_threshold])
+    print(f"Crawled {total_pages} pages - {ambiguous_pages} below confidence {confidence_threshold}, "
+          f"{crawler.pages_escalated} escalated to AI, {ai_budget.remaining}/{ai_budget.max_calls} AI calls left")
+    
+    return crawler, pages_data, generator
+
+def _memory_mb() -> Dict[str, Optional[float]]:
+    """Current resident memory, and the peak over the whole process lifetime (not just this request), in MB"""
+    memory = {'rss_mb': None, 'process_peak_rss_mb': None}
+    try:
+        # Second field of statm is the resident page count (Linux only)
+        with open('/proc/self/statm') as f:
+            memory['rss_mb'] = round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        memory['process_peak_rss_mb'] = round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+    except (ImportError, AttributeError):
+        pass
+    return memory
+
+@app.post("/generate/full")
+async def generate_llms_full_txt_stream(request: CrawlRequest):
+    """Crawl the site and stream llms-full.txt as a chunked download instead of embedding it in JSON"""
+    try:
+        _, _, generator = await _crawl_and_prepare(request, generation_type="fulltext")
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_message = str(e) if str(e) else f"{type(e).__name__} occurred"
+        raise HTTPException(status_code=500, detail=f"Error generating llms-full.txt: {error_message}")
+    
+    # Pages are rendered lazily as the client reads the response
+    return StreamingResponse(
+        generator.iter_llms_full_txt(),
+        media_type="text/plain; charset=utf-8",
+        headers={'Content-Disposition': 'attachment; filename="llms-full.txt"'}
+    )
+
+@app.post("/generate/shards")
+async def generate_llms_full_shards(request: ShardedCrawlRequest):
+    """Crawl the site and write llms-full.txt as size-bounded shards, returning the manifest"""
+    try:
+        _, _, generator = await _crawl_and_prepare(request, generation_type="fulltext")
+        
+        job_id = uuid.uuid4().hex
+        pruned = await asyncio.to_thread(prune_shard_jobs, SHARD_OUTPUT_DIR, SHARD_TTL_HOURS * 3600, SHARD_MAX_JOBS, [job_id])
+        if pruned:
+            print(f"Removed {len(pruned)} old shard jobs")
+        manifest = await asyncio.to_thread(
+            generator.write_llms_full_shards,
+            os.path.join(SHARD_OUTPUT_DIR, job_id),
+            max_shard_bytes=max(1, request.max_shard_kb or 512) * 1024,
+            by_section=request.shard_by == "section"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_message = str(e) if str(e) else f"{type(e).__name__} occurred"
+        raise HTTPException(status_code=500, detail=f"Error generating llms-full.txt shards: {error_message}")
+    
+    print(f"Wrote {len(manifest['shards'])} shards ({manifest['total_bytes']} bytes) for job {job_id}")
+    return {'job_id': job_id, **manifest}
+
+@app.get("/shards/{job_id}/manifest")
+async def get_shard_manifest(job_id: str, offset: int = 0, limit: int = 50):
+    """Manifest of a sharded job, paginated over its shard list"""
+    manifest = load_manifest(SHARD_OUTPUT_DIR, job_id)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail=f"Unknown shard job {job_id}")
+    mark_job_used(SHARD_OUTPUT_DIR, job_id)
+    
+    shards = manifest['shards']
+    offset = max(0, offset)
+    limit = min(max(1, limit), 500)
+    return {
+        **manifest,
+        'job_id': job_id,
+        'shards': shards[offset:offset + limit],
+        'shard_count': len(shards),
+        'offset': offset,
+        'limit': limit,
+    }
+
+@app.get("/shards/{job_id}/{shard_name}")
+async def get_shard(job_id: str, shard_name: str):
+    """Serve one shard file; Range requests fetch individual pages by their manifest byte offsets"""
+    path = shard_path(SHARD_OUTPUT_DIR, job_id, shard_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown shard {job_id}/{shard_name}")
+    mark_job_used(SHARD_OUTPUT_DIR, job_id)
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
+
+async def _run_generation(request: CrawlRequest) -> LLMSTxtResponse:
     start_time = time.time()
     
     try:
@@ -1510,35 +2150,32 @@ async def generate_llms_txt(request: CrawlRequest):
                 existing_files_found=existing_files
             )
         
-        # Crawl the website
-        crawler = WebsiteCrawler(
-            str(request.url), 
-            max_pages=request.max_pages,
-            depth_limit=request.depth_limit,
-            crawl_all=request.crawl_all
-        )
-        
-        pages_data = await crawler.crawl()
-        
-        if not pages_data:
-            raise HTTPException(status_code=400, detail="Could not crawl any pages from the provided URL")
-        
-        # Generate llms.txt files
-        generator = LLMSTxtGenerator(str(request.url), pages_data)
-        
-        # Log AI processing strategy based on crawl size
-        total_pages = len(pages_data)
-        if total_pages > 100:
-            print(f"Large crawl detected ({total_pages} pages) - AI enhancement disabled to ensure fast processing")
-        elif total_pages > 50:
-            print(f"Medium-large crawl detected ({total_pages} pages) - AI enhancement limited to priority sections")
-        elif total_pages > 20:
-            print(f"Medium crawl detected ({total_pages} pages) - AI enhancement with page limits per section")
-        else:
-            print(f"Small crawl detected ({total_pages} pages) - full AI enhancement enabled")
+        generation_type = request.generation_type or "both"
+        crawl_start = time.time()
+        crawler, pages_data, generator = await _crawl_and_prepare(request)
+        ai_budget = generator.ai_budget
+        
+        # "fulltext" skips section cleanup and AI page descriptions (set on the generator), "summary" skips full-text rendering
+        llms_txt_start = time.time()
+        # Generation makes blocking AI calls and runs TextRank, so it stays off the event loop
+        llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
+        llms_full_txt_start = time.time()
+        llms_full_txt = await asyncio.to_thread(generator.generate_llms_full_txt) if generation_type != "summary" else ''
+        
+        generation_stats = {
+            'generation_type': generation_type,
+            'crawl_seconds': round(llms_txt_start - crawl_start, 3),
+            'llms_txt_seconds': round(llms_full_txt_start - llms_txt_start, 3),
+            'llms_full_txt_seconds': round(time.time() - llms_full_txt_start, 3),
+            'retained_content_chars': sum(len(p['content']) for p in pages_data),
+            'crawled_content_chars': sum(p['content_length'] for p in pages_data),
+            **_memory_mb(),
+            'content_extraction': crawler.extraction_summary(),
+        }
+        print(f"Generation stats: {generation_stats}")
         
-        llms_txt = generator.generate_llms_txt()
-        llms_full_txt = generator.generate_llms_full_txt()
+        if _is_canonical_generation(request):
+            await store_artifacts(str(request.url), {'llms.txt': llms_txt, 'llms-full.txt': llms_full_txt})
         
         # Prepare response
         pages_info = []
@@ -1571,7 +2208,10 @@ async def generate_llms_txt(request: CrawlRequest):
             ai_enhanced=ai_enhanced,
             ai_model=ai_model,
             used_existing=False,
-            site_characteristics=site_characteristics
+            site_characteristics=site_characteristics,
+            pages_escalated=crawler.pages_escalated,
+            ai_calls_used=ai_budget.calls_used,
+            generation_stats=generation_stats
         )
         
     except Exception as e:
@@ -1584,10 +2224,66 @@ async def generate_llms_txt(request: CrawlRequest):
         error_message = str(e) if str(e) else f"{type(e).__name__} occurred"
         raise HTTPException(status_code=500, detail=f"Error generating llms.txt: {error_message}")
 
+# Request fields that shape the generated files; only a run with all of them at their defaults is published
+CANONICAL_GENERATION_FIELDS = ('max_pages', 'depth_limit', 'crawl_all', 'generation_type', 'ai_call_budget',
+                               'ai_confidence_threshold', 'content_format')
+
+def _is_canonical_generation(request: CrawlRequest) -> bool:
+    """Whether this run may replace the domain's stored artifacts (an ad-hoc 5-page summary must not)"""
+    return all(getattr(request, name) == CrawlRequest.model_fields[name].default for name in CANONICAL_GENERATION_FIELDS)
+
+async def store_artifacts(url: str, artifacts: Dict[str, str]):
+    """Persist generated files to the artifact store; failures are logged and never fail the generation"""
+    for name, content in artifacts.items():
+        if not content:
+            continue
+        try:
+            meta = await asyncio.to_thread(ARTIFACT_STORE.save, url, name, content)
+            print(f"💾 Stored {meta['domain']}/{name} ({meta['size']} bytes, {meta['sha256'][:12]})")
+        except Exception as e:
+            print(f"Error storing artifact {name} for {url}: {e}")
+
+@app.get("/artifacts/{domain}/{artifact_name}")
+async def get_artifact(domain: str, artifact_name: str, request: Request):
+    """Serve a stored llms.txt / llms-full.txt with ETag revalidation and precompressed variants"""
+    meta = await asyncio.to_thread(ARTIFACT_STORE.get_meta, domain.lower(), artifact_name)
+    if meta is None:
+        raise HTTPException(status_code=404, detail=f"No stored {artifact_name} for {domain}")
+    
+    encoding = choose_encoding(meta, request.headers.get('accept-encoding'))
+    etag = etag_for(meta, encoding)
+    headers = {
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'public, max-age=0, must-revalidate',
+        'Last-Modified': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(meta['stored_at'])),
+    }
+    
+    if_none_match = request.headers.get('if-none-match', '')
+    known_etags = {etag_for(meta, e) for e in meta['encodings']}
+    requested = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if '*' in requested or requested & known_etags:
+        return Response(status_code=304, headers=headers)
+    
+    body = await asyncio.to_thread(ARTIFACT_STORE.read, meta, encoding)
+    if body is None:
+        raise HTTPException(status_code=404, detail=f"Stored {artifact_name} for {domain} is missing its content")
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type="text/plain; charset=utf-8", headers=headers)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def generation_metrics():
+    return {
+        **GENERATION_METRICS,
+        'jobs_in_flight': len(_inflight_generations),
+        'openai': openai_client.get_stats() if openai_client is not None else None,
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
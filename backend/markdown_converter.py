@@ -0,0 +1,272 @@
+"""
+Compact HTML-to-Markdown conversion for llms-full.txt page bodies.
+
+Runs over the main content elements already selected from the page's parse
+tree, so no second parse is needed. Blocks (headings, paragraphs, lists, code,
+quotes, tables) are yielded one at a time, which lets truncation stop walking
+the tree as soon as the token budget is spent. Truncation cuts at section
+boundaries (headings); a section is only split between blocks when dropping
+it whole would leave most of the budget unused.
+"""
+
+import re
+from typing import Iterable, Iterator, List, Optional
+
+from bs4 import NavigableString, Tag
+from bs4.element import CData
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+CONTAINER_TAGS = {
+    'div', 'section', 'article', 'main', 'header', 'footer', 'aside', 'nav', 'figure', 'figcaption',
+    'details', 'summary', 'form', 'fieldset', 'body', 'html', 'center',
+}
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'img', 'picture', 'video', 'audio', 'iframe',
+                'button', 'input', 'select', 'textarea', 'hr', 'canvas'}
+CODE_LANGUAGE = re.compile(r'(?:language|lang)-([\w+-]+)')
+
+TRUNCATION_NOTE = '[content truncated]'
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise the usual ~4 characters per token estimate"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+class MarkdownConverter:
+    def __init__(self, heading_offset: int = 2):
+        # Page bodies sit under a "## Title" heading in llms-full.txt, so <h1> becomes ###
+        self.heading_offset = heading_offset
+
+    def iter_blocks(self, elements: Iterable[Tag]) -> Iterator[str]:
+        """Markdown blocks of the given elements in document order"""
+        for element in elements:
+            if element is not None:
+                yield from self._blocks(element, list_depth=0)
+
+    def _blocks(self, node: Tag, list_depth: int) -> Iterator[str]:
+        inline = []
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if type(child) in (NavigableString, CData):
+                    inline.append(str(child))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+                continue
+
+            name = child.name
+            if name == 'br':
+                inline.append(' ')
+                continue
+            if name not in HEADING_TAGS and name not in CONTAINER_TAGS and name not in BLOCK_RENDERERS:
+                inline.append(self._inline(child))
+                continue
+
+            paragraph = _normalize(''.join(inline))
+            inline = []
+            if paragraph:
+                yield paragraph
+
+            if name in HEADING_TAGS:
+                text = _normalize(self._inline(child))
+                if text:
+                    level = min(HEADING_TAGS[name] + self.heading_offset, 6)
+                    yield f"{'#' * level} {text}"
+            elif name in CONTAINER_TAGS:
+                yield from self._blocks(child, list_depth)
+            else:
+                yield from BLOCK_RENDERERS[name](self, child, list_depth)
+
+        paragraph = _normalize(''.join(inline))
+        if paragraph:
+            yield paragraph
+
+    def _inline(self, node: Tag) -> str:
+        parts = []
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if type(child) in (NavigableString, CData):
+                    parts.append(str(child))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIPPED_TAGS:
+                continue
+            if child.name == 'br':
+                parts.append(' ')
+                continue
+
+            text = self._inline(child)
+            stripped = text.strip()
+            # Markers hug the text; surrounding whitespace stays outside them
+            lead, trail = text[:len(text) - len(text.lstrip())], text[len(text.rstrip()):]
+            if not stripped:
+                parts.append(text)
+            elif child.name == 'code':
+                parts.append(f"{lead}`{stripped}`{trail}")
+            elif child.name in ('strong', 'b'):
+                parts.append(f"{lead}**{stripped}**{trail}")
+            elif child.name in ('em', 'i'):
+                parts.append(f"{lead}*{stripped}*{trail}")
+            else:
+                parts.append(f" {text} " if child.name in CONTAINER_TAGS or child.name in BLOCK_RENDERERS else text)
+        return ''.join(parts)
+
+    def _paragraph(self, node: Tag, list_depth: int) -> Iterator[str]:
+        # Paragraphs may wrap block elements on sloppy pages; treat them like containers then
+        if node.find(list(BLOCK_RENDERERS) + list(HEADING_TAGS)):
+            yield from self._blocks(node, list_depth)
+            return
+        text = _normalize(self._inline(node))
+        if text:
+            yield text
+
+    def _code_block(self, node: Tag, list_depth: int) -> Iterator[str]:
+        code = node.get_text().strip('\n')
+        if not code.strip():
+            return
+        language = ''
+        code_tag = node.find('code')
+        for candidate in (node, code_tag):
+            if candidate is not None:
+                match = CODE_LANGUAGE.search(' '.join(candidate.get('class') or []))
+                if match:
+                    language = match.group(1)
+                    break
+        fence = '````' if '```' in code else '```'
+        yield f"{fence}{language}\n{code}\n{fence}"
+
+    def _list(self, node: Tag, list_depth: int) -> Iterator[str]:
+        lines = []
+        ordered = node.name == 'ol'
+        indent = '  ' * list_depth
+        number = 1
+        for item in node.find_all('li', recursive=False):
+            nested = []
+            item_inline = []
+            for child in item.children:
+                if isinstance(child, Tag) and child.name in ('ul', 'ol'):
+                    nested.extend(self._list(child, list_depth + 1))
+                elif isinstance(child, Tag) and child.name in ('pre', 'table', 'blockquote'):
+                    nested.extend(BLOCK_RENDERERS[child.name](self, child, list_depth + 1))
+                elif isinstance(child, Tag) and child.name not in SKIPPED_TAGS:
+                    item_inline.append(self._inline(child) if child.name not in CONTAINER_TAGS and child.name != 'p'
+                                       else f" {self._inline(child)} ")
+                elif isinstance(child, NavigableString) and type(child) in (NavigableString, CData):
+                    item_inline.append(str(child))
+            text = _normalize(''.join(item_inline))
+            if text:
+                marker = f"{number}." if ordered else '-'
+                lines.append(f"{indent}{marker} {text}")
+                number += 1
+            lines.extend(nested)
+        if lines:
+            yield '\n'.join(lines)
+
+    def _blockquote(self, node: Tag, list_depth: int) -> Iterator[str]:
+        inner = '\n\n'.join(self._blocks(node, list_depth))
+        if inner:
+            yield '\n'.join(f"> {line}" if line else '>' for line in inner.split('\n'))
+
+    def _table(self, node: Tag, list_depth: int) -> Iterator[str]:
+        rows = []
+        for row in node.find_all('tr'):
+            cells = [_normalize(self._inline(cell)).replace('|', '\\|') for cell in row.find_all(['th', 'td'], recursive=False)]
+            if any(cells):
+                rows.append(cells)
+        if not rows:
+            return
+        width = max(len(r) for r in rows)
+        rows = [r + [''] * (width - len(r)) for r in rows]
+        lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + '---|' * width]
+        lines.extend('| ' + ' | '.join(r) + ' |' for r in rows[1:])
+        yield '\n'.join(lines)
+
+    def _definition_list(self, node: Tag, list_depth: int) -> Iterator[str]:
+        lines = []
+        for child in node.find_all(['dt', 'dd'], recursive=False):
+            text = _normalize(self._inline(child))
+            if text:
+                lines.append(f"**{text}**" if child.name == 'dt' else f": {text}")
+        if lines:
+            yield '\n'.join(lines)
+
+
+BLOCK_RENDERERS = {
+    'p': MarkdownConverter._paragraph,
+    'pre': MarkdownConverter._code_block,
+    'ul': MarkdownConverter._list,
+    'ol': MarkdownConverter._list,
+    'blockquote': MarkdownConverter._blockquote,
+    'table': MarkdownConverter._table,
+    'dl': MarkdownConverter._definition_list,
+}
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _cut_block(block: str, max_tokens: int) -> str:
+    """Shorten a single oversized block at a word boundary, keeping code fences closed"""
+    cut = block[:max(max_tokens, 1) * 4].rsplit(' ', 1)[0].rstrip()
+    if block.startswith('```'):
+        fence = '````' if block.startswith('````') else '```'
+        return f"{cut}\n{fence}"
+    return f"{cut}..."
+
+
+def truncate_blocks(blocks: Iterable[str], max_tokens: Optional[int]) -> str:
+    """
+    Join blocks into Markdown within max_tokens, preferring to cut at section (heading) boundaries.
+    Stops consuming blocks once the budget is spent, so a lazy block iterator stops converting too.
+    """
+    if max_tokens is None:
+        return '\n\n'.join(blocks)
+
+    kept: List[str] = []
+    section: List[str] = []
+    used = section_tokens = 0
+    overflow = False
+
+    for block in blocks:
+        if block.startswith('#') and section:
+            kept.extend(section)
+            used += section_tokens
+            section, section_tokens = [], 0
+        section.append(block)
+        section_tokens += count_tokens(block) + 1
+        if used + section_tokens > max_tokens:
+            overflow = True
+            break
+
+    if not overflow:
+        return '\n\n'.join(kept + section)
+
+    # The overflowing section is dropped whole, unless that would leave less than half the budget used:
+    # then it is cut between blocks, shortening the first block that does not fit
+    if used < max_tokens // 2:
+        for block in section:
+            tokens = count_tokens(block) + 1
+            if used + tokens > max_tokens:
+                if not block.startswith('#'):
+                    kept.append(_cut_block(block, max_tokens - used))
+                break
+            kept.append(block)
+            used += tokens
+
+    return '\n\n'.join(kept + [TRUNCATION_NOTE])
+
+
+def html_to_markdown(elements: Iterable[Tag], max_tokens: Optional[int] = None, heading_offset: int = 2) -> str:
+    """Compact Markdown for the given elements, truncated at a section boundary within max_tokens"""
+    return truncate_blocks(MarkdownConverter(heading_offset).iter_blocks(elements), max_tokens)
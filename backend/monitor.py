@@ -1,37 +1,168 @@
 import asyncio
 import hashlib
 import json
+import os
+import socket
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from pathlib import Path
 
 import aiohttp
-from main import WebsiteCrawler, LLMSTxtGenerator
+from main import WebsiteCrawler, LLMSTxtGenerator, store_artifacts
+from adaptive_interval import change_rate, next_interval, record_check
+from change_probe import ChangeProbe, build_baseline
+from content_tree import build_tree, diff_trees
+from monitor_config import (MONITOR_DB_PATH, MONITOR_JITTER_FRACTION, MONITOR_WORKERS, MONITOR_SITE_TIMEOUT_SECONDS,
+                            MONITOR_CONNECTION_BUDGET, MONITOR_CHANGE_PROBES, MONITOR_PROBE_PAGES,
+                            MONITOR_QUEUE_BACKEND, MONITOR_QUEUE_REDIS_URL, MONITOR_LEASE_SECONDS,
+                            MONITOR_ADAPTIVE_INTERVALS, MONITOR_INTERVAL_BACKOFF,
+                            MONITOR_MIN_INTERVAL_HOURS, MONITOR_MAX_INTERVAL_HOURS)
+from monitor_store import MonitorStore
+from site_pool import run_site_pool, run_site_stream
+from work_queue import create_work_queue
+
+# During a monitoring cycle, site updates are committed once this many are pending (and at the end)
+COMMIT_BATCH_SIZE = 20
+
+# A site whose check failed is retried after this long (or its interval, if shorter)
+RETRY_DELAY_SECONDS = 900
 
 class WebsiteMonitor:
-    def __init__(self, storage_path: str = "monitor_data.json"):
-        self.storage_path = Path(storage_path)
+    def __init__(self, storage_path: str = MONITOR_DB_PATH, legacy_json_path: str = "monitor_data.json", queue=None):
+        self.store = MonitorStore(storage_path)
+        # With a shared work queue, due sites are leased from it so several worker processes can split them
+        self.queue = queue
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue_seeded = False
+        self.legacy_json_path = Path(legacy_json_path)
+        self._dirty = set()
+        self._removed = set()
+        # Each record as last loaded from or written to the store; commits write only the fields that differ,
+        # so processes sharing the database do not overwrite each other's newer fields with stale ones
+        self._stored: Dict[str, Dict] = {}
+        self._flush_lock = asyncio.Lock()
+        self._cycle_running = False
+        # Set when a site is added, so start_monitoring stops sleeping and checks it right away
+        self._wakeup = asyncio.Event()
+        # Detection crawls of changed sites, kept open so regeneration continues from their frontier
+        self._detection_crawlers: Dict[str, WebsiteCrawler] = {}
         self.monitored_sites = self.load_data()
+        self.last_cycle_stats = None
     
     def load_data(self) -> Dict:
-        """Load monitoring data from storage"""
-        if self.storage_path.exists():
+        """Load monitoring data from storage, migrating an existing JSON file on first use"""
+        try:
+            sites = self.store.load_all()
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return {}
+        
+        if not sites and self.legacy_json_path.exists():
             try:
-                with open(self.storage_path, 'r') as f:
-                    return json.load(f)
+                with open(self.legacy_json_path, 'r') as f:
+                    sites = json.load(f)
+                self.store.write_batch({url: self._row(data) for url, data in sites.items()})
+                self.legacy_json_path.rename(self.legacy_json_path.with_name(self.legacy_json_path.name + '.migrated'))
+                print(f"📦 Migrated {len(sites)} sites from {self.legacy_json_path} to {self.store.path}")
             except Exception as e:
-                print(f"Error loading data: {e}")
-        return {}
+                print(f"Error migrating {self.legacy_json_path}: {e}")
+        self._stored = {url: self._snapshot(data) for url, data in sites.items()}
+        return sites
+    
+    @staticmethod
+    def _jitter_seconds(url: str, interval_seconds: float) -> float:
+        """Stable per-site offset within ±MONITOR_JITTER_FRACTION/2 of the interval"""
+        # Derived from the URL rather than random, so restarts do not move a site's slot
+        position = int(hashlib.md5(url.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return (position - 0.5) * interval_seconds * MONITOR_JITTER_FRACTION
+    
+    def _next_check_at(self, site_data: Dict) -> float:
+        """Unix time a site is next due; sites with equal intervals are spread by their jitter"""
+        retry_at = site_data.get('retry_at') or 0.0
+        if not site_data.get('last_check'):
+            return retry_at
+        interval_seconds = self._interval_seconds(site_data)
+        last_check = datetime.fromisoformat(site_data['last_check']).timestamp()
+        return max(last_check + interval_seconds + self._jitter_seconds(site_data['url'], interval_seconds), retry_at)
+    
+    @staticmethod
+    def _interval_seconds(site_data: Dict) -> float:
+        """The site's adapted interval, or the configured one until a check has adapted it"""
+        return (site_data.get('interval_hours') or site_data['check_interval_hours']) * 3600
+    
+    def _adapt_interval(self, site_data: Dict, changed: bool):
+        """Record a completed check and back the interval off (no change) or tighten it (change)"""
+        site_data['check_history'] = record_check(site_data.get('check_history'), time.time(), changed)
+        if MONITOR_ADAPTIVE_INTERVALS:
+            interval_seconds = next_interval(self._interval_seconds(site_data), changed,
+                                             MONITOR_MIN_INTERVAL_HOURS * 3600, MONITOR_MAX_INTERVAL_HOURS * 3600,
+                                             MONITOR_INTERVAL_BACKOFF)
+            site_data['interval_hours'] = round(interval_seconds / 3600, 3)
+    
+    def _row(self, site_data: Dict):
+        return json.dumps(site_data, default=str), self._next_check_at(site_data)
+    
+    @staticmethod
+    def _snapshot(site_data: Dict) -> Dict:
+        return json.loads(json.dumps(site_data, default=str))
+    
+    def _adopt(self, records: Dict[str, Dict]):
+        """Use freshly loaded stored records as the in-memory ones"""
+        self.monitored_sites.update(records)
+        self._stored.update((url, self._snapshot(data)) for url, data in records.items())
+    
+    def mark_dirty(self, url: str):
+        """Queue a site's record for the next commit"""
+        self._dirty.add(url)
+    
+    def _take_pending(self, urls: Optional[List[str]] = None):
+        # Serialized on the caller's thread, so the commit sees a consistent snapshot of each record
+        taken = self._dirty if urls is None else self._dirty.intersection(urls)
+        patches = {}
+        for url in taken:
+            if url not in self.monitored_sites:
+                continue
+            record = self._snapshot(self.monitored_sites[url])
+            stored = self._stored.get(url, {})
+            changed = {key: value for key, value in record.items() if key not in stored or stored[key] != value}
+            removed = [key for key in stored if key not in record]
+            if changed or removed or url not in self._stored:
+                patches[url] = (record, changed, removed)
+        deletes, self._dirty, self._removed = self._removed, self._dirty - taken, set()
+        return patches, deletes
+    
+    def _committed(self, patches: Dict, deletes):
+        for url, (record, _, _) in patches.items():
+            self._stored[url] = record
+        for url in deletes:
+            self._stored.pop(url, None)
     
     def save_data(self):
-        """Save monitoring data to storage"""
+        """Commit pending site updates (blocking; use flush() from async code)"""
         try:
-            with open(self.storage_path, 'w') as f:
-                json.dump(self.monitored_sites, f, indent=2, default=str)
+            patches, deletes = self._take_pending()
+            self.store.merge_batch(patches, deletes, self._next_check_at)
+            self._committed(patches, deletes)
         except Exception as e:
             print(f"Error saving data: {e}")
     
+    async def flush(self, urls: Optional[List[str]] = None):
+        """Commit pending site updates (of the given sites only, if passed) in one transaction on a worker thread"""
+        async with self._flush_lock:
+            try:
+                patches, deletes = self._take_pending(urls)
+                await asyncio.to_thread(self.store.merge_batch, patches, deletes, self._next_check_at)
+                self._committed(patches, deletes)
+            except Exception as e:
+                print(f"Error saving data: {e}")
+    
+    async def _persist(self):
+        # Outside a cycle every change is committed right away; within one, in batches. Queue cycles
+        # commit each site only when it is done, after checking the lease is still held
+        if not self._cycle_running or (self.queue is None and len(self._dirty) >= COMMIT_BATCH_SIZE):
+            await self.flush()
+    
     def add_site(self, url: str, check_interval_hours: int = 24):
         """Add a site to monitoring"""
         self.monitored_sites[url] = {
@@ -42,149 +173,329 @@ class WebsiteMonitor:
             'last_generated': None,
             'change_detected': False
         }
+        self.mark_dirty(url)
         self.save_data()
+        if self.queue is not None:
+            self.queue.enqueue(url)
+        self._wakeup.set()
     
     def remove_site(self, url: str):
         """Remove a site from monitoring"""
         if url in self.monitored_sites:
             del self.monitored_sites[url]
+            self._dirty.discard(url)
+            self._removed.add(url)
             self.save_data()
+        if self.queue is not None:
+            self.queue.remove(url)
     
-    async def generate_content_hash(self, url: str) -> Optional[str]:
-        """Generate a hash of the website's key content"""
+    async def generate_content_tree(self, url: str, connection_limit: Optional[int] = None,
+                                    crawler: Optional[WebsiteCrawler] = None) -> Optional[Dict]:
+        """Per-page content digests of the site's key pages, combined by section (a passed-in crawler is left open)"""
         try:
-            crawler = WebsiteCrawler(url, max_pages=10, depth_limit=2)
-            pages_data = await crawler.crawl()
+            # Only fetching is needed for the digests; the AI analysis steps run when regenerating
+            keep_session = crawler is not None
+            crawler = crawler or WebsiteCrawler(url, max_pages=10, depth_limit=2, connection_limit=connection_limit)
+            await crawler.fetch_pages(keep_session=keep_session)
+            pages_data = crawler.unique_pages()
             
             if not pages_data:
                 return None
             
-            # Create a hash from key content elements
-            content_elements = []
-            for page in pages_data:
-                content_elements.append(f"{page['title']}|{page['url']}|{len(page['content'])}")
-            
-            content_string = "||".join(sorted(content_elements))
-            return hashlib.md5(content_string.encode()).hexdigest()
+            return build_tree(pages_data)
         
         except Exception as e:
-            print(f"Error generating hash for {url}: {e}")
+            print(f"Error generating content digests for {url}: {e}")
             return None
     
-    async def check_site_changes(self, url: str) -> bool:
+    async def check_site_changes(self, url: str, connection_limit: Optional[int] = None) -> bool:
         """Check if a site has changed since last check"""
         if url not in self.monitored_sites:
             return False
         
         site_data = self.monitored_sites[url]
-        current_hash = await self.generate_content_hash(url)
         
-        if current_hash is None:
+        # Cheap probes first; the crawl only runs if one of them reports (or cannot rule out) a change
+        probe = None
+        if MONITOR_CHANGE_PROBES:
+            baseline = site_data.get('probe_baseline') if site_data['last_hash'] else None
+            probe = await ChangeProbe(url, connection_limit=connection_limit).run(baseline)
+            site_data['last_probe'] = {key: probe[key] for key in ('outcome', 'reason', 'requests', 'checked_at')}
+            print(f"🛰️  Probe for {url}: {probe['outcome']} - {probe['reason']} ({probe['requests']} requests)")
+            
+            if probe['outcome'] == 'unchanged':
+                site_data['last_check'] = datetime.now().isoformat()
+                site_data['change_detected'] = False
+                self._adapt_interval(site_data, False)
+                site_data.pop('retry_at', None)
+                self.mark_dirty(url)
+                await self._persist()
+                return False
+        
+        crawler = WebsiteCrawler(url, max_pages=10, depth_limit=2, connection_limit=connection_limit)
+        current_tree = await self.generate_content_tree(url, crawler=crawler)
+        
+        if current_tree is None:
+            await crawler.close()
             return False
+        current_hash = current_tree['root']
+        previous_tree = site_data.get('content_tree')
         
         # Update check time
         site_data['last_check'] = datetime.now().isoformat()
+        site_data.pop('retry_at', None)
+        if probe is not None:
+            site_data['probe_baseline'] = build_baseline(probe['sitemap'], crawler.unique_pages(), MONITOR_PROBE_PAGES)
         
         # Check for changes
-        if site_data['last_hash'] is None:
-            # First check
+        if site_data['last_hash'] is None or previous_tree is None:
+            # First check (or a hash from before per-page digests, which cannot be diffed)
             site_data['last_hash'] = current_hash
+            site_data['content_tree'] = current_tree
             site_data['change_detected'] = False
         elif site_data['last_hash'] != current_hash:
             # Change detected
+            changes = diff_trees(previous_tree, current_tree)
             site_data['last_hash'] = current_hash
+            site_data['content_tree'] = current_tree
+            site_data['last_changes'] = {**changes, 'detected_at': site_data['last_check']}
             site_data['change_detected'] = True
-            print(f"🔄 Change detected for {url}")
-            self.save_data()
+            self._adapt_interval(site_data, True)
+            print(f"🔄 Change detected for {url}: {len(changes['new_pages'])} new, "
+                  f"{len(changes['removed_pages'])} removed, {len(changes['modified_pages'])} modified pages "
+                  f"in {', '.join(changes['changed_sections'])}")
+            self._detection_crawlers[url] = crawler
+            self.mark_dirty(url)
+            await self._persist()
             return True
         else:
             site_data['change_detected'] = False
+            self._adapt_interval(site_data, False)
         
-        self.save_data()
+        await crawler.close()
+        self.mark_dirty(url)
+        await self._persist()
         return False
     
-    async def update_llms_txt(self, url: str) -> Optional[Dict]:
+    async def update_llms_txt(self, url: str, connection_limit: Optional[int] = None) -> Optional[Dict]:
         """Generate updated llms.txt files for a site"""
+        # After a detected change, the detection crawl is extended instead of starting over
+        crawler = self._detection_crawlers.pop(url, None)
         try:
-            crawler = WebsiteCrawler(url, max_pages=20, depth_limit=3)
-            pages_data = await crawler.crawl()
+            if crawler is None:
+                crawler = WebsiteCrawler(url, max_pages=20, depth_limit=3, connection_limit=connection_limit)
+            pages_data = await crawler.crawl(max_pages=20, depth_limit=3)
             
             if not pages_data:
                 return None
             
-            generator = LLMSTxtGenerator(url, pages_data)
-            llms_txt = generator.generate_llms_txt()
-            llms_full_txt = generator.generate_llms_full_txt()
+            # Sections whose pages are unchanged since the last generation are reused as-is
+            previous_sections = self.monitored_sites.get(url, {}).get('llms_txt_sections')
+            generator = LLMSTxtGenerator(url, pages_data, previous_sections=previous_sections)
+            # Generation makes blocking OpenAI calls, so it runs off the event loop where the site timeout can fire
+            llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
+            llms_full_txt = await asyncio.to_thread(generator.generate_llms_full_txt)
+            await store_artifacts(url, {'llms.txt': llms_txt, 'llms-full.txt': llms_full_txt})
             
             # Update last generated time
             if url in self.monitored_sites:
                 self.monitored_sites[url]['last_generated'] = datetime.now().isoformat()
                 self.monitored_sites[url]['change_detected'] = False
-                self.save_data()
+                self.monitored_sites[url]['llms_txt_sections'] = generator.section_state
+                self.mark_dirty(url)
+                await self._persist()
             
             return {
                 'url': url,
                 'llms_txt': llms_txt,
                 'llms_full_txt': llms_full_txt,
                 'pages_count': len(pages_data),
+                'pages_fetched': len(crawler.visited_urls),
+                'sections_reused': generator.sections_reused,
+                'sections_rendered': generator.sections_rendered,
                 'generated_at': datetime.now().isoformat()
             }
         
         except Exception as e:
             print(f"Error updating llms.txt for {url}: {e}")
             return None
+        
+        finally:
+            if crawler is not None:
+                await crawler.close()
     
     def should_check_site(self, url: str) -> bool:
         """Check if it's time to check a site for updates"""
         if url not in self.monitored_sites:
             return False
         
-        site_data = self.monitored_sites[url]
-        if site_data['last_check'] is None:
-            return True
-        
-        last_check = datetime.fromisoformat(site_data['last_check'])
-        check_interval = timedelta(hours=site_data['check_interval_hours'])
-        
-        return datetime.now() - last_check >= check_interval
+        return self._next_check_at(self.monitored_sites[url]) <= time.time()
+    
+    async def process_site(self, url: str, connection_limit: Optional[int] = None) -> Dict:
+        """Check one site and regenerate its llms.txt if it changed"""
+        print(f"🔎 Checking {url}...")
+        try:
+            changed = await self.check_site_changes(url, connection_limit)
+            
+            if not changed:
+                print(f"✅ No changes detected for {url}")
+                return {'url': url, 'status': 'unchanged'}
+            
+            print(f"📝 Updating llms.txt for {url}...")
+            result = await self.update_llms_txt(url, connection_limit)
+            if result:
+                print(f"✅ Updated llms.txt for {url}")
+                # Here you could send notifications, save files, etc.
+                return {'url': url, 'status': 'updated', 'pages_count': result['pages_count'],
+                        'pages_fetched': result['pages_fetched']}
+            
+            print(f"❌ Failed to update llms.txt for {url}")
+            return {'url': url, 'status': 'error', 'message': 'Failed to update llms.txt'}
+        finally:
+            # A timeout can cancel between detection and regeneration; do not leak the open crawl
+            crawler = self._detection_crawlers.pop(url, None)
+            if crawler is not None:
+                await crawler.close()
     
-    async def run_monitoring_cycle(self):
-        """Run one monitoring cycle for all sites"""
+    async def run_monitoring_cycle(self, workers: int = MONITOR_WORKERS,
+                                   site_timeout: float = MONITOR_SITE_TIMEOUT_SECONDS) -> List[Dict]:
+        """Run one monitoring cycle for all due sites on a bounded pool of concurrent workers"""
         print(f"🔍 Starting monitoring cycle at {datetime.now()}")
+        if self.queue is not None:
+            return await self._run_queue_cycle(workers, site_timeout)
         
-        sites_to_check = [url for url in self.monitored_sites.keys() if self.should_check_site(url)]
+        # Due sites come from the next_check_at index instead of a scan over every record
+        await self.flush()
+        due_urls = await asyncio.to_thread(self.store.due_urls, time.time())
+        # Due records are reloaded, so sites added or checked by another process sharing the database
+        # are picked up here (without a work queue, both processes may still check the same site)
+        if due_urls:
+            self._adopt(await asyncio.to_thread(self.store.load_many, due_urls))
+        sites_to_check = [url for url in due_urls if url in self.monitored_sites]
         
         if not sites_to_check:
             print("✅ No sites need checking right now")
+            return []
+        
+        print(f"📋 Checking {len(sites_to_check)} sites on up to {workers} workers...")
+        
+        # A slow or failing site only costs its own worker slot; it is reported, not raised
+        self._cycle_running = True
+        try:
+            results, stats = await run_site_pool(
+                [(url, None) for url in sites_to_check],
+                lambda url, _, connection_limit: self.process_site(url, connection_limit),
+                workers=workers, site_timeout=site_timeout, connection_budget=MONITOR_CONNECTION_BUDGET
+            )
+        finally:
+            self._cycle_running = False
+        self.last_cycle_stats = {**stats, 'finished_at': datetime.now().isoformat()}
+        
+        for result in results:
+            self._record_result(result)
+        await self.flush()
+        
+        print(f"🏁 Monitoring cycle completed at {datetime.now()} "
+              f"({stats['cycle_seconds']:.1f}s, slowest site {stats['max_site_seconds']:.1f}s, {stats['errors']} errors)")
+        return results
+    
+    def _record_result(self, result: Dict):
+        """Store a site's check duration and error, and schedule a retry if the check did not complete"""
+        site_data = self.monitored_sites.get(result['url'])
+        if site_data is None:
             return
+        site_data['last_check_seconds'] = result['duration_seconds']
+        if result['status'] == 'error':
+            site_data['last_error'] = result.get('message')
+        else:
+            site_data.pop('last_error', None)
+        # Still due means the check never completed (crawl failed or timed out): back off instead of spinning
+        if self._next_check_at(site_data) <= time.time():
+            site_data['retry_at'] = time.time() + min(RETRY_DELAY_SECONDS, self._interval_seconds(site_data))
+        self.mark_dirty(result['url'])
+    
+    def _seed_queue(self):
+        """Queue every stored site at its next check time; sites already queued keep their schedule"""
+        for url, site_data in self.store.load_all().items():
+            self.queue.enqueue(url, self._next_check_at(site_data))
+        self._queue_seeded = True
+    
+    async def _run_queue_cycle(self, workers: int, site_timeout: float) -> List[Dict]:
+        """Lease due sites from the shared queue until none is left, acking each once its record is committed"""
+        if not self._queue_seeded:
+            await asyncio.to_thread(self._seed_queue)
         
-        print(f"📋 Checking {len(sites_to_check)} sites...")
+        async def next_site():
+            while True:
+                leases = await asyncio.to_thread(self.queue.lease, self.worker_id, 1, MONITOR_LEASE_SECONDS)
+                if not leases:
+                    return None
+                lease = leases[0]
+                # Until the ack, no other worker touches this site, so the stored record is the current one
+                records = await asyncio.to_thread(self.store.load_many, [lease.item])
+                if lease.item in records:
+                    self._adopt(records)
+                    return lease.item, lease
+                # Removed by another process after it was queued
+                self.monitored_sites.pop(lease.item, None)
+                await asyncio.to_thread(self.queue.ack, lease)
         
-        for url in sites_to_check:
-            print(f"🔎 Checking {url}...")
-            changed = await self.check_site_changes(url)
-            
-            if changed:
-                print(f"📝 Updating llms.txt for {url}...")
-                result = await self.update_llms_txt(url)
-                if result:
-                    print(f"✅ Updated llms.txt for {url}")
-                    # Here you could send notifications, save files, etc.
-                else:
-                    print(f"❌ Failed to update llms.txt for {url}")
-            else:
-                print(f"✅ No changes detected for {url}")
+        async def done(url: str, lease, result: Dict):
+            self._record_result(result)
+            # Renewed rather than just checked, so the lease cannot run out while the record is committed.
+            # A lost lease means another worker owns the site now and its record is the newer one
+            if not await asyncio.to_thread(self.queue.renew, lease, MONITOR_LEASE_SECONDS):
+                self._dirty.discard(url)
+                self._adopt(await asyncio.to_thread(self.store.load_many, [url]))
+                print(f"⚠️  Lease on {url} expired before the check finished; its result is not saved")
+                return
+            await self.flush([url])
+            site_data = self.monitored_sites.get(url)
+            requeue_at = self._next_check_at(site_data) if site_data else None
+            if not await asyncio.to_thread(self.queue.ack, lease, requeue_at):
+                print(f"⚠️  Lease on {url} was taken over while its record was saved")
+        
+        self._cycle_running = True
+        try:
+            results, stats = await run_site_stream(
+                next_site, lambda url, _, connection_limit: self.process_site(url, connection_limit), done,
+                workers=workers, site_timeout=site_timeout, connection_budget=MONITOR_CONNECTION_BUDGET
+            )
+        finally:
+            self._cycle_running = False
+        await self.flush()
         
-        print(f"🏁 Monitoring cycle completed at {datetime.now()}")
+        if not results:
+            print("✅ No sites need checking right now")
+            return []
+        
+        self.last_cycle_stats = {**stats, 'worker_id': self.worker_id, 'finished_at': datetime.now().isoformat()}
+        print(f"🏁 Monitoring cycle completed at {datetime.now()} on {self.worker_id} ({len(results)} sites, "
+              f"{stats['cycle_seconds']:.1f}s, slowest site {stats['max_site_seconds']:.1f}s, {stats['errors']} errors)")
+        return results
+    
+    async def seconds_until_next_check(self, max_wait: float) -> float:
+        """Time until the earliest due site (from the queue or the next_check_at index), capped at max_wait"""
+        next_check_at = await asyncio.to_thread(self.queue.next_visible_at if self.queue is not None else self.store.next_check_at)
+        if next_check_at is None:
+            return max_wait
+        return min(max(next_check_at - time.time(), 0.0), max_wait)
     
     async def start_monitoring(self, check_interval_minutes: int = 60):
-        """Start continuous monitoring"""
-        print(f"🚀 Starting continuous monitoring (checking every {check_interval_minutes} minutes)")
+        """Start continuous monitoring, sleeping until the next site is due or a site is added"""
+        # check_interval_minutes only caps the sleep, so sites added by other processes are noticed
+        print(f"🚀 Starting continuous monitoring (waking at least every {check_interval_minutes} minutes)")
         
         while True:
             try:
                 await self.run_monitoring_cycle()
-                await asyncio.sleep(check_interval_minutes * 60)
+                self._wakeup.clear()
+                delay = await self.seconds_until_next_check(check_interval_minutes * 60)
+                print(f"💤 Next check in {delay:.0f}s")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
             except KeyboardInterrupt:
                 print("🛑 Monitoring stopped by user")
                 break
@@ -196,13 +507,23 @@ class WebsiteMonitor:
         """Get current monitoring status"""
         return {
             'monitored_sites_count': len(self.monitored_sites),
+            'last_cycle': self.last_cycle_stats,
+            'worker_id': self.worker_id,
+            'queue': self.queue.stats() if self.queue is not None else None,
             'sites': {
                 url: {
                     'url': data['url'],
                     'check_interval_hours': data['check_interval_hours'],
+                    'interval_hours': self._interval_seconds(data) / 3600,
+                    'change_rate': change_rate(data.get('check_history')),
                     'last_check': data['last_check'],
                     'last_generated': data['last_generated'],
                     'change_detected': data['change_detected'],
+                    'last_check_seconds': data.get('last_check_seconds'),
+                    'last_error': data.get('last_error'),
+                    'last_probe': data.get('last_probe'),
+                    'last_changes': data.get('last_changes'),
+                    'next_check': datetime.fromtimestamp(self._next_check_at(data)).isoformat(),
                     'needs_check': self.should_check_site(url)
                 }
                 for url, data in self.monitored_sites.items()
@@ -213,7 +534,7 @@ class WebsiteMonitor:
 if __name__ == "__main__":
     import sys
     
-    monitor = WebsiteMonitor()
+    monitor = WebsiteMonitor(queue=create_work_queue(MONITOR_QUEUE_BACKEND, MONITOR_DB_PATH, MONITOR_QUEUE_REDIS_URL))
     
     if len(sys.argv) < 2:
         print("Usage:")
@@ -255,11 +576,18 @@ if __name__ == "__main__":
     elif command == "status":
         status = monitor.get_status()
         print(f"📊 Monitoring {status['monitored_sites_count']} sites:")
+        if status['queue']:
+            print(f"  📬 Work queue ({status['queue']['backend']}): {status['queue']['items']} sites, "
+                  f"{status['queue']['ready']} due, {status['queue']['leased']} leased")
         for url, data in status['sites'].items():
             print(f"  📍 {url}")
             print(f"    Last check: {data['last_check'] or 'Never'}")
             print(f"    Needs check: {'Yes' if data['needs_check'] else 'No'}")
+            print(f"    Interval: {data['interval_hours']:g}h (configured {data['check_interval_hours']}h, "
+                  f"change rate {data['change_rate'] if data['change_rate'] is not None else 'n/a'})")
             print(f"    Changes detected: {'Yes' if data['change_detected'] else 'No'}")
+            if data['last_probe']:
+                print(f"    Last probe: {data['last_probe']['outcome']} ({data['last_probe']['reason']})")
     
     elif command == "run":
         asyncio.run(monitor.start_monitoring())
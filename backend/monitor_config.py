@@ -0,0 +1,40 @@
+"""
+Configuration of site monitoring (monitor.py and scheduler.py), read from the environment.
+"""
+
+import os
+
+# Monitoring cycles check due sites on this many concurrent workers, each bounded by a
+# timeout and an equal share of the connection budget
+MONITOR_WORKERS = int(os.getenv('MONITOR_WORKERS', '8'))
+MONITOR_SITE_TIMEOUT_SECONDS = float(os.getenv('MONITOR_SITE_TIMEOUT_SECONDS', '300'))
+MONITOR_CONNECTION_BUDGET = int(os.getenv('MONITOR_CONNECTION_BUDGET', '32'))
+
+# Monitored sites are stored in SQLite (WAL); an existing monitor_data.json is migrated on first start
+MONITOR_DB_PATH = os.getenv('MONITOR_DB_PATH', 'monitor_data.db')
+
+# Sites with the same check interval are spread over this fraction of it, so they do not all come due together
+MONITOR_JITTER_FRACTION = float(os.getenv('MONITOR_JITTER_FRACTION', '0.1'))
+
+# Each site's check interval adapts to how often it changes: multiplied by MONITOR_INTERVAL_BACKOFF
+# after a check without changes, divided by it after a change, and kept within the bounds below
+MONITOR_ADAPTIVE_INTERVALS = os.getenv('MONITOR_ADAPTIVE_INTERVALS', 'true').lower() == 'true'
+MONITOR_INTERVAL_BACKOFF = float(os.getenv('MONITOR_INTERVAL_BACKOFF', '2'))
+MONITOR_MIN_INTERVAL_HOURS = float(os.getenv('MONITOR_MIN_INTERVAL_HOURS', '1'))
+MONITOR_MAX_INTERVAL_HOURS = float(os.getenv('MONITOR_MAX_INTERVAL_HOURS', '168'))
+
+# Several monitor processes (or hosts) share due sites through a lease-based work queue: 'sqlite'
+# (in MONITOR_DB_PATH) or 'redis' (requires the redis package). Empty keeps the single-process scheduler.
+# A leased site is handed to another worker if not acked within MONITOR_LEASE_SECONDS, which must
+# exceed MONITOR_SITE_TIMEOUT_SECONDS
+MONITOR_QUEUE_BACKEND = os.getenv('MONITOR_QUEUE_BACKEND', '')
+MONITOR_QUEUE_REDIS_URL = os.getenv('MONITOR_QUEUE_REDIS_URL', 'redis://localhost:6379/0')
+MONITOR_LEASE_SECONDS = float(os.getenv('MONITOR_LEASE_SECONDS', '900'))
+
+# Before crawling, monitoring probes the sitemap (lastmod fingerprint) and the top pages of the last
+# crawl with conditional requests, and only crawls when a probe reports a change
+MONITOR_CHANGE_PROBES = os.getenv('MONITOR_CHANGE_PROBES', 'true').lower() == 'true'
+MONITOR_PROBE_PAGES = int(os.getenv('MONITOR_PROBE_PAGES', '5'))
+
+# Page snapshots of monitored sites are kept here as compressed records named by content digest
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')
@@ -0,0 +1,108 @@
+"""
+SQLite storage for monitored sites.
+
+Each site is one row, so a check rewrites only that site's record instead of
+the whole data set. The database runs in WAL mode: readers never block the
+writer and several monitor processes can share one file. Records are stored
+as JSON next to an indexed next_check_at column, which finds due sites
+without loading every record. Pending writes are committed together in one
+transaction, and a process only writes the fields it changed, so processes
+sharing the file do not overwrite each other's newer fields with stale ones.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    next_check_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sites_next_check_at ON sites (next_check_at);
+"""
+
+
+class MonitorStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Writes run on worker threads (asyncio.to_thread), so the connection is shared across threads
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def load_all(self) -> Dict[str, Dict]:
+        """Every stored site record keyed by URL"""
+        with self._lock:
+            rows = self._conn.execute('SELECT url, data FROM sites').fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def load_many(self, urls: List[str]) -> Dict[str, Dict]:
+        """Stored records of the given URLs"""
+        placeholders = ','.join('?' * len(urls))
+        with self._lock:
+            rows = self._conn.execute(f'SELECT url, data FROM sites WHERE url IN ({placeholders})', urls).fetchall()
+        return {url: json.loads(data) for url, data in rows}
+
+    def write_batch(self, upserts: Dict[str, Tuple[str, float]], deletes: Iterable[str] = ()):
+        """Apply upserts ({url: (json data, next_check_at)}) and deletes in a single transaction"""
+        deletes = list(deletes)
+        if not upserts and not deletes:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO sites (url, data, next_check_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET data = excluded.data, next_check_at = excluded.next_check_at',
+                [(url, data, next_check_at) for url, (data, next_check_at) in upserts.items()]
+            )
+            self._conn.executemany('DELETE FROM sites WHERE url = ?', [(url,) for url in deletes])
+
+    def merge_batch(self, patches: Dict[str, Tuple[Dict, Dict, List[str]]], deletes: Iterable[str],
+                    next_check_at: Callable[[Dict], float]):
+        """
+        Apply patches ({url: (full record, changed fields, removed fields)}) and deletes in one transaction.
+        Only the changed fields are written over the stored record; a site without a row gets the full record.
+        """
+        deletes = list(deletes)
+        if not patches and not deletes:
+            return
+        with self._lock, self._conn:
+            # Taken up front, so no other process writes between reading and rewriting the records
+            self._conn.execute('BEGIN IMMEDIATE')
+            rows = []
+            for url, (record, changed, removed) in patches.items():
+                row = self._conn.execute('SELECT data FROM sites WHERE url = ?', (url,)).fetchone()
+                merged = record
+                if row is not None:
+                    merged = json.loads(row[0])
+                    merged.update(changed)
+                    for key in removed:
+                        merged.pop(key, None)
+                rows.append((url, json.dumps(merged), next_check_at(merged)))
+            self._conn.executemany(
+                'INSERT INTO sites (url, data, next_check_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET data = excluded.data, next_check_at = excluded.next_check_at', rows
+            )
+            self._conn.executemany('DELETE FROM sites WHERE url = ?', [(url,) for url in deletes])
+
+    def due_urls(self, now: float) -> List[str]:
+        """URLs of sites due at `now`, most overdue first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url FROM sites WHERE next_check_at <= ? ORDER BY next_check_at', (now,)
+            ).fetchall()
+        return [url for url, in rows]
+
+    def next_check_at(self) -> Optional[float]:
+        """Earliest next_check_at over all sites, or None without sites"""
+        with self._lock:
+            return self._conn.execute('SELECT MIN(next_check_at) FROM sites').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
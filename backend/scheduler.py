@@ -5,12 +5,25 @@ import asyncio
 import hashlib
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import os
-from main import WebsiteCrawler, LLMSTxtGenerator
+from main import WebsiteCrawler, LLMSTxtGenerator, store_artifacts
+from adaptive_interval import change_rate, next_interval, record_check
+from monitor_config import (MONITOR_WORKERS, MONITOR_SITE_TIMEOUT_SECONDS, MONITOR_CONNECTION_BUDGET,
+                            MONITOR_CHANGE_PROBES, MONITOR_PROBE_PAGES, SNAPSHOT_DIR, MONITOR_ADAPTIVE_INTERVALS,
+                            MONITOR_INTERVAL_BACKOFF, MONITOR_MIN_INTERVAL_HOURS, MONITOR_MAX_INTERVAL_HOURS)
+from change_probe import ChangeProbe, build_baseline
+from content_tree import build_tree, diff_trees
+from site_pool import run_site_pool
+from snapshot_store import SnapshotStore, tree_digests
 
 # In-memory storage for demo (in production, use a database)
+# Sites keep only content digests here; page bodies live in SNAPSHOT_STORE
 MONITORED_SITES = {}
+SNAPSHOT_STORE = SnapshotStore(SNAPSHOT_DIR)
+# Held from storing a site's snapshots until its content tree references them, and across a prune's
+# mark and sweep, so a prune never deletes snapshots that a concurrent check is about to commit
+SNAPSHOT_LOCK = asyncio.Lock()
 UPDATE_HISTORY = {}
 
 class MonitorRequest(BaseModel):
@@ -24,32 +37,18 @@ class ChangeDetector:
         pass
     
     def calculate_structure_hash(self, pages_data: List[Dict]) -> str:
-        """Calculate a hash representing the website's structure"""
-        # Create a signature based on URLs, titles, and section distribution
-        structure_signature = ""
-        
-        # Sort pages by URL for consistent hashing
-        sorted_pages = sorted(pages_data, key=lambda x: x['url'])
-        
-        for page in sorted_pages:
-            # Include URL, title, and section in the signature
-            structure_signature += f"{page['url']}|{page['title']}|{page['section']}\n"
-        
-        # Also include section distribution (how many pages in each section)
-        sections = {}
-        for page in pages_data:
-            section = page['section']
-            sections[section] = sections.get(section, 0) + 1
-        
-        section_dist = "|".join([f"{k}:{v}" for k, v in sorted(sections.items())])
-        structure_signature += f"SECTIONS:{section_dist}"
-        
-        return hashlib.md5(structure_signature.encode()).hexdigest()
+        """Calculate a hash representing the website's structure and content (the content tree root)"""
+        return self.build_content_tree(pages_data)['root']
+    
+    def build_content_tree(self, pages_data: List[Dict]) -> Dict:
+        """Per-page content digests combined by section; all that needs storing to diff the next crawl"""
+        return build_tree(pages_data)
     
-    def detect_changes(self, old_hash: str, new_hash: str, old_pages: List[Dict], new_pages: List[Dict]) -> Dict:
-        """Detect what changed between two crawls"""
+    def detect_changes(self, old_tree: Dict, new_tree: Dict, new_pages: Optional[List[Dict]] = None,
+                       load_page: Optional[Callable[[str], Optional[Dict]]] = None) -> Dict:
+        """Detect what changed between two crawls from their content trees; load_page reads old page snapshots"""
         changes = {
-            'structure_changed': old_hash != new_hash,
+            'structure_changed': old_tree['root'] != new_tree['root'],
             'new_pages': [],
             'removed_pages': [],
             'modified_pages': [],
@@ -60,31 +59,29 @@ class ChangeDetector:
         if not changes['structure_changed']:
             return changes
         
-        # Compare pages
-        old_urls = {page['url']: page for page in old_pages}
-        new_urls = {page['url']: page for page in new_pages}
+        # Only sections whose digests differ are compared page by page
+        diff = diff_trees(old_tree, new_tree)
+        changes['new_pages'] = diff['new_pages']
+        changes['removed_pages'] = diff['removed_pages']
+        changes['modified_pages'] = diff['modified_pages']
         
-        # Find new and removed pages
-        changes['new_pages'] = [url for url in new_urls if url not in old_urls]
-        changes['removed_pages'] = [url for url in old_urls if url not in new_urls]
+        for section in diff['changed_sections']:
+            old_count = len(old_tree['sections'].get(section, {}).get('pages', {}))
+            new_count = len(new_tree['sections'].get(section, {}).get('pages', {}))
+            changes['section_changes'][section] = {'old_pages': old_count, 'new_pages': new_count}
         
-        # Find modified pages (title or section changes)
-        for url in set(old_urls.keys()) & set(new_urls.keys()):
-            old_page = old_urls[url]
-            new_page = new_urls[url]
-            
-            if old_page['title'] != new_page['title'] or old_page['section'] != new_page['section']:
-                changes['modified_pages'].append({
-                    'url': url,
-                    'old_title': old_page['title'],
-                    'new_title': new_page['title'],
-                    'old_section': old_page['section'],
-                    'new_section': new_page['section']
-                })
+        # Titles of modified pages: new ones from the crawl, old ones from snapshots loaded only for these pages
+        titles = {page['url']: page['title'] for page in new_pages or []}
+        for modified in changes['modified_pages']:
+            if modified['url'] in titles:
+                modified['new_title'] = titles[modified['url']]
+            old_page = load_page(modified['old_digest']) if load_page else None
+            if old_page:
+                modified['old_title'] = old_page['title']
         
         # Calculate severity
         total_changes = len(changes['new_pages']) + len(changes['removed_pages']) + len(changes['modified_pages'])
-        total_pages = len(old_pages)
+        total_pages = old_tree['pages']
         
         if total_pages == 0:
             change_percentage = 100
@@ -102,11 +99,30 @@ class ChangeDetector:
         
         return changes
 
+def current_interval(config: Dict) -> float:
+    """Seconds between checks: the adapted interval, or the configured one until a check adapted it"""
+    return config.get('current_interval') or config.get('check_interval', 86400)  # 24 hours default
+
+def adapt_interval(config: Dict, changed: bool):
+    """Record a completed check and back the interval off (no change) or tighten it (change)"""
+    config['check_history'] = record_check(config.get('check_history'), time.time(), changed)
+    if MONITOR_ADAPTIVE_INTERVALS:
+        config['current_interval'] = next_interval(current_interval(config), changed,
+                                                   MONITOR_MIN_INTERVAL_HOURS * 3600, MONITOR_MAX_INTERVAL_HOURS * 3600,
+                                                   MONITOR_INTERVAL_BACKOFF)
+
+async def prune_snapshots() -> int:
+    """Delete the snapshots no monitored site's content tree references; returns the number deleted"""
+    async with SNAPSHOT_LOCK:
+        live_digests = tree_digests(config.get('content_tree') for config in MONITORED_SITES.values())
+        return await asyncio.to_thread(SNAPSHOT_STORE.prune, live_digests)
+
 class AutoUpdater:
     def __init__(self):
         self.change_detector = ChangeDetector()
+        self.last_cycle_stats = None
     
-    async def check_site_for_updates(self, site_config: Dict) -> Dict:
+    async def check_site_for_updates(self, site_config: Dict, connection_limit: Optional[int] = None) -> Dict:
         """Check a single site for updates"""
         url = site_config['url']
         last_hash = site_config.get('last_hash')
@@ -115,8 +131,32 @@ class AutoUpdater:
         print(f"Checking {url} for updates...")
         
         try:
+            # Cheap probes (sitemap lastmod, conditional requests) before paying for a crawl
+            probe = None
+            if MONITOR_CHANGE_PROBES:
+                probe = await ChangeProbe(url, connection_limit=connection_limit).run(
+                    site_config.get('probe_baseline') if last_hash else None
+                )
+                probe_summary = {key: probe[key] for key in ('outcome', 'reason', 'requests', 'checked_at')}
+                if url in MONITORED_SITES:
+                    MONITORED_SITES[url]['last_probe'] = probe_summary
+                
+                if probe['outcome'] == 'unchanged':
+                    print(f"No changes detected in {url} ({probe['reason']})")
+                    if url in MONITORED_SITES:
+                        MONITORED_SITES[url]['last_check'] = time.time()
+                        adapt_interval(MONITORED_SITES[url], False)
+                    return {
+                        'url': url,
+                        'status': 'checked',
+                        'timestamp': time.time(),
+                        'probe': probe_summary,
+                        'changes': None,
+                        'updated': False
+                    }
+            
             # Crawl the website
-            crawler = WebsiteCrawler(url, site_config.get('max_pages', 20))
+            crawler = WebsiteCrawler(url, site_config.get('max_pages', 20), connection_limit=connection_limit)
             pages_data = await crawler.crawl()
             
             if not pages_data:
@@ -128,7 +168,8 @@ class AutoUpdater:
                 }
             
             # Calculate new structure hash
-            new_hash = self.change_detector.calculate_structure_hash(pages_data)
+            new_tree = self.change_detector.build_content_tree(pages_data)
+            new_hash = new_tree['root']
             
             result = {
                 'url': url,
@@ -139,34 +180,43 @@ class AutoUpdater:
                 'changes': None,
                 'updated': False
             }
+            if probe is not None:
+                result['probe'] = probe_summary
             
             # Check for changes
             if last_hash and last_hash != new_hash:
-                old_pages = site_config.get('last_pages', [])
-                changes = self.change_detector.detect_changes(last_hash, new_hash, old_pages, pages_data)
+                changes = self.change_detector.detect_changes(
+                    site_config['content_tree'], new_tree, pages_data, load_page=SNAPSHOT_STORE.load
+                )
                 result['changes'] = changes
                 
                 # Decide whether to regenerate based on severity
                 should_update = changes['severity'] in ['major', 'moderate', 'minor']
                 
                 if should_update:
-                    # Regenerate llms.txt
-                    generator = LLMSTxtGenerator(url, pages_data)
-                    new_llms_txt = generator.generate_llms_txt()
+                    # Regenerate llms.txt, reusing the sections whose pages did not change
+                    generator = LLMSTxtGenerator(url, pages_data, previous_sections=site_config.get('llms_txt_sections'))
+                    new_llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
+                    await store_artifacts(url, {'llms.txt': new_llms_txt})
                     
                     result.update({
                         'updated': True,
                         'new_llms_txt': new_llms_txt,
+                        'sections_reused': generator.sections_reused,
+                        'sections_rendered': generator.sections_rendered,
                         'update_reason': f"Website structure changed ({changes['severity']} changes detected)"
                     })
                     
                     # Update stored data
-                    MONITORED_SITES[url].update({
-                        'last_hash': new_hash,
-                        'last_pages': pages_data,
-                        'last_update': time.time(),
-                        'llms_txt': new_llms_txt
-                    })
+                    async with SNAPSHOT_LOCK:
+                        await asyncio.to_thread(SNAPSHOT_STORE.put_pages, pages_data)
+                        MONITORED_SITES[url].update({
+                            'last_hash': new_hash,
+                            'content_tree': new_tree,
+                            'last_update': time.time(),
+                            'llms_txt': new_llms_txt,
+                            'llms_txt_sections': generator.section_state
+                        })
                     
                     print(f"Updated {url} - {changes['severity']} changes detected")
                 else:
@@ -175,18 +225,22 @@ class AutoUpdater:
             elif not last_hash:
                 # First time checking this site
                 generator = LLMSTxtGenerator(url, pages_data)
-                new_llms_txt = generator.generate_llms_txt()
+                new_llms_txt = await asyncio.to_thread(generator.generate_llms_txt)
+                await store_artifacts(url, {'llms.txt': new_llms_txt})
                 
-                MONITORED_SITES[url] = {
-                    'url': url,
-                    'last_hash': new_hash,
-                    'last_pages': pages_data,
-                    'last_check': time.time(),
-                    'last_update': time.time(),
-                    'llms_txt': new_llms_txt,
-                    'max_pages': site_config.get('max_pages', 20),
-                    'check_interval': site_config.get('check_interval', 86400)  # 24 hours default
-                }
+                async with SNAPSHOT_LOCK:
+                    await asyncio.to_thread(SNAPSHOT_STORE.put_pages, pages_data)
+                    MONITORED_SITES[url] = {
+                        'url': url,
+                        'last_hash': new_hash,
+                        'content_tree': new_tree,
+                        'last_check': time.time(),
+                        'last_update': time.time(),
+                        'llms_txt': new_llms_txt,
+                        'llms_txt_sections': generator.section_state,
+                        'max_pages': site_config.get('max_pages', 20),
+                        'check_interval': site_config.get('check_interval', 86400)  # 24 hours default
+                    }
                 
                 result.update({
                     'updated': True,
@@ -200,6 +254,13 @@ class AutoUpdater:
             # Update last check time
             if url in MONITORED_SITES:
                 MONITORED_SITES[url]['last_check'] = time.time()
+                if last_hash:
+                    # Only a change that moved the baseline counts: a minimal one leaves last_hash as it was,
+                    # so counting it would shorten the interval again on every later check
+                    adapt_interval(MONITORED_SITES[url], result['updated'])
+                if probe is not None:
+                    MONITORED_SITES[url]['probe_baseline'] = build_baseline(probe['sitemap'], pages_data, MONITOR_PROBE_PAGES)
+                    MONITORED_SITES[url]['last_probe'] = probe_summary
             
             return result
             
@@ -211,29 +272,48 @@ class AutoUpdater:
                 'timestamp': time.time()
             }
     
-    async def check_all_monitored_sites(self) -> List[Dict]:
-        """Check all monitored sites for updates"""
-        results = []
+    async def check_all_monitored_sites(self, workers: int = MONITOR_WORKERS,
+                                        site_timeout: float = MONITOR_SITE_TIMEOUT_SECONDS) -> List[Dict]:
+        """Check all due monitored sites for updates on a bounded pool of concurrent workers"""
+        results = {}
+        due_sites = []
         current_time = time.time()
         
-        for url, config in MONITORED_SITES.items():
+        # Snapshot first: checks may add or replace MONITORED_SITES entries while they run
+        sites = list(MONITORED_SITES.items())
+        for url, config in sites:
             last_check = config.get('last_check', 0)
-            check_interval = config.get('check_interval', 86400)  # 24 hours
+            check_interval = current_interval(config)
             
             # Check if it's time to check this site
             if current_time - last_check >= check_interval:
-                result = await self.check_site_for_updates(config)
-                results.append(result)
+                due_sites.append((url, config))
             else:
                 next_check = last_check + check_interval
-                results.append({
+                results[url] = {
                     'url': url,
                     'status': 'skipped',
                     'message': f'Next check scheduled for {datetime.fromtimestamp(next_check)}',
                     'timestamp': current_time
-                })
+                }
+        
+        if due_sites:
+            checked, self.last_cycle_stats = await run_site_pool(
+                due_sites,
+                lambda url, config, connection_limit: self.check_site_for_updates(config, connection_limit),
+                workers=workers, site_timeout=site_timeout, connection_budget=MONITOR_CONNECTION_BUDGET
+            )
+            results.update((result['url'], result) for result in checked)
+            
+            # Snapshots of pages no site references any more are removed once the cycle is done
+            pruned = await prune_snapshots()
+            if pruned:
+                print(f"Removed {pruned} unreferenced page snapshots")
+            print(f"Checked {len(due_sites)} sites in {self.last_cycle_stats['cycle_seconds']:.1f}s "
+                  f"(slowest {self.last_cycle_stats['max_site_seconds']:.1f}s, {self.last_cycle_stats['errors']} errors)")
         
-        return results
+        # Report in MONITORED_SITES order, as the sequential loop did
+        return [results[url] for url, _ in sites]
 
 # Create separate FastAPI app for scheduler
 scheduler_app = FastAPI(title="LLMs.txt Scheduler", version="1.0.0")
@@ -293,7 +373,7 @@ async def handle_scheduler_request(request: MonitorRequest):
             else:
                 # Check all sites
                 results = await updater.check_all_monitored_sites()
-                return {'checked_sites': results, 'total_sites': len(MONITORED_SITES)}
+                return {'checked_sites': results, 'total_sites': len(MONITORED_SITES), 'cycle': updater.last_cycle_stats}
         
         elif action == 'list_sites':
             # List all monitored sites
@@ -304,7 +384,10 @@ async def handle_scheduler_request(request: MonitorRequest):
                     'last_check': datetime.fromtimestamp(config.get('last_check', 0)).isoformat(),
                     'last_update': datetime.fromtimestamp(config.get('last_update', 0)).isoformat(),
                     'check_interval_hours': config.get('check_interval', 86400) / 3600,
-                    'max_pages': config.get('max_pages', 20)
+                    'current_interval_hours': current_interval(config) / 3600,
+                    'change_rate': change_rate(config.get('check_history')),
+                    'max_pages': config.get('max_pages', 20),
+                    'last_probe': config.get('last_probe')
                 })
             return {'monitored_sites': sites_info}
         
@@ -353,6 +436,7 @@ async def run_cron_job():
             'sites_checked': sites_checked,
             'updates_made': updates_made,
             'total_monitored': len(MONITORED_SITES),
+            'cycle': updater.last_cycle_stats,
             'results': results
         }
         
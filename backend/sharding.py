@@ -0,0 +1,173 @@
+"""
+Size-bounded sharding of llms-full.txt for very large sites.
+
+Pages are written straight to shard files as they are rendered, so memory is
+bounded by a single page rather than the whole document. A manifest records
+every shard with its byte size, its offset in the concatenated document and
+the byte range of each page inside the shard.
+
+Every job gets its own directory. prune_shard_jobs removes directories that
+have not been used for a while and the least recently used ones beyond a
+maximum count; reading a job's manifest or shards marks it as used.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SHARD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+SHARD_NAME_PATTERN = re.compile(r'^llms-full-\d{4}\.txt$')
+MANIFEST_NAME = 'manifest.json'
+
+
+class ShardWriter:
+    def __init__(self, output_dir: str, max_shard_bytes: int = 512 * 1024, by_section: bool = False):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_shard_bytes = max_shard_bytes
+        self.by_section = by_section
+
+        self.shards = []
+        self._file = None
+        self._hash = None
+        self._current = None
+        self._document_offset = 0
+
+    def _open_shard(self, section: Optional[str]):
+        self._close_shard()
+        name = f"llms-full-{len(self.shards) + 1:04d}.txt"
+        self._file = open(self.output_dir / name, 'wb')
+        self._hash = hashlib.sha256()
+        self._current = {
+            'name': name,
+            'bytes': 0,
+            'document_offset': self._document_offset,
+            'sections': [section] if section else [],
+            'pages': [],
+        }
+
+    def _close_shard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._current['sha256'] = self._hash.hexdigest()
+        self.shards.append(self._current)
+        self._file = None
+        self._current = None
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._hash.update(data)
+        self._current['bytes'] += len(data)
+        self._document_offset += len(data)
+
+    def write_header(self, header: str):
+        """The document header starts the first shard"""
+        if self._file is None:
+            self._open_shard(None)
+        self._write(header.encode('utf-8'))
+
+    def write_page(self, page: Dict, rendered: str):
+        data = rendered.encode('utf-8')
+        section = page.get('section')
+
+        needs_new_shard = (
+            self._file is None
+            or (self._current['pages'] and self._current['bytes'] + len(data) > self.max_shard_bytes)
+            or (self.by_section and self._current['sections'] and section not in self._current['sections'])
+        )
+        if needs_new_shard:
+            self._open_shard(section)
+        elif section and section not in self._current['sections']:
+            self._current['sections'].append(section)
+
+        self._current['pages'].append({
+            'url': page['url'],
+            'title': page['title'],
+            'section': section,
+            'offset': self._current['bytes'],
+            'length': len(data),
+        })
+        self._write(data)
+
+    def finish(self, header: str, site: str) -> Dict:
+        self._close_shard()
+        manifest = {
+            'site': site,
+            'header': header,
+            'total_bytes': self._document_offset,
+            'total_pages': sum(len(s['pages']) for s in self.shards),
+            'max_shard_bytes': self.max_shard_bytes,
+            'sharded_by': 'section' if self.by_section else 'size',
+            'shards': self.shards,
+        }
+        tmp_path = self.output_dir / (MANIFEST_NAME + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.output_dir / MANIFEST_NAME)
+        return manifest
+
+
+def write_shards(header: str, pages: Iterable[Tuple[Dict, str]], output_dir: str, site: str,
+                 max_shard_bytes: int = 512 * 1024, by_section: bool = False) -> Dict:
+    """Write a header and (page, rendered text) pairs into shards, returning the manifest"""
+    writer = ShardWriter(output_dir, max_shard_bytes=max_shard_bytes, by_section=by_section)
+    writer.write_header(header)
+    for page, rendered in pages:
+        writer.write_page(page, rendered)
+    return writer.finish(header, site)
+
+
+def load_manifest(shard_root: str, job_id: str) -> Optional[Dict]:
+    if not SHARD_ID_PATTERN.match(job_id):
+        return None
+    path = Path(shard_root) / job_id / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def shard_path(shard_root: str, job_id: str, shard_name: str) -> Optional[Path]:
+    """Resolve a shard file, rejecting anything that is not a plain shard name"""
+    if not SHARD_ID_PATTERN.match(job_id) or not SHARD_NAME_PATTERN.match(shard_name):
+        return None
+    path = Path(shard_root) / job_id / shard_name
+    return path if path.exists() else None
+
+
+def mark_job_used(shard_root: str, job_id: str):
+    """Bump a job directory's mtime, which prune_shard_jobs treats as its last use"""
+    if SHARD_ID_PATTERN.match(job_id):
+        try:
+            os.utime(Path(shard_root) / job_id)
+        except FileNotFoundError:
+            pass
+
+
+def prune_shard_jobs(shard_root: str, ttl_seconds: float, max_jobs: int, keep: Iterable[str] = ()) -> List[str]:
+    """Delete job directories unused for ttl_seconds, then the least recently used beyond max_jobs; returns their ids"""
+    root = Path(shard_root)
+    if not root.is_dir():
+        return []
+    keep = set(keep)
+    jobs = []
+    for path in root.iterdir():
+        if path.is_dir() and SHARD_ID_PATTERN.match(path.name) and path.name not in keep:
+            try:
+                jobs.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+    jobs.sort(reverse=True)
+
+    cutoff = time.time() - ttl_seconds
+    room = max(0, max_jobs - len(keep))
+    expired = [path for index, (mtime, path) in enumerate(jobs) if mtime < cutoff or index >= room]
+    for path in expired:
+        shutil.rmtree(path, ignore_errors=True)
+    return [path.name for path in expired]
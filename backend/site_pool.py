@@ -0,0 +1,110 @@
+"""
+Bounded concurrent processing of monitored sites.
+
+A monitoring cycle hands its due sites to a fixed number of workers. Each
+site runs under its own timeout, failures are turned into per-site error
+results instead of aborting the cycle, and every worker's crawler gets an
+equal share of a global connection budget.
+
+run_site_stream is the same pool fed from a work queue: workers keep pulling
+sites until the queue has nothing due, so several processes can share one
+queue.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+def connection_share(workers: int, connection_budget: int) -> int:
+    """Connections each concurrently processed site may open"""
+    return max(1, connection_budget // max(1, workers))
+
+
+async def _timed_check(url: str, item: Any, check: Callable[[str, Any, int], Awaitable[Dict]],
+                       connection_limit: int, site_timeout: float) -> Dict:
+    """
+    check() under the site timeout; timeouts and exceptions become an error result.
+    The timeout cancels check() at its next await, so blocking work inside it must run
+    in asyncio.to_thread; such a thread finishes in the background after a timeout.
+    """
+    started = time.monotonic()
+    try:
+        result = await asyncio.wait_for(check(url, item, connection_limit), timeout=site_timeout)
+    except asyncio.TimeoutError:
+        print(f"⏱️  {url} timed out after {site_timeout:g}s")
+        result = {'url': url, 'status': 'error', 'message': f'Timed out after {site_timeout:g}s', 'timestamp': time.time()}
+    except Exception as e:
+        print(f"❌ Error checking {url}: {e}")
+        result = {'url': url, 'status': 'error', 'message': str(e), 'timestamp': time.time()}
+    result['duration_seconds'] = round(time.monotonic() - started, 3)
+    return result
+
+
+def _cycle_stats(results: List[Dict], workers: int, connection_limit: int, site_timeout: float, cycle_seconds: float) -> Dict:
+    durations = [r['duration_seconds'] for r in results]
+    return {
+        'sites': len(results),
+        'workers': workers,
+        'connections_per_site': connection_limit,
+        'site_timeout_seconds': site_timeout,
+        'cycle_seconds': round(cycle_seconds, 3),
+        'avg_site_seconds': round(sum(durations) / len(durations), 3) if durations else 0.0,
+        'max_site_seconds': max(durations, default=0.0),
+        'errors': len([r for r in results if r.get('status') == 'error']),
+        'timeouts': len([r for r in results if r.get('message', '').startswith('Timed out')]),
+    }
+
+
+async def run_site_pool(sites: List[Tuple[str, Any]], check: Callable[[str, Any, int], Awaitable[Dict]],
+                        workers: int, site_timeout: float, connection_budget: int) -> Tuple[List[Dict], Dict]:
+    """
+    Run check(url, item, connection_limit) for every (url, item) with at most `workers` at a time.
+    Returns the per-site results in input order (each with duration_seconds) and cycle statistics.
+    """
+    workers = max(1, min(workers, len(sites)))
+    connection_limit = connection_share(workers, connection_budget)
+    results: List[Dict] = [None] * len(sites)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, site in enumerate(sites):
+        queue.put_nowait((index, site))
+
+    async def worker():
+        while True:
+            try:
+                index, (url, item) = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[index] = await _timed_check(url, item, check, connection_limit, site_timeout)
+
+    cycle_started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results, _cycle_stats(results, workers, connection_limit, site_timeout, time.monotonic() - cycle_started)
+
+
+async def run_site_stream(next_site: Callable[[], Awaitable[Optional[Tuple[str, Any]]]],
+                          check: Callable[[str, Any, int], Awaitable[Dict]],
+                          done: Callable[[str, Any, Dict], Awaitable[None]],
+                          workers: int, site_timeout: float, connection_budget: int) -> Tuple[List[Dict], Dict]:
+    """
+    Like run_site_pool, but each worker pulls its next (url, item) from next_site() until it returns None,
+    and done(url, item, result) runs after every check, outside the site timeout (e.g. to ack a lease).
+    Results are in completion order.
+    """
+    workers = max(1, workers)
+    connection_limit = connection_share(workers, connection_budget)
+    results: List[Dict] = []
+
+    async def worker():
+        while True:
+            site = await next_site()
+            if site is None:
+                return
+            url, item = site
+            result = await _timed_check(url, item, check, connection_limit, site_timeout)
+            await done(url, item, result)
+            results.append(result)
+
+    cycle_started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results, _cycle_stats(results, workers, connection_limit, site_timeout, time.monotonic() - cycle_started)
@@ -0,0 +1,70 @@
+"""
+Compressed, content-addressed page snapshots for monitored sites.
+
+A page's title, description and text are stored once on disk as a gzip'd
+JSON record named after the page's content digest (see content_tree). The
+monitored-site state keeps only the content tree, which maps URLs to
+digests. Unchanged pages cost nothing to snapshot again, and page bodies
+are read back only when a diff needs them.
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from content_tree import page_digest
+
+SNAPSHOT_FIELDS = ('title', 'description', 'content')
+
+
+class SnapshotStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json.gz"
+
+    def put_pages(self, pages: List[Dict]) -> int:
+        """Store every page not stored yet; returns the number of records written"""
+        written = 0
+        for page in pages:
+            path = self._path(page_digest(page))
+            if path.exists():
+                continue
+            record = {field: page.get(field) or '' for field in SNAPSHOT_FIELDS}
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(json.dumps(record, ensure_ascii=False).encode('utf-8'), mtime=0))
+            os.replace(tmp_path, path)
+            written += 1
+        return written
+
+    def load(self, digest: str) -> Optional[Dict]:
+        """The stored title, description and content for a page digest, or None if it was never stored"""
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            return json.loads(gzip.decompress(f.read()))
+
+    def prune(self, live_digests: Set[str]) -> int:
+        """Delete records no content tree references any more; returns the number deleted"""
+        deleted = 0
+        for path in self.root.glob('*/*.json.gz'):
+            if path.name[:-len('.json.gz')] not in live_digests:
+                path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+
+def tree_digests(trees: Iterable[Optional[Dict]]) -> Set[str]:
+    """Every page digest referenced by the given content trees"""
+    return {
+        digest
+        for tree in trees if tree
+        for section in tree['sections'].values()
+        for digest in section['pages'].values()
+    }
@@ -0,0 +1,164 @@
+"""
+Local extractive summarizer for page descriptions and the site summary.
+
+TextRank over sentences: every page's candidate sentences are embedded in one
+shared TF-IDF matrix, per-page cosine similarity graphs are stacked into a
+padded tensor and all pages are ranked together by a batched power iteration.
+A mild lead bias favours sentences near the top of the page, where pages
+usually say what they are about.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from classifier import TfidfMatrix, tokenize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-ZÄÖÜ0-9"“(])')
+BOILERPLATE_PREFIXES = ('©', 'copyright', 'all rights', 'cookie', 'we use cookies', 'skip to', 'click here', 'read more')
+
+
+def is_available() -> bool:
+    """Return True if NumPy is installed and local summarization can run"""
+    return np is not None
+
+
+def split_sentences(text: str, max_chars: int = 6000, max_sentences: int = 20,
+                    min_chars: int = 40, max_sentence_chars: int = 300) -> List[str]:
+    """Candidate sentences from the start of a text, skipping fragments and boilerplate"""
+    sentences = []
+    for raw in SENTENCE_SPLIT.split(text[:max_chars]):
+        sentence = raw.strip()
+        if not (min_chars <= len(sentence) <= max_sentence_chars):
+            continue
+        if sentence.lower().startswith(BOILERPLATE_PREFIXES) or len(sentence.split()) < 6:
+            continue
+        if sentence[-1] not in '.!?':
+            continue
+        sentences.append(sentence)
+        if len(sentences) >= max_sentences:
+            break
+    return sentences
+
+
+class TextRankSummarizer:
+    def __init__(self, damping: float = 0.85, iterations: int = 30, lead_bias: float = 0.3):
+        self.damping = damping
+        self.iterations = iterations
+        self.lead_bias = lead_bias
+
+    def rank(self, documents: List[List[str]], batch_size: int = 256) -> List[List[float]]:
+        """TextRank score of every sentence; documents are ranked together in padded batches"""
+        if not documents:
+            return []
+
+        flat = [tokenize(sentence) for doc in documents for sentence in doc]
+        if not flat:
+            return [[] for _ in documents]
+        matrix = TfidfMatrix(flat)
+
+        lengths = np.array([len(d) for d in documents])
+        row_starts = np.concatenate(([0], np.cumsum(lengths)))
+        # COO entries are ordered by sentence, so each document owns a contiguous slice
+        entry_bounds = np.searchsorted(matrix.rows, row_starts)
+
+        ranked = []
+        for batch_start in range(0, len(documents), batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, len(documents)))
+            ranked.extend(self._rank_batch(matrix, lengths, row_starts, entry_bounds, batch))
+        return ranked
+
+    def _rank_batch(self, matrix: TfidfMatrix, lengths, row_starts, entry_bounds, batch: range) -> List[List[float]]:
+        batch_lengths = lengths[batch.start:batch.stop]
+        max_len = int(batch_lengths.max()) if len(batch_lengths) else 0
+        if max_len == 0:
+            return [[] for _ in batch]
+
+        # Scatter the batch's TF-IDF entries into a dense (document, sentence, local term) tensor,
+        # where local terms are numbered per document so the tensor stays small
+        lo, hi = entry_bounds[batch.start], entry_bounds[batch.stop]
+        entry_rows = matrix.rows[lo:hi]
+        entry_docs = np.searchsorted(row_starts, entry_rows, side='right') - 1
+        doc_terms, local_terms = np.unique(entry_docs * matrix.n_features + matrix.cols[lo:hi], return_inverse=True)
+        doc_term_starts = np.searchsorted(doc_terms // matrix.n_features, np.arange(batch.start, batch.stop))
+        local_terms = local_terms.ravel() - doc_term_starts[entry_docs - batch.start]
+        vocab_size = int(local_terms.max()) + 1 if len(local_terms) else 1
+
+        dense = np.zeros((len(batch), max_len, vocab_size))
+        dense[entry_docs - batch.start, entry_rows - row_starts[entry_docs], local_terms] = matrix.values[lo:hi]
+        similarity = dense @ dense.transpose(0, 2, 1)
+
+        positions = np.arange(max_len)
+        similarity[:, positions, positions] = 0.0
+
+        # Row-normalized transitions; isolated sentences keep their prior
+        out_weight = similarity.sum(axis=2, keepdims=True)
+        out_weight[out_weight == 0] = 1.0
+        transition = similarity / out_weight
+
+        mask = positions[None, :] < batch_lengths[:, None]
+        prior = np.where(mask, 1.0 / (1.0 + self.lead_bias * positions[None, :]), 0.0)
+        prior /= np.maximum(prior.sum(axis=1, keepdims=True), 1e-12)
+
+        scores = prior.copy()
+        for _ in range(self.iterations):
+            scores = (1 - self.damping) * prior + self.damping * np.einsum('dij,di->dj', transition, scores)
+
+        return [scores[b, :batch_lengths[b]].tolist() for b in range(len(batch))]
+
+    def summarize(self, documents: List[List[str]], max_sentences: int = 2, max_chars: int = 220) -> List[str]:
+        """Top sentences of each document in their original order, limited to max_chars"""
+        summaries = []
+        for sentences, scores in zip(documents, self.rank(documents)):
+            if not sentences:
+                summaries.append('')
+                continue
+            top = sorted(sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)[:max_sentences])
+            summary = ''
+            for i in top:
+                candidate = f"{summary} {sentences[i]}".strip()
+                if len(candidate) > max_chars and summary:
+                    break
+                summary = candidate
+            summaries.append(_truncate(summary, max_chars))
+        return summaries
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(' ', 1)[0].rstrip(',;:-')
+    return cut + '...'
+
+
+def summarize_pages(pages: List[Dict], max_sentences: int = 2, max_chars: int = 220) -> Dict[str, str]:
+    """Extractive description for every page with usable content, keyed by URL"""
+    if np is None:
+        return {}
+    documents = [split_sentences(page.get('content') or '') for page in pages]
+    summaries = TextRankSummarizer().summarize(documents, max_sentences=max_sentences, max_chars=max_chars)
+    return {page['url']: summary for page, summary in zip(pages, summaries) if summary}
+
+
+def summarize_site(pages: List[Dict], top_pages: int = 10, max_sentences: int = 2, max_chars: int = 320) -> Optional[str]:
+    """Site summary: the most central sentences across the top pages' content and meta descriptions"""
+    if np is None:
+        return None
+    sentences, seen = [], set()
+    for page in pages[:top_pages]:
+        candidates = split_sentences(page.get('description') or '', max_sentences=2)
+        candidates += split_sentences(page.get('content') or '', max_sentences=10)
+        for sentence in candidates:
+            key = sentence.lower()
+            if key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    if len(sentences) < 2:
+        return sentences[0] if sentences else None
+    # One document: sentences that echo what the other top pages say rank highest
+    summary = TextRankSummarizer(lead_bias=0.05).summarize([sentences], max_sentences=max_sentences, max_chars=max_chars)[0]
+    return summary or None
@@ -0,0 +1,24 @@
+from adaptive_interval import HISTORY_SIZE, change_rate, next_interval, record_check
+
+
+def test_interval_backs_off_without_changes_and_tightens_after_one():
+    assert next_interval(3600, False, 600, 86400, 2) == 7200
+    assert next_interval(3600, True, 600, 86400, 2) == 1800
+
+
+def test_interval_stays_within_bounds():
+    assert next_interval(80000, False, 600, 86400, 2) == 86400
+    assert next_interval(1000, True, 600, 86400, 2) == 600
+
+
+def test_history_keeps_the_most_recent_checks():
+    history = None
+    for i in range(HISTORY_SIZE + 5):
+        history = record_check(history, float(i), i % 2 == 0)
+    assert len(history) == HISTORY_SIZE
+    assert history[0][0] == 5.0
+
+
+def test_change_rate():
+    assert change_rate(None) is None
+    assert change_rate([[0, True], [1, False], [2, False], [3, True]]) == 0.5
@@ -0,0 +1,66 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from artifact_store import choose_encoding, create_artifact_store, etag_for
+
+
+@pytest.fixture
+def store(tmp_path):
+    return create_artifact_store('local', str(tmp_path))
+
+
+def test_save_stores_compressed_variants_and_skips_unchanged_content(store):
+    meta = store.save('https://docs.example.com/start', 'llms.txt', '# Example\n')
+    assert meta['domain'] == 'docs.example.com'
+    assert gzip.decompress(store.read(meta, 'gzip')) == b'# Example\n'
+    assert store.save('https://docs.example.com/', 'llms.txt', '# Example\n')['stored_at'] == meta['stored_at']
+
+
+def test_replaced_version_stays_readable_until_the_next_save(store):
+    first = store.save('https://example.com', 'llms.txt', 'first')
+    second = store.save('https://example.com', 'llms.txt', 'second')
+    assert store.read(first) == b'first'
+    store.save('https://example.com', 'llms.txt', 'third')
+    assert store.read(first) is None
+    assert store.read(second) == b'second'
+
+
+def test_save_rejects_unknown_artifacts(store):
+    with pytest.raises(ValueError):
+        store.save('https://example.com', '../secrets.txt', 'x')
+
+
+def test_choose_encoding_prefers_the_best_accepted_variant():
+    meta = {'encodings': {'identity': 10, 'gzip': 8, 'br': 6}}
+    assert choose_encoding(meta, 'gzip, deflate, br') == 'br'
+    assert choose_encoding(meta, 'gzip, br;q=0') == 'gzip'
+    assert choose_encoding(meta, None) == 'identity'
+    assert choose_encoding({'encodings': {'identity': 10, 'gzip': 8}}, '*') == 'gzip'
+
+
+def test_etag_differs_per_encoding():
+    meta = {'sha256': 'a' * 64}
+    assert etag_for(meta) != etag_for(meta, 'gzip')
+
+
+def test_endpoint_revalidates_with_etag(store, monkeypatch):
+    monkeypatch.setattr(main, 'ARTIFACT_STORE', store)
+    store.save('https://example.com', 'llms.txt', '# Example\n' * 50)
+    client = TestClient(main.app)
+
+    response = client.get('/artifacts/example.com/llms.txt', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.text == '# Example\n' * 50
+    etag = response.headers['etag']
+
+    revalidated = client.get('/artifacts/example.com/llms.txt', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['etag'] == etag
+
+    # Any stored variant's ETag matches the same content
+    assert client.get('/artifacts/example.com/llms.txt', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag}).status_code == 304
+    assert client.get('/artifacts/other.com/llms.txt').status_code == 404
@@ -0,0 +1,44 @@
+import pytest
+
+from classifier import DEFAULT_SECTION, SectionClassifier, is_available, page_tokens, tokenize
+
+pytestmark = pytest.mark.skipif(not is_available(), reason="numpy is not installed")
+
+
+def page(path, title, content=''):
+    return {'url': f"https://example.com{path}", 'title': title, 'content': content}
+
+
+def test_tokenize_drops_stopwords_and_short_tokens():
+    assert tokenize('The API and the SDK: a quick-start for you') == ['api', 'sdk', 'quick-start']
+
+
+def test_title_and_path_are_weighted_twice():
+    tokens = page_tokens(page('/billing/invoices', 'Invoices', 'payment'))
+    assert tokens.count('invoices') == 4
+    assert tokens.count('payment') == 1
+
+
+def test_unlabelled_pages_join_the_nearest_seeded_section():
+    pages = [
+        page('/a', 'Authentication API reference', 'api endpoints tokens requests authentication'),
+        page('/b', 'Pricing plans', 'pricing plans billing invoices monthly'),
+        page('/c', 'Tokens and API requests', 'api requests authentication endpoints'),
+        page('/d', 'Billing and invoices', 'billing invoices plans payment'),
+    ]
+    sections, similarities = SectionClassifier().classify(pages, {0: 'API', 1: 'Pricing'})
+    assert sections == ['API', 'Pricing', 'API', 'Pricing']
+    assert all(0 < similarity <= 1.0 + 1e-9 for similarity in similarities)
+
+
+def test_url_path_groups_seed_sections_without_labels():
+    pages = [page(f"/guides/topic-{i}", f"Guide {i}", 'setup guide steps') for i in range(3)]
+    pages.append(page('/about', 'About us', 'company team history'))
+    sections, _ = SectionClassifier().classify(pages, {})
+    assert sections[:3] == ['Guides'] * 3
+
+
+def test_without_seeds_the_fallback_decides():
+    pages = [page('/a', 'One'), page('/b', 'Two')]
+    assert SectionClassifier().classify(pages, {})[0] == [DEFAULT_SECTION, DEFAULT_SECTION]
+    assert SectionClassifier().classify(pages, {}, fallback=lambda p: p['title'])[0] == ['One', 'Two']
@@ -0,0 +1,56 @@
+from bs4 import BeautifulSoup
+
+from content_extractor import MIN_EXTRACTED_CHARS, extract_text, legacy_main_content, select_main_content
+
+ARTICLE = ' '.join(['Main content explains the topic in detail, with examples, caveats and references.'] * 6)
+
+BOILERPLATE_PAGE = f"""
+<html><body>
+  <div class="cookie-banner">We use cookies to improve your experience. Accept all cookies?</div>
+  <div class="menu"><a href="/a">Products</a> <a href="/b">Pricing</a> <a href="/c">Company</a></div>
+  <div class="post">
+    <h1>Guide</h1>
+    <p>{ARTICLE}</p>
+    <p>{ARTICLE}</p>
+    <ul class="related"><li><a href="/x">Related article one</a></li><li><a href="/y">Related article two</a></li></ul>
+  </div>
+</body></html>
+"""
+
+SHORT_PAGE = """
+<html><body><main>
+  <div class="share-widget">Short intro shared by the widget.</div>
+  <p>Tiny para.</p>
+  <ul class="related"><li>Related one</li><li>Related two</li></ul>
+  <p>Another short one.</p>
+</main></body></html>
+"""
+
+
+def test_density_extraction_drops_boilerplate():
+    text = extract_text(select_main_content(BeautifulSoup(BOILERPLATE_PAGE, 'html.parser')))
+    assert 'Main content explains the topic' in text
+    assert 'cookies' not in text
+    assert 'Pricing' not in text
+    assert 'Related article' not in text
+
+
+def test_fallback_returns_the_unpruned_legacy_selection():
+    legacy = extract_text([legacy_main_content(BeautifulSoup(SHORT_PAGE, 'html.parser'))])
+    assert len(legacy) < MIN_EXTRACTED_CHARS
+
+    extracted = extract_text(select_main_content(BeautifulSoup(SHORT_PAGE, 'html.parser')))
+    assert extracted == legacy
+    assert 'Short intro' in extracted and 'Related one' in extracted
+
+
+def test_fallback_is_the_untouched_element_from_the_page():
+    soup = BeautifulSoup(SHORT_PAGE, 'html.parser')
+    assert select_main_content(soup)[0] is soup.find('main')
+    assert soup.find(class_='share-widget') is not None
+
+
+def test_legacy_text_joins_strings_without_separator():
+    soup = BeautifulSoup('<main><p>Hello</p><p>World</p></main>', 'html.parser')
+    assert extract_text([legacy_main_content(soup)], separator='') == 'HelloWorld'
+    assert extract_text([legacy_main_content(soup)]) == 'Hello World'
@@ -0,0 +1,46 @@
+from content_tree import build_tree, diff_trees, page_digest
+
+
+def page(url, content, section='Docs', title='Title'):
+    return {'url': url, 'title': title, 'description': '', 'content': content, 'section': section}
+
+
+def test_whitespace_only_edits_keep_the_digest():
+    assert page_digest(page('https://x.com/a', 'some  text\n here')) == page_digest(page('https://x.com/a', 'some text here'))
+
+
+def test_equal_crawls_have_equal_roots_and_no_changes():
+    pages = [page('https://x.com/a', 'alpha'), page('https://x.com/b', 'beta', section='Blog')]
+    old, new = build_tree(pages), build_tree(list(reversed(pages)))
+    assert old['root'] == new['root']
+    assert diff_trees(old, new) == {'new_pages': [], 'removed_pages': [], 'modified_pages': [], 'changed_sections': []}
+
+
+def test_diff_reports_new_removed_modified_and_moved_pages():
+    old = build_tree([
+        page('https://x.com/a', 'alpha'),
+        page('https://x.com/b', 'beta'),
+        page('https://x.com/c', 'gamma', section='Blog'),
+        page('https://x.com/d', 'delta', section='Blog'),
+    ])
+    new = build_tree([
+        page('https://x.com/a', 'alpha changed'),
+        page('https://x.com/c', 'gamma', section='Docs'),
+        page('https://x.com/d', 'delta', section='Blog'),
+        page('https://x.com/e', 'epsilon', section='Blog'),
+    ])
+    changes = diff_trees(old, new)
+    assert changes['new_pages'] == ['https://x.com/e']
+    assert changes['removed_pages'] == ['https://x.com/b']
+    assert changes['changed_sections'] == ['Blog', 'Docs']
+    modified = {change['url']: change for change in changes['modified_pages']}
+    assert set(modified) == {'https://x.com/a', 'https://x.com/c'}
+    assert modified['https://x.com/a']['content_changed']
+    assert (modified['https://x.com/c']['old_section'], modified['https://x.com/c']['new_section']) == ('Blog', 'Docs')
+    assert not modified['https://x.com/c']['content_changed']
+
+
+def test_unchanged_sections_are_not_compared():
+    old = build_tree([page('https://x.com/a', 'alpha'), page('https://x.com/b', 'beta', section='Blog')])
+    new = build_tree([page('https://x.com/a', 'alpha'), page('https://x.com/b', 'beta changed', section='Blog')])
+    assert diff_trees(old, new)['changed_sections'] == ['Blog']
@@ -0,0 +1,50 @@
+import main
+from main import AICallBudget, CategoryAssignment, LLMSTxtGenerator, SiteAnalysis, WebsiteCrawler
+
+
+def ambiguous_pages(count):
+    return [{'url': f"https://example.com/p{i}", 'title': f"Page {i}", 'description': '', 'content': 'text',
+             'content_length': 4, 'importance_score': 0.5} for i in range(count)]
+
+
+def make_crawler(monkeypatch, budget, assignments):
+    monkeypatch.setattr(main, 'openai_client', object())
+    crawler = WebsiteCrawler('https://example.com', ai_budget=AICallBudget(budget), confidence_threshold=1.1)
+    site = SiteAnalysis(site_purpose='docs', target_audience='devs', main_categories=['Docs'], site_summary='')
+    monkeypatch.setattr(crawler, '_analyze_site_structure', lambda pages: site)
+    monkeypatch.setattr(crawler, '_analyze_pages_in_batches', lambda pages, analysis: {})
+    monkeypatch.setattr(crawler, '_assign_pages_to_categories',
+                        lambda pages, analysis, analyses: CategoryAssignment(assignments=assignments, rationale={}))
+    return crawler
+
+
+def test_only_pages_the_ai_labelled_count_as_escalated(monkeypatch):
+    crawler = make_crawler(monkeypatch, 10, {'0': 'Docs', '2': 'Docs'})
+    crawler.categorize_pages_with_ai(ambiguous_pages(4))
+    assert crawler.pages_escalated == 2
+
+
+def test_pages_refused_by_the_budget_are_not_counted(monkeypatch):
+    crawler = make_crawler(monkeypatch, 2, {'0': 'Docs'})
+    site_analysis = crawler._analyze_site_structure
+    # Another call of the job uses up the budget in between, so the category assignment is refused
+    monkeypatch.setattr(crawler, '_analyze_site_structure', lambda pages: (crawler.ai_budget.consume(), site_analysis(pages))[1])
+    crawler.categorize_pages_with_ai(ambiguous_pages(4))
+    assert crawler.ai_budget.remaining == 0
+    assert crawler.pages_escalated == 0
+
+
+def test_fulltext_generation_skips_ai_page_descriptions(monkeypatch):
+    monkeypatch.setattr(main, 'openai_client', object())
+    calls = []
+    monkeypatch.setattr(LLMSTxtGenerator, '_generate_description_with_ai', lambda self, page: calls.append(page) or 'AI')
+    pages = [dict(page, section='Docs') for page in ambiguous_pages(3)]
+
+    LLMSTxtGenerator('https://example.com', pages, section_cleanup=False).generate_llms_txt()
+    assert len(calls) == 3
+
+    calls.clear()
+    generator = LLMSTxtGenerator('https://example.com', pages, section_cleanup=False, description_ai=False)
+    generator.generate_llms_txt()
+    assert calls == []
+    assert generator.ai_budget.remaining == generator.ai_budget.max_calls
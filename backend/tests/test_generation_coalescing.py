@@ -0,0 +1,34 @@
+import asyncio
+
+import main
+from main import CrawlRequest
+
+
+def run_concurrently(monkeypatch, *requests):
+    runs = []
+
+    async def fake_run_generation(request):
+        runs.append(request)
+        await asyncio.sleep(0.05)
+        return request.content_format
+
+    monkeypatch.setattr(main, '_run_generation', fake_run_generation)
+
+    async def generate_all():
+        return await asyncio.gather(*(main.generate_llms_txt(request) for request in requests))
+
+    return asyncio.run(generate_all()), runs
+
+
+def test_identical_concurrent_requests_share_one_job(monkeypatch):
+    results, runs = run_concurrently(monkeypatch, CrawlRequest(url='https://example.com'),
+                                     CrawlRequest(url='https://example.com/'))
+    assert results == ['text', 'text']
+    assert len(runs) == 1
+
+
+def test_requests_differing_only_in_content_format_do_not_share_a_result(monkeypatch):
+    results, runs = run_concurrently(monkeypatch, CrawlRequest(url='https://example.com', content_format='text'),
+                                     CrawlRequest(url='https://example.com', content_format='markdown'))
+    assert results == ['text', 'markdown']
+    assert len(runs) == 2
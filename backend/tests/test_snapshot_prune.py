@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+import scheduler
+from snapshot_store import SnapshotStore, tree_digests
+
+
+class FakeCrawler:
+    def __init__(self, url, *args, **kwargs):
+        self.url = url
+
+    async def crawl(self):
+        return [{'url': f"{self.url}/guide", 'title': 'Guide', 'description': 'How to use it',
+                 'content': 'Step one, step two.', 'content_length': 19, 'importance_score': 1.0,
+                 'section': 'Docs', 'links': []}]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SnapshotStore(str(tmp_path))
+    monkeypatch.setattr(scheduler, 'SNAPSHOT_STORE', store)
+    monkeypatch.setattr(scheduler, 'SNAPSHOT_LOCK', asyncio.Lock())
+    monkeypatch.setattr(scheduler, 'MONITORED_SITES', {})
+    monkeypatch.setattr(scheduler, 'MONITOR_CHANGE_PROBES', False)
+    monkeypatch.setattr(scheduler, 'WebsiteCrawler', FakeCrawler)
+
+    async def no_artifacts(url, artifacts):
+        return None
+
+    monkeypatch.setattr(scheduler, 'store_artifacts', no_artifacts)
+    return store
+
+
+def test_prune_does_not_delete_snapshots_a_concurrent_check_is_committing(store, monkeypatch):
+    put_pages = store.put_pages
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        stored = asyncio.Event()
+
+        def put_pages_then_yield(pages):
+            written = put_pages(pages)
+            # Let the prune start between the write and the content tree being committed
+            loop.call_soon_threadsafe(stored.set)
+            return written
+
+        monkeypatch.setattr(store, 'put_pages', put_pages_then_yield)
+        check = asyncio.ensure_future(scheduler.AutoUpdater().check_site_for_updates({'url': 'https://example.com'}))
+        await stored.wait()
+        pruned = await scheduler.prune_snapshots()
+        await check
+        return pruned
+
+    assert asyncio.run(run()) == 0
+    tree = scheduler.MONITORED_SITES['https://example.com']['content_tree']
+    assert all(store.load(digest) is not None for digest in tree_digests([tree]))
+
+
+def test_prune_deletes_snapshots_no_site_references(store):
+    asyncio.run(scheduler.AutoUpdater().check_site_for_updates({'url': 'https://example.com'}))
+    scheduler.MONITORED_SITES.clear()
+    assert asyncio.run(scheduler.prune_snapshots()) == 1
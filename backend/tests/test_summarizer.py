@@ -0,0 +1,64 @@
+import pytest
+
+from summarizer import TextRankSummarizer, is_available, split_sentences, summarize_pages, summarize_site
+
+pytestmark = pytest.mark.skipif(not is_available(), reason="numpy is not installed")
+
+TOPIC = [
+    "The widget API lets you create, update and delete widgets from your own code.",
+    "Every widget API request is authenticated with a token from the widget dashboard.",
+    "Widget requests return JSON documents describing the widget and its settings.",
+    "Our office dog enjoys long walks along the river on sunny afternoons.",
+]
+
+
+def test_split_sentences_skips_fragments_and_boilerplate():
+    text = "Skip to content. " + ' '.join(TOPIC) + " Copyright 2024 Example Inc. All rights reserved."
+    assert split_sentences(text) == TOPIC
+
+
+def test_rank_scores_the_off_topic_sentence_lowest():
+    scores = TextRankSummarizer(lead_bias=0.0).rank([TOPIC])[0]
+    assert len(scores) == len(TOPIC)
+    assert scores.index(min(scores)) == 3
+
+
+def test_padding_in_a_batch_does_not_change_the_scores():
+    documents = [TOPIC, TOPIC[:2], TOPIC[1:]]
+    summarizer = TextRankSummarizer()
+    batched, single = summarizer.rank(documents), summarizer.rank(documents, batch_size=1)
+    for batched_scores, single_scores in zip(batched, single):
+        assert batched_scores == pytest.approx(single_scores)
+
+
+def test_summary_keeps_document_order_and_length_limit():
+    summary = TextRankSummarizer().summarize([TOPIC, []], max_sentences=2, max_chars=400)
+    first, second = summary[0].split('. ', 1)
+    assert TOPIC.index(first + '.') < TOPIC.index(second)
+    assert summary[1] == ''
+    assert len(TextRankSummarizer().summarize([TOPIC], max_chars=60)[0]) <= 63
+
+
+def test_summarize_pages_and_site():
+    pages = [
+        {'url': 'https://example.com/api', 'content': ' '.join(TOPIC)},
+        {'url': 'https://example.com/empty', 'content': 'Too short.'},
+    ]
+    assert set(summarize_pages(pages)) == {'https://example.com/api'}
+    assert 'widget' in summarize_site(pages).lower()
+
+
+def test_generator_computes_the_site_summary_once(monkeypatch):
+    import main
+
+    calls = []
+    monkeypatch.setattr(main, 'openai_client', None)
+    monkeypatch.setattr(main, 'summarize_site', lambda pages: calls.append(pages) or "A widget platform.")
+    pages = [{'url': 'https://example.com/', 'title': 'Widgets', 'content': ' '.join(TOPIC),
+              'description': 'Widgets', 'importance_score': 1.0}]
+    generator = main.LLMSTxtGenerator('https://example.com', pages)
+
+    full_txt = generator.generate_llms_full_txt()
+    assert ''.join(generator.iter_llms_full_txt()) == full_txt
+    assert "> A widget platform." in full_txt
+    assert len(calls) == 1
@@ -0,0 +1,65 @@
+import time
+
+from work_queue import SQLiteWorkQueue, create_work_queue
+
+
+def make_queue(tmp_path):
+    return SQLiteWorkQueue(str(tmp_path / 'queue.db'))
+
+
+def test_no_backend_means_no_queue(tmp_path):
+    assert create_work_queue('', str(tmp_path / 'queue.db')) is None
+    assert create_work_queue('none', str(tmp_path / 'queue.db')) is None
+
+
+def test_leased_items_are_hidden_until_acked_and_requeued(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('https://a.com')
+    queue.enqueue('https://b.com', time.time() + 3600)
+
+    leases = queue.lease('w1', 10, 60)
+    assert [lease.item for lease in leases] == ['https://a.com']
+    assert queue.lease('w2', 10, 60) == []
+    assert queue.stats()['leased'] == 1
+
+    requeue_at = time.time() + 120
+    assert queue.ack(leases[0], requeue_at)
+    assert queue.lease('w2', 10, 60) == []
+    assert abs(queue.next_visible_at() - requeue_at) < 1e-6
+
+
+def test_ack_without_requeue_removes_the_item(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('https://a.com')
+    assert queue.ack(queue.lease('w1', 1, 60)[0])
+    assert queue.stats()['items'] == 0
+
+
+def test_enqueue_keeps_the_schedule_of_a_queued_item(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('https://a.com', 100.0)
+    queue.enqueue('https://a.com', 0.0)
+    assert queue.next_visible_at() == 100.0
+
+
+def test_expired_lease_is_handed_to_another_worker(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('https://a.com')
+    stale = queue.lease('w1', 1, 0.05)[0]
+    time.sleep(0.1)
+
+    current = queue.lease('w2', 1, 60)[0]
+    assert current.item == stale.item
+    assert not queue.renew(stale, 60)
+    assert not queue.ack(stale)
+    assert queue.renew(current, 60)
+    assert queue.ack(current)
+
+
+def test_renew_keeps_a_held_lease_hidden(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue('https://a.com')
+    lease = queue.lease('w1', 1, 0.05)[0]
+    assert queue.renew(lease, 60)
+    time.sleep(0.1)
+    assert queue.lease('w2', 1, 60) == []
@@ -0,0 +1,229 @@
+"""
+Shared work queue with lease/ack semantics for monitoring workers.
+
+Every monitored site is one item scheduled at the time it is next due. A
+worker leases due items: each one becomes invisible to other workers for a
+visibility timeout and carries a lease token. The worker acks the item with
+that token when done, which removes it or reschedules it for its next check.
+If the worker dies, the lease runs out, the item becomes visible again and
+another worker picks it up. An ack with an expired token that another
+worker has since re-leased is refused, so a site is never acked twice.
+Before committing its results, a worker renews the lease: a refused renewal
+means another worker took the item over, and the results are dropped.
+
+Two backends are available: SQLite for workers on one host (it may share
+the monitor database file), and any Redis-protocol server through the
+`redis` package, where lease and ack run as Lua scripts. Times are the
+workers' wall clocks, so hosts sharing a Redis queue need synchronized
+clocks.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_queue (
+    item TEXT PRIMARY KEY,
+    visible_at REAL NOT NULL,
+    lease_token TEXT,
+    leased_by TEXT
+);
+CREATE INDEX IF NOT EXISTS work_queue_visible_at ON work_queue (visible_at);
+"""
+
+
+class Lease(NamedTuple):
+    item: str
+    token: str
+
+
+class SQLiteWorkQueue:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # Autocommit mode, so lease can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, item: str, available_at: float = 0.0):
+        """Schedule an item unless it is already queued (a queued or leased item keeps its schedule)"""
+        with self._lock:
+            self._conn.execute('INSERT OR IGNORE INTO work_queue (item, visible_at) VALUES (?, ?)', (item, available_at))
+
+    def lease(self, worker_id: str, limit: int, visibility_timeout: float) -> List[Lease]:
+        """Lease up to `limit` due items, hiding them from other workers for visibility_timeout seconds"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                items = [item for item, in self._conn.execute(
+                    'SELECT item FROM work_queue WHERE visible_at <= ? ORDER BY visible_at LIMIT ?', (now, limit)
+                )]
+                leases = [Lease(item, uuid.uuid4().hex) for item in items]
+                self._conn.executemany(
+                    'UPDATE work_queue SET visible_at = ?, lease_token = ?, leased_by = ? WHERE item = ?',
+                    [(now + visibility_timeout, lease.token, worker_id, lease.item) for lease in leases]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return leases
+
+    def renew(self, lease: Lease, visibility_timeout: float) -> bool:
+        """Keep a leased item hidden for visibility_timeout more seconds. False if the lease was lost"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE work_queue SET visible_at = ? WHERE item = ? AND lease_token = ?',
+                (time.time() + visibility_timeout, lease.item, lease.token)
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, lease: Lease, requeue_at: Optional[float] = None) -> bool:
+        """Finish a leased item: delete it, or reschedule it at requeue_at. False if the lease was lost"""
+        with self._lock:
+            if requeue_at is None:
+                cursor = self._conn.execute(
+                    'DELETE FROM work_queue WHERE item = ? AND lease_token = ?', (lease.item, lease.token)
+                )
+            else:
+                cursor = self._conn.execute(
+                    'UPDATE work_queue SET visible_at = ?, lease_token = NULL, leased_by = NULL '
+                    'WHERE item = ? AND lease_token = ?', (requeue_at, lease.item, lease.token)
+                )
+        return cursor.rowcount == 1
+
+    def remove(self, item: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM work_queue WHERE item = ?', (item,))
+
+    def next_visible_at(self) -> Optional[float]:
+        """Earliest time an item becomes leasable, or None for an empty queue"""
+        with self._lock:
+            return self._conn.execute('SELECT MIN(visible_at) FROM work_queue').fetchone()[0]
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            items, ready, leased = self._conn.execute(
+                'SELECT COUNT(*), COUNT(CASE WHEN visible_at <= ? THEN 1 END), '
+                'COUNT(CASE WHEN visible_at > ? AND lease_token IS NOT NULL THEN 1 END) FROM work_queue',
+                (now, now)
+            ).fetchone()
+        return {'backend': 'sqlite', 'items': items, 'ready': ready, 'leased': leased}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# KEYS: schedule zset, leases hash; ARGV: now, limit, lease expiry, token prefix
+LEASE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local leases = {}
+for i, item in ipairs(items) do
+    local token = ARGV[4] .. i
+    redis.call('ZADD', KEYS[1], ARGV[3], item)
+    redis.call('HSET', KEYS[2], item, token)
+    table.insert(leases, item)
+    table.insert(leases, token)
+end
+return leases
+"""
+
+# KEYS: schedule zset, leases hash; ARGV: item, token, new visibility time
+RENEW_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: schedule zset, leases hash; ARGV: item, token, requeue time ('' to delete)
+ACK_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+if ARGV[3] == '' then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+else
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+end
+return 1
+"""
+
+
+class RedisWorkQueue:
+    """Items in a sorted set scored by visibility time, lease tokens in a hash"""
+
+    def __init__(self, url: str, name: str = 'monitor'):
+        if redis is None:
+            raise RuntimeError("redis is required for the Redis work queue")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.url = url
+        self.keys = [f"{name}:schedule", f"{name}:leases"]
+        self._lease = self.client.register_script(LEASE_SCRIPT)
+        self._renew = self.client.register_script(RENEW_SCRIPT)
+        self._ack = self.client.register_script(ACK_SCRIPT)
+        # Loaded up front, so a server without scripting fails here rather than on the first lease
+        for script in (self._lease, self._renew, self._ack):
+            self.client.script_load(script.script)
+
+    def enqueue(self, item: str, available_at: float = 0.0):
+        self.client.zadd(self.keys[0], {item: available_at}, nx=True)
+
+    def lease(self, worker_id: str, limit: int, visibility_timeout: float) -> List[Lease]:
+        now = time.time()
+        flat = self._lease(keys=self.keys, args=[now, limit, now + visibility_timeout, f"{worker_id}:{uuid.uuid4().hex}:"])
+        return [Lease(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+    def renew(self, lease: Lease, visibility_timeout: float) -> bool:
+        return self._renew(keys=self.keys, args=[lease.item, lease.token, time.time() + visibility_timeout]) == 1
+
+    def ack(self, lease: Lease, requeue_at: Optional[float] = None) -> bool:
+        return self._ack(keys=self.keys, args=[lease.item, lease.token, '' if requeue_at is None else requeue_at]) == 1
+
+    def remove(self, item: str):
+        pipeline = self.client.pipeline()
+        pipeline.zrem(self.keys[0], item)
+        pipeline.hdel(self.keys[1], item)
+        pipeline.execute()
+
+    def next_visible_at(self) -> Optional[float]:
+        first = self.client.zrange(self.keys[0], 0, 0, withscores=True)
+        return first[0][1] if first else None
+
+    def stats(self) -> Dict:
+        now = time.time()
+        items = self.client.zcard(self.keys[0])
+        ready = self.client.zcount(self.keys[0], '-inf', now)
+        # Tokens of expired leases stay in the hash until the item is leased again, so this is an upper bound
+        return {'backend': 'redis', 'items': items, 'ready': ready, 'leased': min(self.client.hlen(self.keys[1]), items - ready)}
+
+    def close(self):
+        self.client.close()
+
+
+def create_work_queue(backend: str, sqlite_path: str, redis_url: Optional[str] = None, name: str = 'monitor'):
+    """The configured queue, or None when workers are not sharing one ('' or 'none')"""
+    if backend in ('', 'none'):
+        return None
+    if backend == 'sqlite':
+        return SQLiteWorkQueue(sqlite_path)
+    if backend == 'redis':
+        if not redis_url:
+            raise ValueError("MONITOR_QUEUE_REDIS_URL must be set for the Redis work queue")
+        return RedisWorkQueue(redis_url, name)
+    raise ValueError(f"Unknown work queue backend '{backend}' (use: sqlite, redis)")